@@ -0,0 +1,218 @@
+# 📍 lib/balance_cache.py
+import logging
+import os
+from collections import OrderedDict, defaultdict, deque
+
+from lib.balance_checker import (
+    EVM_CHAINS,
+    check_token_balances,
+    check_token_balances_at_head,
+    fetch_native_balance,
+    fetch_native_balance_at_head,
+)
+from lib.head_tracker import get_head, network_key, on_new_head
+
+logger = logging.getLogger(__name__)
+
+# ======= Config cache saldo =======
+BALANCE_CACHE_MAX_SIZE = int(os.getenv("BALANCE_CACHE_MAX_SIZE", "10000"))
+# batas max_staleness_blocks dari caller; entry lebih tua dari ini dibuang saat head maju
+BALANCE_CACHE_MAX_STALENESS = int(os.getenv("BALANCE_CACHE_MAX_STALENESS", "100"))
+
+NATIVE = "native"
+
+# ======= State =======
+# {(network, wallet, token): {"value", "block"}}, urut LRU
+_cache = OrderedDict()
+# {network: deque[(block, key)]}, urut block naik (head tidak mundur) → invalidasi
+# cukup pop dari depan, tidak perlu scan seluruh cache tiap blok baru
+_by_block = defaultdict(deque)
+_live = defaultdict(int)  # {network: jumlah entry di _cache} → index dibuang kalau 0
+_stats = {"hits": 0, "misses": 0, "invalidated": 0, "evicted": 0}
+
+
+def _invalidate(network: str, old: int, new: int):
+    """Head tracker lihat blok baru → buang entry network ini yang sudah terlalu tua"""
+    horizon = new - BALANCE_CACHE_MAX_STALENESS
+    index = _by_block.get(network)
+    while index and index[0][0] < horizon:
+        block, key = index.popleft()
+        entry = _cache.get(key)
+        # entry sudah ditimpa dengan block lebih baru / sudah keluar LRU → lewati
+        if entry is not None and entry["block"] == block:
+            del _cache[key]
+            _forget(network)
+            _stats["invalidated"] += 1
+    if index is not None and not index:
+        _by_block.pop(network, None)
+
+
+on_new_head(_invalidate)
+
+
+def _forget(network: str):
+    """Satu entry network keluar dari cache; network tanpa entry → index-nya dibuang"""
+    _live[network] -= 1
+    if _live[network] <= 0:
+        del _live[network]
+        # network dari rpc_url user yang tidak di-polling lagi tidak menyisakan index
+        _by_block.pop(network, None)
+
+
+def _compact(network: str):
+    """
+    Buang tuple index yang entry-nya sudah ditimpa / keluar LRU.
+    Hanya kalau index jauh lebih panjang dari entry hidup → amortized O(1) per store.
+    """
+    index = _by_block[network]
+    if len(index) <= 2 * _live[network] + 16:
+        return
+    live = deque()
+    for block, key in index:
+        entry = _cache.get(key)
+        if entry is not None and entry["block"] == block:
+            live.append((block, key))
+    _by_block[network] = live
+
+
+def _wallet_key(chain: str, wallet: str) -> str:
+    # address EVM case-insensitive → satu entry untuk checksum & lowercase
+    return wallet.lower() if chain in EVM_CHAINS else wallet
+
+
+def _lookup(key: tuple, head: int, max_staleness: int):
+    entry = _cache.get(key)
+    if entry is None or head - entry["block"] > max_staleness:
+        return None
+    _cache.move_to_end(key)
+    return entry
+
+
+def _store(key: tuple, value, block: int):
+    network = key[0]
+    previous = _cache.get(key)
+    if previous is None:
+        _live[network] += 1
+    _cache[key] = {"value": value, "block": block}
+    _cache.move_to_end(key)
+    if previous is None or previous["block"] != block:
+        _by_block[network].append((block, key))
+        _compact(network)
+    while len(_cache) > BALANCE_CACHE_MAX_SIZE:
+        evicted, _ = _cache.popitem(last=False)
+        _forget(evicted[0])
+        _stats["evicted"] += 1
+
+
+# ===================== NATIVE =====================
+async def get_native_balance_cached(
+    chain: str, wallet: str, rpc_url: str = None, max_staleness_blocks: int = 0
+) -> dict:
+    """
+    Saldo native dengan cache per (chain, wallet), ditandai block height saat dibaca.
+    Cache dipakai selama head - block <= max_staleness_blocks.
+    Return {"balance", "block_number", "cached"}.
+    """
+    chain = chain.lower()
+    try:
+        network = network_key(chain, rpc_url)
+        head = await get_head(chain, rpc_url)
+    except Exception as e:
+        # head tidak terbaca → baca langsung tanpa cache
+        logger.warning(f"⚠️ Head {chain.upper()} tidak terbaca, bypass cache: {e}")
+        network = head = None
+
+    key = (network, _wallet_key(chain, wallet), NATIVE)
+    if head is not None:
+        entry = _lookup(key, head, max_staleness_blocks)
+        if entry is not None:
+            _stats["hits"] += 1
+            return {
+                "balance": entry["value"],
+                "block_number": entry["block"],
+                "cached": True,
+            }
+    _stats["misses"] += 1
+
+    try:
+        if head is None:
+            balance, block = await fetch_native_balance(chain, wallet, rpc_url), None
+        else:
+            # ditandai height asal data (bukan head) → endpoint yang tertinggal
+            # tidak tercatat sebagai blok `head`
+            balance, block = await fetch_native_balance_at_head(
+                chain, wallet, head, rpc_url
+            )
+    except Exception as e:
+        # sama dengan check_balance: gagal → 0, tapi jangan disimpan di cache
+        logger.error(f"❌ Gagal cek wallet {wallet}: {e}")
+        return {"balance": 0.0, "block_number": None, "cached": False}
+
+    if block is not None:
+        _store(key, balance, block)
+    return {"balance": balance, "block_number": block, "cached": False}
+
+
+# ===================== TOKEN =====================
+async def get_token_balances_cached(
+    chain: str,
+    wallet: str,
+    token_addresses: list,
+    rpc_url: str = None,
+    max_staleness_blocks: int = 0,
+) -> dict:
+    """
+    Saldo token dengan cache per (chain, wallet, token). Token yang tidak ada
+    di cache dibaca sekaligus dalam satu batch. Return {"tokens", "block_number", "cached"}.
+    """
+    chain = chain.lower()
+    try:
+        network = network_key(chain, rpc_url)
+        head = await get_head(chain, rpc_url)
+    except Exception as e:
+        logger.warning(f"⚠️ Head {chain.upper()} tidak terbaca, bypass cache: {e}")
+        network = head = None
+
+    wallet_key = _wallet_key(chain, wallet)
+    results = {}
+    blocks = []  # height asal data tiap hasil; None = tidak diketahui
+    if head is not None:
+        for token in token_addresses:
+            entry = _lookup((network, wallet_key, token), head, max_staleness_blocks)
+            if entry is not None:
+                results[token] = entry["value"]
+                blocks.append(entry["block"])
+    _stats["hits"] += len(results)
+
+    missing = [token for token in token_addresses if token not in results]
+    if missing:
+        _stats["misses"] += len(missing)
+        if head is None:
+            items, block = await check_token_balances(chain, wallet, missing, rpc_url), None
+        else:
+            items, block = await check_token_balances_at_head(
+                chain, wallet, missing, head, rpc_url
+            )
+        blocks.append(block)
+        for item in items:
+            results[item["token_address"]] = item
+            # hasil error tidak disimpan → request berikutnya coba lagi
+            if block is not None and item["error"] is None:
+                _store((network, wallet_key, item["token_address"]), item, block)
+
+    return {
+        "tokens": [results[token] for token in token_addresses],
+        "block_number": None if None in blocks or not blocks else min(blocks),
+        "cached": not missing,
+    }
+
+
+# ===================== STATS =====================
+def cache_stats() -> dict:
+    """Statistik cache saldo (untuk monitoring)"""
+    return {
+        "size": len(_cache),
+        "max_size": BALANCE_CACHE_MAX_SIZE,
+        "max_staleness": BALANCE_CACHE_MAX_STALENESS,
+        **_stats,
+    }
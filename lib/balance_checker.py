@@ -1,23 +1,66 @@
 # 📍 lib/balance_checker.py
+import asyncio
 import logging
+import os
 from web3 import Web3
-from tronpy import Tron
-from tronpy.providers import HTTPProvider
-from solana.rpc.api import Client
+from lib.rpc_pool import get_web3, get_async_web3, get_solana_client, get_tron_client
+from lib.rpc_router import route, route_sync
+from solana.rpc.types import TokenAccountOpts
 from solders.pubkey import Pubkey
-import asyncio
+from spl.token.constants import TOKEN_PROGRAM_ID
+from tronpy.keys import to_hex_address
 
 logger = logging.getLogger(__name__)
 
+# ======= Config bulk balance (Multicall3) =======
+# alamat Multicall3 sama di semua chain EVM (eth, bsc, base, polygon, testnet-nya)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    }
+]
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # balanceOf(address)
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")  # decimals()
+BULK_BALANCE_CHUNK_SIZE = int(os.getenv("BULK_BALANCE_CHUNK_SIZE", "500"))
+BULK_BALANCE_MAX_WALLETS = int(os.getenv("BULK_BALANCE_MAX_WALLETS", "5000"))
+EVM_CHAINS = ["eth", "bsc", "bnb", "base", "polygon"]
+
+# ======= Config saldo historis Solana =======
+SOL_HISTORY_PAGE_SIZE = 1000  # batas getSignaturesForAddress per call
+SOL_HISTORY_MAX_PAGES = int(os.getenv("SOL_HISTORY_MAX_PAGES", "10"))
+
 
 # ===================== ETH / BSC / BNB =====================
-def get_eth_bsc_balance(rpc_url: str, wallet: str) -> float:
-    if not rpc_url:
-        logger.error("❌ RPC tidak diberikan")
-        return 0.0
+def get_eth_bsc_balance(rpc_url: str, wallet: str, chain: str = "eth") -> float:
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        balance_wei = w3.eth.get_balance(wallet)
+        balance_wei = route_sync(
+            chain, rpc_url, lambda url: get_web3(url).eth.get_balance(wallet)
+        )
         balance = Web3.from_wei(balance_wei, "ether")
         logger.info(f"💰 Balance untuk {wallet}: {balance}")
         return float(balance)
@@ -26,49 +69,501 @@ def get_eth_bsc_balance(rpc_url: str, wallet: str) -> float:
         return 0.0
 
 
-# ===================== SOLANA =====================
-def get_solana_balance(rpc_url: str, wallet: str) -> float:
-    if not rpc_url:
-        logger.error("❌ RPC tidak diberikan")
+async def _evm_native_balance(
+    rpc_url: str, wallet: str, chain: str, block_identifier="latest"
+) -> float:
+    address = Web3.to_checksum_address(wallet)
+    balance_wei = await route(
+        chain,
+        rpc_url,
+        lambda url: get_async_web3(url).eth.get_balance(address, block_identifier),
+        hedge=True,
+    )
+    balance = Web3.from_wei(balance_wei, "ether")
+    logger.info(f"💰 Balance untuk {wallet}: {balance}")
+    return float(balance)
+
+
+async def get_eth_bsc_balance_async(
+    rpc_url: str, wallet: str, chain: str = "eth"
+) -> float:
+    """Versi non-blocking get_eth_bsc_balance, pakai AsyncWeb3 dari pool"""
+    try:
+        return await _evm_native_balance(rpc_url, wallet, chain)
+    except Exception as e:
+        logger.error(f"❌ Gagal cek wallet {wallet}: {e}")
         return 0.0
+
+
+# ===================== EVM BULK (Multicall3) =====================
+def _address_arg(address: str) -> bytes:
+    """Argumen `address` ABI-encoded (32 byte)"""
+    return Web3.to_bytes(hexstr=address).rjust(32, b"\0")
+
+
+async def _aggregate3(rpc_url: str, calls: list, block_identifier="latest") -> list:
+    """
+    Satu eth_call aggregate3 untuk banyak call [(target, calldata)].
+    Return [(success, returnData)] sesuai urutan calls.
+    """
+    w3 = get_async_web3(rpc_url)
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    # eth_call mentah: tanpa isi default tx (eth_chainId dkk) per chunk
+    raw = await w3.eth.call(
+        {
+            "to": MULTICALL3_ADDRESS,
+            "data": multicall.encode_abi(
+                "aggregate3",
+                args=[[(target, True, data) for target, data in calls]],
+            ),
+        },
+        block_identifier,
+    )
+    return w3.codec.decode(["(bool,bytes)[]"], raw)[0]
+
+
+async def get_evm_balances_bulk(
+    rpc_url: str, wallets: list, chain: str = "eth"
+) -> dict:
+    """
+    Saldo native banyak wallet sekaligus lewat Multicall3.
+    Dipecah per BULK_BALANCE_CHUNK_SIZE address, semua chunk dibaca
+    di block number yang sama supaya hasilnya konsisten.
+    """
+    chain = chain.lower()
+    if chain not in EVM_CHAINS:
+        raise ValueError(f"Chain {chain} tidak didukung untuk bulk balance")
+    if len(wallets) > BULK_BALANCE_MAX_WALLETS:
+        raise ValueError(
+            f"Maksimal {BULK_BALANCE_MAX_WALLETS} wallet per request, dikirim {len(wallets)}"
+        )
+
+    # urutan hasil = urutan input (duplikat dibuang)
+    results = dict.fromkeys(wallets)
+    valid = []
+    for wallet in results:
+        if Web3.is_address(wallet):
+            valid.append(wallet)
+        else:
+            results[wallet] = {
+                "wallet": wallet,
+                "balance": None,
+                "error": "Invalid address",
+            }
+
+    block_number = await route(
+        chain, rpc_url, lambda url: get_async_web3(url).eth.block_number
+    )
+    chunks = [
+        valid[i : i + BULK_BALANCE_CHUNK_SIZE]
+        for i in range(0, len(valid), BULK_BALANCE_CHUNK_SIZE)
+    ]
+    logger.info(
+        f"📦 Bulk balance {chain.upper()}: {len(valid)} wallet, "
+        f"{len(chunks)} multicall @ block {block_number}"
+    )
+
+    responses = await asyncio.gather(
+        *(
+            route(
+                chain,
+                rpc_url,
+                lambda url, chunk=chunk: _aggregate3(
+                    url,
+                    [
+                        (
+                            MULTICALL3_ADDRESS,
+                            GET_ETH_BALANCE_SELECTOR + _address_arg(address),
+                        )
+                        for address in chunk
+                    ],
+                    block_number,
+                ),
+                hedge=True,
+            )
+            for chunk in chunks
+        ),
+        return_exceptions=True,
+    )
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, Exception):
+            logger.error(f"❌ Multicall {len(chunk)} wallet gagal: {response}")
+            for address in chunk:
+                results[address] = {
+                    "wallet": address,
+                    "balance": None,
+                    "error": str(response),
+                }
+            continue
+        for address, (success, data) in zip(chunk, response):
+            results[address] = (
+                {
+                    "wallet": address,
+                    "balance": float(
+                        Web3.from_wei(int.from_bytes(data, "big"), "ether")
+                    ),
+                    "error": None,
+                }
+                if success
+                else {"wallet": address, "balance": None, "error": "Call gagal"}
+            )
+
+    return {"block_number": block_number, "results": list(results.values())}
+
+
+# ===================== TOKEN ERC20 (Multicall3) =====================
+def _token_result(token: str, raw: int = None, decimals: int = None, error=None):
+    """Satu baris hasil saldo token (balance None kalau error)"""
+    return {
+        "token_address": token,
+        "balance": raw / (10 ** (decimals or 0)) if error is None else None,
+        "decimals": decimals,
+        "error": str(error) if error is not None else None,
+    }
+
+
+async def get_evm_token_balances(
+    rpc_url: str,
+    wallet: str,
+    token_addresses: list,
+    chain: str = "eth",
+    block_identifier="latest",
+) -> list:
+    """balanceOf + decimals semua token ERC20 satu wallet dalam 1 multicall"""
+    tokens = [t for t in token_addresses if Web3.is_address(t)]
+    owner = _address_arg(wallet)
+    calls = []
+    for token in tokens:
+        token = Web3.to_checksum_address(token)
+        calls += [(token, BALANCE_OF_SELECTOR + owner), (token, DECIMALS_SELECTOR)]
+
+    try:
+        response = (
+            await route(
+                chain,
+                rpc_url,
+                lambda url: _aggregate3(url, calls, block_identifier),
+                hedge=True,
+            )
+            if calls
+            else []
+        )
+    except Exception as e:
+        logger.error(f"❌ Gagal cek token wallet {wallet}: {e}")
+        response = e
+
+    results = {}
+    for i, token in enumerate(tokens):
+        if isinstance(response, Exception):
+            results[token] = _token_result(token, error=response)
+            continue
+        (balance_ok, balance_raw), (decimals_ok, decimals_raw) = response[
+            2 * i : 2 * i + 2
+        ]
+        if not balance_ok or not balance_raw:
+            # bukan kontrak ERC20 / revert
+            results[token] = _token_result(token, error="balanceOf gagal")
+            continue
+        decimals = (
+            int.from_bytes(decimals_raw, "big") if decimals_ok and decimals_raw else 18
+        )
+        results[token] = _token_result(
+            token, int.from_bytes(balance_raw, "big"), decimals
+        )
+
+    return [
+        results.get(token) or _token_result(token, error="Invalid address")
+        for token in token_addresses
+    ]
+
+
+# ===================== SOLANA =====================
+async def _sol_native_balance_slot(rpc_url: str, wallet: str) -> tuple:
+    """(saldo SOL, slot context response) → slot asal data, bukan slot head"""
+    pubkey = Pubkey.from_string(wallet)
+    resp = await route(
+        "sol",
+        rpc_url,
+        lambda url: get_solana_client(url).get_balance(pubkey),
+        hedge=True,
+    )
+    lamports = resp.value
+    sol = lamports / 1_000_000_000
+    logger.info(f"💰 SOL balance untuk {wallet}: {sol}")
+    return sol, resp.context.slot
+
+
+async def _sol_native_balance(rpc_url: str, wallet: str) -> float:
+    return (await _sol_native_balance_slot(rpc_url, wallet))[0]
+
+
+async def _sol_post_balance(rpc_url: str, pubkey: Pubkey, signature) -> float:
+    """Saldo akun setelah transaksi `signature` (meta.postBalances)"""
+    resp = await route(
+        "sol",
+        rpc_url,
+        lambda url: get_solana_client(url).get_transaction(
+            signature, commitment="confirmed", max_supported_transaction_version=0
+        ),
+        hedge=True,
+    )
+    if resp.value is None:
+        raise ValueError(f"Transaksi {signature} tidak ditemukan")
+    tx = resp.value.transaction
+    keys = list(tx.transaction.message.account_keys)
+    loaded = tx.meta.loaded_addresses
+    if loaded is not None:
+        # akun dari address lookup table (tx v0) ada setelah static keys
+        keys += list(loaded.writable) + list(loaded.readonly)
+    return tx.meta.post_balances[keys.index(pubkey)] / 1_000_000_000
+
+
+async def _sol_balance_at_slot(rpc_url: str, wallet: str, slot: int) -> float:
+    """
+    Saldo SOL di akhir `slot`. Node Solana tidak menyimpan state lama, jadi
+    diambil dari postBalances transaksi terakhir wallet di / sebelum slot itu.
+    """
+    pubkey = Pubkey.from_string(wallet)
+    before = None
+    for _ in range(SOL_HISTORY_MAX_PAGES):
+        resp = await route(
+            "sol",
+            rpc_url,
+            lambda url: get_solana_client(url).get_signatures_for_address(
+                pubkey,
+                before=before,
+                limit=SOL_HISTORY_PAGE_SIZE,
+                commitment="confirmed",
+            ),
+            hedge=True,
+        )
+        # urutan dari yang terbaru → yang pertama <= slot adalah transaksi terakhir
+        for item in resp.value:
+            if item.slot <= slot:
+                sol = await _sol_post_balance(rpc_url, pubkey, item.signature)
+                logger.info(f"💰 SOL balance untuk {wallet} @ slot {slot}: {sol}")
+                return sol
+        if len(resp.value) < SOL_HISTORY_PAGE_SIZE:
+            # wallet belum punya transaksi sampai slot ini
+            return 0.0
+        before = resp.value[-1].signature
+    raise ValueError(
+        f"Lebih dari {SOL_HISTORY_MAX_PAGES * SOL_HISTORY_PAGE_SIZE} transaksi "
+        f"{wallet} setelah slot {slot}, saldo historis tidak bisa ditelusuri"
+    )
+
+
+async def get_solana_balance(rpc_url: str, wallet: str) -> float:
     try:
-        client = Client(rpc_url)
-        pubkey = Pubkey.from_string(wallet)
-        resp = client.get_balance(pubkey)
-        lamports = resp.value
-        sol = lamports / 1_000_000_000
-        logger.info(f"💰 SOL balance untuk {wallet}: {sol}")
-        return sol
+        return await _sol_native_balance(rpc_url, wallet)
     except Exception as e:
         logger.error(f"❌ Gagal cek SOL wallet {wallet}: {e}", exc_info=True)
         return 0.0
 
 
+async def get_spl_token_balances(rpc_url: str, wallet: str, mints: list) -> list:
+    """
+    Saldo banyak token SPL satu wallet dengan 1 call getTokenAccountsByOwner
+    (semua token account milik wallet, dijumlah per mint).
+    """
+    return (await _spl_token_balances_slot(rpc_url, wallet, mints))[0]
+
+
+async def _spl_token_balances_slot(rpc_url: str, wallet: str, mints: list) -> tuple:
+    """(hasil per mint, slot context response); slot None kalau call gagal"""
+    try:
+        owner = Pubkey.from_string(wallet)
+        resp = await route(
+            "sol",
+            rpc_url,
+            lambda url: get_solana_client(url).get_token_accounts_by_owner_json_parsed(
+                owner, TokenAccountOpts(program_id=TOKEN_PROGRAM_ID)
+            ),
+            hedge=True,
+        )
+    except Exception as e:
+        logger.error(f"❌ Gagal cek token SOL wallet {wallet}: {e}")
+        return [_token_result(mint, error=e) for mint in mints], None
+
+    totals = {}  # {mint: [amount_raw, decimals]}
+    for keyed in resp.value:
+        info = keyed.account.data.parsed["info"]
+        amount = info["tokenAmount"]
+        total = totals.setdefault(info["mint"], [0, amount["decimals"]])
+        total[0] += int(amount["amount"])
+
+    # wallet tanpa token account untuk mint itu → saldo 0
+    return [
+        (
+            _token_result(mint, *totals[mint])
+            if mint in totals
+            else _token_result(mint, 0)
+        )
+        for mint in mints
+    ], resp.context.slot
+
+
 # ===================== TRON =====================
-def get_trx_balance(node_url: str, wallet: str) -> float:
-    if not node_url:
-        logger.error("❌ Node URL tidak diberikan")
-        return 0.0
+async def _trx_native_balance(node_url: str, wallet: str) -> float:
+    # get_account_balance sudah dalam satuan TRX (Decimal)
+    balance = await route(
+        "trx",
+        node_url,
+        lambda url: get_tron_client(url).get_account_balance(wallet),
+        hedge=True,
+    )
+    balance_trx = float(balance)
+    logger.info(f"💰 TRX balance untuk {wallet}: {balance_trx}")
+    return balance_trx
+
+
+async def get_trx_balance(node_url: str, wallet: str) -> float:
     try:
-        client = Tron(provider=HTTPProvider(node_url))
-        balance_sun = client.get_account_balance(wallet)
-        balance_trx = balance_sun / 1_000_000
-        logger.info(f"💰 TRX balance untuk {wallet}: {balance_trx}")
-        return balance_trx
+        return await _trx_native_balance(node_url, wallet)
     except Exception as e:
         logger.error(f"❌ Gagal cek TRX wallet {wallet}: {e}")
         return 0.0
 
 
+async def _trc20_call(rpc_url: str, wallet: str, token: str, selector: str, param: str):
+    """Satu constant-contract call TRC20 (tanpa ambil ABI kontrak dulu)"""
+    result = await get_tron_client(rpc_url).trigger_const_smart_contract_function(
+        wallet, token, selector, param
+    )
+    return int(result, 16) if result else None
+
+
+async def get_trc20_token_balances(
+    node_url: str, wallet: str, token_addresses: list
+) -> list:
+    """balanceOf + decimals semua token TRC20 satu wallet, dijalankan paralel"""
+    try:
+        owner = to_hex_address(wallet)[2:].rjust(64, "0")
+    except Exception as e:
+        return [_token_result(token, error=e) for token in token_addresses]
+
+    def read(token: str, selector: str, param: str = ""):
+        return route(
+            "trx",
+            node_url,
+            lambda url: _trc20_call(url, wallet, token, selector, param),
+            hedge=True,
+        )
+
+    responses = await asyncio.gather(
+        *(
+            asyncio.gather(
+                read(token, "balanceOf(address)", owner), read(token, "decimals()")
+            )
+            for token in token_addresses
+        ),
+        return_exceptions=True,
+    )
+    results = []
+    for token, response in zip(token_addresses, responses):
+        if isinstance(response, Exception):
+            logger.error(f"❌ Gagal cek TRC20 {token} wallet {wallet}: {response}")
+            results.append(_token_result(token, error=response))
+            continue
+        balance_raw, decimals = response
+        if balance_raw is None:
+            results.append(_token_result(token, error="balanceOf gagal"))
+            continue
+        results.append(_token_result(token, balance_raw, decimals or 0))
+    return results
+
+
 # ===================== WRAPPER =====================
-async def check_balance(chain: str, wallet: str, rpc_url: str) -> float:
+async def check_balance(chain: str, wallet: str, rpc_url: str = None) -> float:
     chain = chain.lower()
-    if chain in ["eth", "bsc", "bnb"]:
-        return get_eth_bsc_balance(rpc_url, wallet)
+    if chain in EVM_CHAINS:
+        return await get_eth_bsc_balance_async(rpc_url, wallet, chain)
     elif chain == "sol":
-        return await asyncio.to_thread(get_solana_balance, rpc_url, wallet)
+        return await get_solana_balance(rpc_url, wallet)
     elif chain == "trx":
-        return get_trx_balance(rpc_url, wallet)
+        return await get_trx_balance(rpc_url, wallet)
     else:
         logger.error(f"❌ Chain {chain} tidak didukung")
         return 0.0
+
+
+async def fetch_native_balance(chain: str, wallet: str, rpc_url: str = None) -> float:
+    """Seperti check_balance, tapi error dilempar (bukan jadi 0) → bisa dibedakan di portfolio"""
+    chain = chain.lower()
+    if chain in EVM_CHAINS:
+        return await _evm_native_balance(rpc_url, wallet, chain)
+    elif chain == "sol":
+        return await _sol_native_balance(rpc_url, wallet)
+    elif chain == "trx":
+        return await _trx_native_balance(rpc_url, wallet)
+    else:
+        raise ValueError(f"Chain {chain} tidak didukung")
+
+
+async def fetch_native_balance_at(
+    chain: str, wallet: str, height: int, rpc_url: str = None
+) -> float:
+    """Saldo native di block (EVM) / slot (SOL) tertentu; error dilempar"""
+    chain = chain.lower()
+    if chain in EVM_CHAINS:
+        return await _evm_native_balance(rpc_url, wallet, chain, height)
+    elif chain == "sol":
+        return await _sol_balance_at_slot(rpc_url, wallet, height)
+    else:
+        raise ValueError(f"Saldo historis belum didukung untuk chain {chain}")
+
+
+async def check_token_balances(
+    chain: str, wallet: str, token_addresses: list, rpc_url: str = None
+) -> list:
+    """Saldo token (ERC20 / SPL / TRC20) satu wallet; error per token ada di `error`"""
+    chain = chain.lower()
+    if chain in EVM_CHAINS:
+        return await get_evm_token_balances(rpc_url, wallet, token_addresses, chain)
+    elif chain == "sol":
+        return await get_spl_token_balances(rpc_url, wallet, token_addresses)
+    elif chain == "trx":
+        return await get_trc20_token_balances(rpc_url, wallet, token_addresses)
+    else:
+        raise ValueError(f"Chain {chain} tidak didukung untuk saldo token")
+
+
+# ===================== CACHE PER BLOK =====================
+async def fetch_native_balance_at_head(
+    chain: str, wallet: str, head: int, rpc_url: str = None
+) -> tuple:
+    """
+    (saldo native, height asal data) untuk cache saldo per blok; error dilempar.
+    EVM dibaca tepat di `head`; kalau endpoint belum sampai `head` dibaca di
+    latest dengan height None (jangan di-cache). SOL ditandai slot context
+    response. TRX ditandai `head` (TronGrid tidak mengembalikan height).
+    """
+    chain = chain.lower()
+    if chain in EVM_CHAINS:
+        try:
+            return await _evm_native_balance(rpc_url, wallet, chain, head), head
+        except Exception as e:
+            logger.info(f"ℹ️ Saldo {wallet} di block {head} tidak terbaca ({e}), pakai latest")
+            return await _evm_native_balance(rpc_url, wallet, chain), None
+    if chain == "sol":
+        return await _sol_native_balance_slot(rpc_url, wallet)
+    return await fetch_native_balance(chain, wallet, rpc_url), head
+
+
+async def check_token_balances_at_head(
+    chain: str, wallet: str, token_addresses: list, head: int, rpc_url: str = None
+) -> tuple:
+    """(hasil per token, height asal data), aturan height sama dengan fetch_native_balance_at_head"""
+    chain = chain.lower()
+    if chain in EVM_CHAINS:
+        items = await get_evm_token_balances(
+            rpc_url, wallet, token_addresses, chain, head
+        )
+        if items and all(item["error"] is not None for item in items):
+            # endpoint belum sampai head → baca ulang di latest, tanpa height
+            items = await get_evm_token_balances(rpc_url, wallet, token_addresses, chain)
+            return items, None
+        return items, head
+    if chain == "sol":
+        return await _spl_token_balances_slot(rpc_url, wallet, token_addresses)
+    return await check_token_balances(chain, wallet, token_addresses, rpc_url), head
@@ -0,0 +1,209 @@
+# 📍 lib/balance_export.py
+import asyncio
+import json
+import logging
+import os
+import time
+
+from lib.balance_checker import EVM_CHAINS, fetch_native_balance, get_evm_balances_bulk
+from lib.wallet_validator import validate_wallet
+
+logger = logging.getLogger(__name__)
+
+# ======= Config export =======
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "16"))  # worker paralel
+# address EVM per multicall
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "100"))
+# job & baris hasil yang boleh antre (backpressure)
+EXPORT_QUEUE_SIZE = int(os.getenv("EXPORT_QUEUE_SIZE", "64"))
+EXPORT_MAX_LINE = int(os.getenv("EXPORT_MAX_LINE", "4096"))  # byte per baris input
+
+_DONE = object()
+_TOO_LONG = object()  # penanda baris input yang melewati EXPORT_MAX_LINE
+
+
+def _parse_line(raw: bytes, default_chain: str) -> tuple:
+    """
+    Satu baris input → (chain, wallet).
+    Format: NDJSON {"chain", "wallet"} / teks "chain,wallet" / teks "wallet".
+    """
+    text = raw.decode("utf-8", errors="replace").strip()
+    if text.startswith("{"):
+        item = json.loads(text)
+        chain, wallet = item.get("chain") or default_chain or "", item.get("wallet")
+        if not isinstance(chain, str) or not isinstance(wallet, str):
+            raise ValueError("chain & wallet harus string")
+        return chain.lower(), wallet
+    if "," in text:
+        chain, wallet = text.split(",", 1)
+        return chain.strip().lower(), wallet.strip()
+    return (default_chain or "").lower(), text
+
+
+async def _iter_lines(stream):
+    """
+    Pecah body request (async iterator bytes) jadi baris tanpa menampung semuanya.
+    Baris lebih dari EXPORT_MAX_LINE byte tidak ditampung: sisanya dibuang sampai
+    newline berikutnya dan diganti _TOO_LONG (jadi baris error).
+    """
+    buffer = b""
+    skipping = False  # sedang membuang sisa baris yang kepanjangan
+    async for chunk in stream:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif len(line) > EXPORT_MAX_LINE:
+                yield _TOO_LONG
+            elif line.strip():
+                yield line
+        if len(buffer) > EXPORT_MAX_LINE:
+            if not skipping:
+                yield _TOO_LONG
+                skipping = True
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield buffer
+
+
+def _row(line_no: int, chain: str, wallet: str, balance=None, error=None) -> dict:
+    return {
+        "line": line_no,
+        "chain": chain,
+        "wallet": wallet,
+        "balance": balance,
+        "error": error,
+    }
+
+
+async def _read_jobs(stream, jobs: asyncio.Queue, out: asyncio.Queue, chain, rpc_url):
+    """
+    Baca input baris per baris → job. Address EVM berurutan di chain yang sama
+    digabung jadi satu job multicall (maks EXPORT_BATCH_SIZE); address tidak valid
+    langsung jadi baris error. `jobs` terbatas → kalau worker lambat, pembacaan
+    body ikut berhenti (backpressure sampai ke client).
+    """
+    batch, batch_chain = [], None
+    line_no = 0
+
+    async def flush():
+        nonlocal batch, batch_chain
+        if batch:
+            await jobs.put(("evm", batch_chain, batch))
+            batch, batch_chain = [], None
+
+    async for raw in _iter_lines(stream):
+        line_no += 1
+        if raw is _TOO_LONG:
+            await out.put(
+                _row(line_no, chain, None, error=f"Baris lebih dari {EXPORT_MAX_LINE} byte")
+            )
+            continue
+        try:
+            row_chain, wallet = _parse_line(raw, chain)
+            is_valid, _ = validate_wallet(row_chain, wallet)
+        except Exception as e:
+            await out.put(_row(line_no, chain, None, error=f"Baris tidak valid: {e}"))
+            continue
+
+        if not is_valid:
+            await out.put(_row(line_no, row_chain, wallet, error="Invalid address"))
+            continue
+        row_url = rpc_url if row_chain == (chain or "").lower() else None
+
+        if row_chain in EVM_CHAINS:
+            if batch and (row_chain != batch_chain or len(batch) >= EXPORT_BATCH_SIZE):
+                await flush()
+            batch_chain = row_chain
+            batch.append((line_no, wallet, row_url))
+        else:
+            await jobs.put(("single", row_chain, [(line_no, wallet, row_url)]))
+    await flush()
+    return line_no
+
+
+async def _run_job(kind: str, chain: str, items: list, out: asyncio.Queue):
+    if kind == "evm":
+        rpc_url = items[0][2]
+        try:
+            data = await get_evm_balances_bulk(
+                rpc_url, [wallet for _, wallet, _ in items], chain
+            )
+            by_wallet = {row["wallet"]: row for row in data["results"]}
+        except Exception as e:
+            by_wallet = {
+                wallet: {"balance": None, "error": str(e)} for _, wallet, _ in items
+            }
+        for line_no, wallet, _ in items:
+            row = by_wallet[wallet]
+            await out.put(_row(line_no, chain, wallet, row["balance"], row["error"]))
+        return
+
+    for line_no, wallet, rpc_url in items:
+        try:
+            balance = await fetch_native_balance(chain, wallet, rpc_url)
+            await out.put(_row(line_no, chain, wallet, balance))
+        except Exception as e:
+            await out.put(_row(line_no, chain, wallet, error=str(e)))
+
+
+async def _worker(jobs: asyncio.Queue, out: asyncio.Queue):
+    while True:
+        job = await jobs.get()
+        if job is _DONE:
+            return
+        await _run_job(*job, out)
+
+
+async def stream_balances(stream, chain: str = None, rpc_url: str = None):
+    """
+    Async generator baris NDJSON saldo untuk tiap address di `stream`.
+    Baris dikirim begitu siap (urutan tidak dijamin, pakai field `line`),
+    paling banyak EXPORT_CONCURRENCY job jalan bersamaan. Baris terakhir
+    berisi ringkasan {"done": true, ...}.
+    """
+    jobs = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+    out = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+    start = time.perf_counter()
+    summary = {"done": True, "count": 0, "errors": 0}
+
+    async def produce():
+        try:
+            async with asyncio.TaskGroup() as tg:
+                workers = [
+                    tg.create_task(_worker(jobs, out))
+                    for _ in range(EXPORT_CONCURRENCY)
+                ]
+                try:
+                    await _read_jobs(stream, jobs, out, chain, rpc_url)
+                finally:
+                    for _ in workers:
+                        await jobs.put(_DONE)
+        except* Exception as eg:
+            summary["error"] = str(eg.exceptions[0])
+        # tidak di finally: kalau producer di-cancel, tidak ada yang baca `out` lagi
+        await out.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            row = await out.get()
+            if row is _DONE:
+                break
+            summary["count"] += 1
+            summary["errors"] += row["error"] is not None
+            yield json.dumps(row) + "\n"
+    finally:
+        # client putus di tengah jalan → hentikan baca input & semua worker
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+    summary["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(
+        f"📤 Export saldo selesai: {summary['count']} address, "
+        f"{summary['errors']} error, {summary['elapsed_ms']} ms"
+    )
+    yield json.dumps(summary) + "\n"
@@ -0,0 +1,254 @@
+# 📍 lib/balance_history.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from lib.balance_checker import (
+    EVM_CHAINS,
+    fetch_native_balance_at,
+    get_evm_token_balances,
+)
+from lib.rpc_metadata import RPC_METADATA_MAX_SIZE, get_metadata_async
+from lib.rpc_pool import get_async_web3, get_solana_client
+from lib.rpc_router import pick_url, resolve_urls, route
+
+logger = logging.getLogger(__name__)
+
+# ======= Config cache saldo historis =======
+BALANCE_HISTORY_DB = os.getenv("BALANCE_HISTORY_DB", "data/balance_history.sqlite3")
+# fallback jarak finality kalau RPC EVM tidak kenal tag "finalized"
+BALANCE_HISTORY_FINALITY_DEPTH = int(os.getenv("BALANCE_HISTORY_FINALITY_DEPTH", "64"))
+
+NATIVE = "native"
+
+# ======= State =======
+_lock = threading.Lock()
+_db = None
+# {rpc_url endpoint: genesis hash} → identitas network Solana, urut LRU
+_genesis = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "stored": 0}
+# jumlah baris tabel: dihitung sekali saat koneksi dibuka lalu ditambah di _save,
+# supaya /stats tidak perlu COUNT(*) di event loop
+_size = {"rows": None}
+
+
+def _conn() -> sqlite3.Connection:
+    """Koneksi sqlite dibuka saat pertama dipakai (dipanggil di dalam _lock)"""
+    global _db
+    if _db is None:
+        folder = os.path.dirname(BALANCE_HISTORY_DB)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        _db = sqlite3.connect(BALANCE_HISTORY_DB, check_same_thread=False)
+        # WAL → beberapa worker uvicorn bisa baca sambil ada yang menulis
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS balance_history ("
+            "network TEXT, wallet TEXT, token TEXT, block INTEGER, value TEXT, "
+            "PRIMARY KEY (network, wallet, token, block))"
+        )
+        _db.commit()
+        _size["rows"] = _db.execute("SELECT COUNT(*) FROM balance_history").fetchone()[0]
+        logger.info(f"🗄️ Cache saldo historis dibuka: {BALANCE_HISTORY_DB}")
+    return _db
+
+
+def _load(network: str, wallet: str, tokens: list, block: int) -> dict:
+    """
+    {token: value} yang sudah tersimpan untuk (network, wallet, block).
+    Blocking (sqlite) → dipanggil lewat asyncio.to_thread, bukan di event loop.
+    """
+    with _lock:
+        rows = (
+            _conn()
+            .execute(
+                "SELECT token, value FROM balance_history "
+                "WHERE network = ? AND wallet = ? AND block = ? "
+                f"AND token IN ({','.join('?' * len(tokens))})",
+                (network, wallet, block, *tokens),
+            )
+            .fetchall()
+        )
+    return {token: json.loads(value) for token, value in rows}
+
+
+def _save(network: str, wallet: str, block: int, values: dict):
+    """Simpan hasil final (INSERT + commit, fsync di WAL) → jalankan lewat asyncio.to_thread"""
+    with _lock:
+        db = _conn()
+        cursor = db.executemany(
+            "INSERT OR IGNORE INTO balance_history VALUES (?, ?, ?, ?, ?)",
+            [
+                (network, wallet, token, block, json.dumps(value))
+                for token, value in values.items()
+            ],
+        )
+        db.commit()
+        _stats["stored"] += len(values)
+        # INSERT OR IGNORE → rowcount = baris yang benar-benar baru
+        _size["rows"] += max(cursor.rowcount, 0)
+
+
+# ===================== NETWORK & FINALITY =====================
+async def _network_id(chain: str, rpc_url: str) -> str:
+    """
+    Identitas network yang stabil antar restart (bukan URL RPC):
+    chain id untuk EVM, genesis hash untuk Solana.
+    """
+    if chain in EVM_CHAINS:
+        meta = await get_metadata_async(pick_url(chain, rpc_url))
+        return f"evm:{meta['chain_id']}"
+    # key = URL endpoint (bukan string rpc_url caller); semua URL di daftar
+    # caller satu network, jadi endpoint mana pun yang sudah dikenal cukup
+    for url in resolve_urls(chain, rpc_url):
+        if url in _genesis:
+            _genesis.move_to_end(url)
+            return f"sol:{_genesis[url]}"
+
+    async def fetch(url: str):
+        resp = await get_solana_client(url).get_genesis_hash()
+        return url, str(resp.value)
+
+    url, genesis = await route("sol", rpc_url, fetch)
+    _genesis[url] = genesis
+    # rpc_url datang dari user → batasi jumlah endpoint yang disimpan
+    while len(_genesis) > RPC_METADATA_MAX_SIZE:
+        _genesis.popitem(last=False)
+    return f"sol:{genesis}"
+
+
+async def _finalized_height(chain: str, rpc_url: str) -> int:
+    """Block (EVM) / slot (SOL) terakhir yang sudah final → hasil di bawahnya tidak berubah"""
+    if chain == "sol":
+        resp = await route(
+            "sol",
+            rpc_url,
+            lambda url: get_solana_client(url).get_slot(commitment="finalized"),
+            hedge=True,
+        )
+        return resp.value
+    try:
+        block = await route(
+            chain,
+            rpc_url,
+            lambda url: get_async_web3(url).eth.get_block("finalized"),
+            hedge=True,
+        )
+        return block["number"]
+    except Exception as e:
+        logger.info(f"ℹ️ Tag finalized tidak didukung {chain.upper()}: {e}")
+        head = await route(
+            chain,
+            rpc_url,
+            lambda url: get_async_web3(url).eth.block_number,
+            hedge=True,
+        )
+        return head - BALANCE_HISTORY_FINALITY_DEPTH
+
+
+def _normalize(chain: str, wallet: str) -> str:
+    # address EVM case-insensitive → satu entry untuk checksum & lowercase
+    return wallet.lower() if chain in EVM_CHAINS else wallet
+
+
+def _check_chain(chain: str):
+    if chain not in EVM_CHAINS and chain != "sol":
+        raise ValueError(f"Saldo historis belum didukung untuk chain {chain}")
+
+
+# ===================== NATIVE =====================
+async def get_native_balance_at(
+    chain: str, wallet: str, height: int, rpc_url: str = None
+) -> dict:
+    """
+    Saldo native di block (EVM) / slot (SOL) tertentu.
+    Hasil di height yang sudah final disimpan permanen (tanpa TTL);
+    query audit berikutnya dijawab dari cache lokal tanpa archive node.
+    Return {"balance", "block_number", "cached", "finalized"}.
+    """
+    chain = chain.lower()
+    _check_chain(chain)
+    network = await _network_id(chain, rpc_url)
+    key = _normalize(chain, wallet)
+
+    stored = await asyncio.to_thread(_load, network, key, [NATIVE], height)
+    if NATIVE in stored:
+        _stats["hits"] += 1
+        return {
+            "balance": stored[NATIVE],
+            "block_number": height,
+            "cached": True,
+            "finalized": True,
+        }
+    _stats["misses"] += 1
+
+    balance, finalized = await asyncio.gather(
+        fetch_native_balance_at(chain, wallet, height, rpc_url),
+        _finalized_height(chain, rpc_url),
+    )
+
+    is_final = height <= finalized
+    if is_final:
+        await asyncio.to_thread(_save, network, key, height, {NATIVE: balance})
+    return {
+        "balance": balance,
+        "block_number": height,
+        "cached": False,
+        "finalized": is_final,
+    }
+
+
+# ===================== TOKEN =====================
+async def get_token_balances_at(
+    chain: str, wallet: str, token_addresses: list, height: int, rpc_url: str = None
+) -> dict:
+    """Saldo token ERC20 di block tertentu, cache permanen sama seperti native"""
+    chain = chain.lower()
+    if chain not in EVM_CHAINS:
+        raise ValueError(f"Saldo token historis hanya untuk chain EVM, bukan {chain}")
+    network = await _network_id(chain, rpc_url)
+    key = _normalize(chain, wallet)
+
+    results = await asyncio.to_thread(
+        _load, network, key, [t.lower() for t in token_addresses], height
+    )
+    _stats["hits"] += len(results)
+    missing = [t for t in token_addresses if t.lower() not in results]
+    finalized = None
+    if missing:
+        _stats["misses"] += len(missing)
+        fetched, finalized = await asyncio.gather(
+            get_evm_token_balances(rpc_url, wallet, missing, chain, height),
+            _finalized_height(chain, rpc_url),
+        )
+        fresh = {item["token_address"].lower(): item for item in fetched}
+        results.update(fresh)
+        if height <= finalized:
+            # hasil error tidak disimpan → query berikutnya coba lagi
+            await asyncio.to_thread(
+                _save,
+                network,
+                key,
+                height,
+                {t: item for t, item in fresh.items() if item["error"] is None},
+            )
+
+    return {
+        "tokens": [{**results[t.lower()], "token_address": t} for t in token_addresses],
+        "block_number": height,
+        "cached": not missing,
+        "finalized": finalized is None or height <= finalized,
+    }
+
+
+# ===================== STATS =====================
+def history_stats() -> dict:
+    """
+    Statistik cache saldo historis (untuk monitoring), tanpa menyentuh sqlite.
+    `size` = baris saat dibuka + yang ditulis worker ini (tulisan worker lain tidak ikut).
+    """
+    return {"path": BALANCE_HISTORY_DB, "size": _size["rows"], **_stats}
@@ -1,6 +1,9 @@
 # 📍 lib/base_helper.py
 import logging
 from web3 import Web3
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_native
+from lib.rpc_router import route_sync
 from eth_account import Account
 
 logger = logging.getLogger(__name__)
@@ -9,11 +12,14 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str) -> float:
     """Cek saldo BASE (native) dari wallet tertentu menggunakan RPC dari endpoint"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BASE RPC tidak terkoneksi!")
-        balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
-        balance_base = w3.from_wei(balance_wei, "ether")
+        balance_wei = route_sync(
+            "base",
+            rpc_url,
+            lambda url: get_web3(url).eth.get_balance(
+                Web3.to_checksum_address(address)
+            ),
+        )
+        balance_base = Web3.from_wei(balance_wei, "ether")
         logger.info(f"💰 Saldo {address}: {balance_base} BASE")
         return float(balance_base)
     except Exception as e:
@@ -37,10 +43,6 @@ async def send_base(
             private_key = "0x" + private_key
         admin_account = Account.from_key(private_key)
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BASE RPC tidak terkoneksi!")
-
         sender_address = admin_account.address
 
         if destination_wallet.lower() == sender_address.lower():
@@ -48,25 +50,27 @@ async def send_base(
                 f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}"
             )
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_base:
-            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BASE")
+        value = Web3.to_wei(amount_base, "ether")
+        destination = Web3.to_checksum_address(destination_wallet)
 
-        nonce = w3.eth.get_transaction_count(sender_address)
-        value = w3.to_wei(amount_base, "ether")
+        # chain id, nonce, saldo, estimasi gas & gas price dalam 1 batch JSON-RPC
+        pre = preflight_native("base", rpc_url, sender_address, destination, value)
+        sender_balance = pre.native_balance
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} BASE")
+        if sender_balance < amount_base:
+            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BASE")
 
-        # Estimasi gas otomatis
         tx_dict = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
+            "nonce": pre.nonce,
+            "to": destination,
             "value": value,
-            "chainId": w3.eth.chain_id,
+            "chainId": pre.chain_id,
+            "gas": pre.require_gas_estimate(),
+            "gasPrice": pre.gas_price,
         }
-        gas_estimate = w3.eth.estimate_gas({**tx_dict, "from": sender_address})
-        tx_dict["gas"] = gas_estimate
-        # Ambil gas price otomatis dari RPC
-        tx_dict["gasPrice"] = w3.eth.gas_price
 
+        # sign & broadcast di endpoint yang sama dengan preflight (nonce konsisten)
+        w3 = get_web3(pre.rpc_url)
         signed_tx = w3.eth.account.sign_transaction(tx_dict, private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         logger.info(
@@ -1,6 +1,9 @@
 # 📍 lib/bnb_helper.py
 import logging
 from web3 import Web3
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_native
+from lib.rpc_router import route_sync
 from eth_account import Account
 
 logger = logging.getLogger(__name__)
@@ -9,11 +12,14 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str) -> float:
     """Cek saldo BNB dari wallet tertentu, user input RPC URL"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BSC RPC tidak terkoneksi!")
-        balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
-        balance_bnb = w3.from_wei(balance_wei, "ether")
+        balance_wei = route_sync(
+            "bnb",
+            rpc_url,
+            lambda url: get_web3(url).eth.get_balance(
+                Web3.to_checksum_address(address)
+            ),
+        )
+        balance_bnb = Web3.from_wei(balance_wei, "ether")
         logger.info(f"💰 Saldo {address}: {balance_bnb} BNB")
         return float(balance_bnb)
     except Exception as e:
@@ -33,39 +39,35 @@ async def send_bnb(
             private_key = "0x" + private_key
         admin_account = Account.from_key(private_key)
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("BSC RPC tidak terkoneksi!")
-
         sender_address = admin_account.address
 
         if destination_wallet.lower() == sender_address.lower():
             raise Exception("Destination sama dengan source! Transaksi dibatalkan")
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_bnb:
-            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BNB")
+        value = Web3.to_wei(amount_bnb, "ether")
+        destination = Web3.to_checksum_address(destination_wallet)
 
-        nonce = w3.eth.get_transaction_count(sender_address)
-        value = w3.to_wei(amount_bnb, "ether")
+        # saldo, nonce, estimasi gas & gas price otomatis dalam 1 batch JSON-RPC
+        pre = preflight_native("bnb", rpc_url, sender_address, destination, value)
+        sender_balance = pre.native_balance
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} BNB")
+        if sender_balance < amount_bnb:
+            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} BNB")
 
-        # Chain ID default: 56 mainnet, 97 testnet
-        chain_id = 56 if "testnet" not in rpc_url.lower() else 97
+        # chain id dari cache metadata endpoint (56 mainnet, 97 testnet)
+        chain_id = pre.chain_id
 
         tx_dict = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
+            "nonce": pre.nonce,
+            "to": destination,
             "value": value,
             "chainId": chain_id,
+            "gas": pre.require_gas_estimate(),
+            "gasPrice": pre.gas_price,
         }
 
-        # Estimasi gas otomatis
-        gas_estimate = w3.eth.estimate_gas({**tx_dict, "from": sender_address})
-        tx_dict["gas"] = gas_estimate
-
-        # Gas price otomatis dari RPC
-        tx_dict["gasPrice"] = w3.eth.gas_price
-
+        # sign & broadcast di endpoint yang sama dengan preflight (nonce konsisten)
+        w3 = get_web3(pre.rpc_url)
         signed_tx = w3.eth.account.sign_transaction(tx_dict, private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         tx_hash_hex = tx_hash.hex()
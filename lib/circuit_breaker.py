@@ -0,0 +1,241 @@
+# 📍 lib/circuit_breaker.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+import httpx
+import requests
+from lib.rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# ======= Config breaker =======
+CB_FAILURE_THRESHOLD = int(os.getenv("CB_FAILURE_THRESHOLD", "5"))  # gagal beruntun
+CB_RESET_TIMEOUT = float(os.getenv("CB_RESET_TIMEOUT", "30"))  # detik open → half-open
+CB_HALF_OPEN_MAX_CALLS = int(os.getenv("CB_HALF_OPEN_MAX_CALLS", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# ======= State per host upstream =======
+_lock = threading.Lock()
+# {host: {"state", "failures", "opened_at", "in_flight", "rejected", "opens"}}
+_breakers = {}
+
+
+class CircuitOpenError(Exception):
+    """Upstream sedang dianggap mati → call ditolak tanpa menyentuh jaringan"""
+
+
+def host_of(url: str) -> str:
+    """Kunci breaker = host upstream (RPC node / CoinGecko)"""
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return url
+    # hostname saja (tanpa user:pass@) supaya kredensial tidak masuk stats
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+
+# error transport/jaringan = upstream benar-benar bermasalah
+_TRANSPORT_ERRORS = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    requests.ConnectionError,
+    requests.Timeout,
+    httpx.TransportError,
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+)
+# kode JSON-RPC "limit exceeded" yang dikirim node dengan HTTP 200
+_RPC_OVERLOAD_CODES = (429, -32005)
+
+
+def _status_code(exc: BaseException):
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status
+    response = getattr(exc, "response", None)  # requests / httpx
+    return getattr(response, "status_code", None)
+
+
+def _rpc_error_code(exc: BaseException):
+    # web3 Web3RPCError.rpc_response = {"error": {"code", "message"}, ...}
+    rpc_response = getattr(exc, "rpc_response", None)
+    if isinstance(rpc_response, dict) and isinstance(rpc_response.get("error"), dict):
+        return rpc_response["error"].get("code")
+    return None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    True kalau error berarti upstream bermasalah: transport/timeout, HTTP 5xx/429,
+    atau JSON-RPC limit exceeded. Error lain (AddressNotFound, revert, alamat tidak
+    valid, dst) adalah jawaban upstream → tidak dihitung gagal.
+    Rantai __cause__/__context__ ikut dicek karena client sering membungkus
+    error transport (misal SolanaRpcException).
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, _TRANSPORT_ERRORS):
+            return True
+        status = _status_code(exc)
+        if isinstance(status, int) and (status >= 500 or status == 429):
+            return True
+        if _rpc_error_code(exc) in _RPC_OVERLOAD_CODES:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _get(host: str) -> dict:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = {
+            "state": CLOSED,
+            "failures": 0,
+            "opened_at": None,
+            "in_flight": 0,
+            "rejected": 0,
+            "opens": 0,
+        }
+    return breaker
+
+
+def _open(host: str, breaker: dict):
+    breaker["state"] = OPEN
+    breaker["opened_at"] = time.time()
+    breaker["in_flight"] = 0
+    breaker["opens"] += 1
+    logger.warning(f"🔌 Circuit {host} OPEN setelah {breaker['failures']} kali gagal")
+
+
+def is_open(host: str) -> bool:
+    """Cek tanpa mengambil slot half-open (untuk ranking endpoint)"""
+    with _lock:
+        breaker = _breakers.get(host)
+        return (
+            breaker is not None
+            and breaker["state"] == OPEN
+            and time.time() - breaker["opened_at"] < CB_RESET_TIMEOUT
+        )
+
+
+def before_call(host: str):
+    """Lempar CircuitOpenError kalau circuit open (atau slot half-open penuh)"""
+    with _lock:
+        breaker = _get(host)
+        if breaker["state"] == OPEN:
+            if time.time() - breaker["opened_at"] < CB_RESET_TIMEOUT:
+                breaker["rejected"] += 1
+                raise CircuitOpenError(f"Circuit {host} sedang open")
+            breaker["state"] = HALF_OPEN
+            breaker["in_flight"] = 0
+            logger.info(f"🔁 Circuit {host} HALF-OPEN, coba call percobaan")
+
+        if breaker["state"] == HALF_OPEN:
+            if breaker["in_flight"] >= CB_HALF_OPEN_MAX_CALLS:
+                breaker["rejected"] += 1
+                raise CircuitOpenError(
+                    f"Circuit {host} half-open, tunggu call percobaan"
+                )
+            breaker["in_flight"] += 1
+
+
+def record_success(host: str):
+    with _lock:
+        breaker = _get(host)
+        if breaker["state"] == HALF_OPEN:
+            logger.info(f"✅ Circuit {host} CLOSED lagi")
+        breaker["state"] = CLOSED
+        breaker["failures"] = 0
+        breaker["in_flight"] = 0
+
+
+def record_failure(host: str):
+    with _lock:
+        breaker = _get(host)
+        breaker["failures"] += 1
+        if breaker["state"] == HALF_OPEN or (
+            breaker["state"] == CLOSED and breaker["failures"] >= CB_FAILURE_THRESHOLD
+        ):
+            _open(host, breaker)
+
+
+def release(host: str):
+    """Call dibatalkan (misal kalah hedge) → kembalikan slot half-open"""
+    with _lock:
+        breaker = _get(host)
+        if breaker["state"] == HALF_OPEN and breaker["in_flight"] > 0:
+            breaker["in_flight"] -= 1
+
+
+# ===================== CALL (async & sync) =====================
+def _record_error(host: str, exc: Exception, expected_errors: tuple):
+    # upstream menjawab (expected error / error aplikasi) → dihitung sukses
+    if isinstance(exc, expected_errors) or not is_upstream_failure(exc):
+        record_success(host)
+    else:
+        record_failure(host)
+
+
+async def guarded(url: str, fn, expected_errors: tuple = ()):
+    """
+    Jalankan `await fn()` lewat breaker host dari `url`.
+    Hanya error transport/timeout/5xx/429 yang dihitung gagal; exception di
+    `expected_errors` dan error aplikasi lain berarti upstream menjawab.
+    """
+    host = host_of(url)
+    before_call(host)
+    try:
+        result = await fn()
+    except (asyncio.CancelledError, RateLimitExceeded):
+        # dibatalkan / ditolak limiter kita sendiri → bukan kesalahan upstream
+        release(host)
+        raise
+    except Exception as e:
+        _record_error(host, e, expected_errors)
+        raise
+    record_success(host)
+    return result
+
+
+def guarded_sync(url: str, fn, expected_errors: tuple = ()):
+    """Versi blocking dari `guarded`"""
+    host = host_of(url)
+    before_call(host)
+    try:
+        result = fn()
+    except RateLimitExceeded:
+        release(host)
+        raise
+    except Exception as e:
+        _record_error(host, e, expected_errors)
+        raise
+    record_success(host)
+    return result
+
+
+# ===================== STATS =====================
+def breaker_stats() -> dict:
+    """Status breaker per host upstream (untuk monitoring)"""
+    with _lock:
+        return {
+            "failure_threshold": CB_FAILURE_THRESHOLD,
+            "reset_timeout": CB_RESET_TIMEOUT,
+            "hosts": [
+                {
+                    "host": host,
+                    "state": breaker["state"],
+                    "failures": breaker["failures"],
+                    "rejected": breaker["rejected"],
+                    "opens": breaker["opens"],
+                }
+                for host, breaker in _breakers.items()
+            ],
+        }
@@ -1,6 +1,9 @@
 # 📍 lib/eth_helper.py
 import logging
 from web3 import Web3
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_native
+from lib.rpc_router import route_sync
 from eth_account import Account
 
 logger = logging.getLogger(__name__)
@@ -9,11 +12,14 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str):
     """Cek saldo ETH dari wallet tertentu"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("Ethereum RPC tidak terkoneksi!")
-        balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
-        balance_eth = w3.from_wei(balance_wei, "ether")
+        balance_wei = route_sync(
+            "eth",
+            rpc_url,
+            lambda url: get_web3(url).eth.get_balance(
+                Web3.to_checksum_address(address)
+            ),
+        )
+        balance_eth = Web3.from_wei(balance_wei, "ether")
         logger.info(f"💰 Saldo {address}: {balance_eth} ETH")
         return balance_eth
     except Exception as e:
@@ -41,10 +47,6 @@ async def send_eth(
     admin_account = Account.from_key(private_key)
 
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("Ethereum RPC tidak terkoneksi!")
-
         sender_address = admin_account.address
 
         if destination_wallet.lower() == sender_address.lower():
@@ -52,22 +54,29 @@ async def send_eth(
                 f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}"
             )
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_eth:
-            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} ETH")
+        value = Web3.to_wei(amount_eth, "ether")
+        destination = Web3.to_checksum_address(destination_wallet)
 
-        nonce = w3.eth.get_transaction_count(sender_address)
-        value = w3.to_wei(amount_eth, "ether")
+        # nonce, gas price, chain id & saldo dalam 1 batch JSON-RPC
+        pre = preflight_native(
+            "eth", rpc_url, sender_address, destination, value, estimate_gas=False
+        )
+        sender_balance = pre.native_balance
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} ETH")
+        if sender_balance < amount_eth:
+            raise Exception(f"Saldo tidak cukup! Saldo sekarang {sender_balance} ETH")
 
         tx = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
+            "nonce": pre.nonce,
+            "to": destination,
             "value": value,
             "gas": 21000,
-            "gasPrice": w3.eth.gas_price,
-            "chainId": w3.eth.chain_id,
+            "gasPrice": pre.gas_price,
+            "chainId": pre.chain_id,
         }
 
+        # sign & broadcast di endpoint yang sama dengan preflight (nonce konsisten)
+        w3 = get_web3(pre.rpc_url)
         signed_tx = w3.eth.account.sign_transaction(tx, private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         logger.info(
@@ -0,0 +1,236 @@
+# 📍 lib/evm_preflight.py
+import logging
+from dataclasses import dataclass
+from web3 import Web3
+from lib.rpc_metadata import cached_metadata, prefetch_metadata
+from lib.rpc_pool import get_web3
+from lib.rpc_router import route_sync
+
+logger = logging.getLogger(__name__)
+
+
+# ===================== HASIL PREFLIGHT =====================
+@dataclass
+class EvmPreflight:
+    """Semua data on-chain yang dibutuhkan signer, diambil sebelum broadcast"""
+
+    sender: str
+    rpc_url: str  # endpoint yang dipakai preflight → sign & broadcast di sini juga
+    chain_id: int
+    nonce: int
+    gas_price: int
+    native_balance_wei: int
+    gas_estimate: int | None = None
+    gas_estimate_error: Exception | None = None
+    token_decimals: int | None = None
+    token_value: int | None = None  # amount dalam unit terkecil token
+    token_balance_raw: int | None = None
+    destination_token_balance_raw: int | None = None
+
+    @property
+    def native_balance(self) -> float:
+        return float(Web3.from_wei(self.native_balance_wei, "ether"))
+
+    @property
+    def token_balance(self) -> float:
+        return self.token_balance_raw / (10**self.token_decimals)
+
+    @property
+    def destination_token_balance(self) -> float:
+        return self.destination_token_balance_raw / (10**self.token_decimals)
+
+    def require_gas_estimate(self) -> int:
+        """Gas estimate wajib ada sebelum sign, kalau gagal lempar error aslinya"""
+        if self.gas_estimate is None:
+            raise self.gas_estimate_error or Exception("Estimasi gas tidak tersedia")
+        return self.gas_estimate
+
+
+# ===================== BATCH JSON-RPC =====================
+def batch_read(w3: Web3, requests: dict) -> dict:
+    """
+    Jalankan banyak read RPC sebagai satu JSON-RPC batch (1 round trip).
+    `requests` berisi {nama: fungsi tanpa argumen} yang memanggil method web3.
+    Kalau RPC tidak support batch / ada item error, fallback satu per satu;
+    item yang gagal dikembalikan sebagai Exception (bukan dilempar).
+    """
+    # endpoint yang sudah diketahui tidak support batch → langsung satu per satu
+    meta = cached_metadata(w3.provider.endpoint_uri)
+    if meta is None or meta["batch"]:
+        try:
+            with w3.batch_requests() as batch:
+                for build in requests.values():
+                    batch.add(build())
+                responses = batch.execute()
+            return dict(zip(requests.keys(), responses))
+        except Exception as e:
+            logger.warning(
+                f"⚠️ Batch JSON-RPC gagal ({e}), fallback request satu per satu"
+            )
+
+    results = {}
+    for name, build in requests.items():
+        try:
+            value = build()
+            # ContractFunction belum dipanggil → .call() di luar mode batch
+            results[name] = value.call() if hasattr(value, "call") else value
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def _with_chain_id(rpc_url: str, w3: Web3, requests: dict) -> dict | None:
+    """
+    Metadata endpoint dari cache. Kalau belum ada, chain id ikut di batch
+    preflight (tanpa round trip tambahan) dan probe metadata lengkap
+    dijalankan di background.
+    """
+    meta = cached_metadata(rpc_url)
+    if meta is None:
+        requests["chain_id"] = lambda: w3.eth.chain_id
+        prefetch_metadata(rpc_url)
+    return meta
+
+
+def _chain_id(meta: dict | None, results: dict) -> int:
+    return meta["chain_id"] if meta is not None else _required(results, "chain_id")
+
+
+def _required(results: dict, name: str):
+    value = results[name]
+    if isinstance(value, Exception):
+        raise value
+    return value
+
+
+# ===================== NATIVE (ETH/BNB/BASE/POLYGON) =====================
+def preflight_native(
+    chain: str,
+    rpc_url: str,
+    sender: str,
+    destination: str,
+    value_wei: int,
+    estimate_gas: bool = True,
+) -> EvmPreflight:
+    """Preflight native lewat RPC router (endpoint terbaik, failover kalau gagal)"""
+    return route_sync(
+        chain,
+        rpc_url,
+        lambda url: _preflight_native(
+            url, sender, destination, value_wei, estimate_gas
+        ),
+    )
+
+
+def _preflight_native(
+    rpc_url: str,
+    sender: str,
+    destination: str,
+    value_wei: int,
+    estimate_gas: bool = True,
+) -> EvmPreflight:
+    """Preflight transfer native: nonce, gas price, saldo, estimasi gas (chain_id dari cache/batch)"""
+    w3 = get_web3(rpc_url)
+    requests = {
+        "nonce": lambda: w3.eth.get_transaction_count(sender),
+        "gas_price": lambda: w3.eth.gas_price,
+        "balance": lambda: w3.eth.get_balance(sender),
+    }
+    meta = _with_chain_id(rpc_url, w3, requests)
+    if estimate_gas:
+        requests["gas"] = lambda: w3.eth.estimate_gas(
+            {"from": sender, "to": destination, "value": value_wei}
+        )
+
+    results = batch_read(w3, requests)
+    gas = results.get("gas")
+    return EvmPreflight(
+        sender=sender,
+        rpc_url=rpc_url,
+        chain_id=_chain_id(meta, results),
+        nonce=_required(results, "nonce"),
+        gas_price=_required(results, "gas_price"),
+        native_balance_wei=_required(results, "balance"),
+        gas_estimate=None if isinstance(gas, Exception) else gas,
+        gas_estimate_error=gas if isinstance(gas, Exception) else None,
+    )
+
+
+# ===================== ERC20 (USDT/USDC) =====================
+def preflight_token(
+    chain: str,
+    rpc_url: str,
+    token_address: str,
+    abi: list,
+    sender: str,
+    destination: str,
+    amount: float,
+    default_decimals: int,
+) -> EvmPreflight:
+    """Preflight ERC20 lewat RPC router (endpoint terbaik, failover kalau gagal)"""
+    return route_sync(
+        chain,
+        rpc_url,
+        lambda url: _preflight_token(
+            url, token_address, abi, sender, destination, amount, default_decimals
+        ),
+    )
+
+
+def _preflight_token(
+    rpc_url: str,
+    token_address: str,
+    abi: list,
+    sender: str,
+    destination: str,
+    amount: float,
+    default_decimals: int,
+) -> EvmPreflight:
+    """
+    Preflight transfer ERC20.
+    Round trip 1 (batch): nonce pending, gas price, saldo native,
+    decimals, saldo token sender & tujuan.
+    Round trip 2: estimasi gas transfer (butuh decimals untuk hitung value).
+    chain_id diambil dari cache metadata endpoint, atau ikut batch kalau belum ada.
+    """
+    w3 = get_web3(rpc_url)
+    contract = w3.eth.contract(address=token_address, abi=abi)
+    requests = {
+        "nonce": lambda: w3.eth.get_transaction_count(sender, "pending"),
+        "gas_price": lambda: w3.eth.gas_price,
+        "balance": lambda: w3.eth.get_balance(sender),
+        "decimals": lambda: contract.functions.decimals(),
+        "token_balance": lambda: contract.functions.balanceOf(sender),
+        "destination_token_balance": lambda: contract.functions.balanceOf(
+            destination
+        ),
+    }
+    meta = _with_chain_id(rpc_url, w3, requests)
+    results = batch_read(w3, requests)
+
+    decimals = results["decimals"]
+    if isinstance(decimals, Exception):
+        logger.warning(f"⚠️ Gagal baca decimals, pakai default {default_decimals}")
+        decimals = default_decimals
+
+    value = int(amount * (10**decimals))
+    pre = EvmPreflight(
+        sender=sender,
+        rpc_url=rpc_url,
+        chain_id=_chain_id(meta, results),
+        nonce=_required(results, "nonce"),
+        gas_price=_required(results, "gas_price"),
+        native_balance_wei=_required(results, "balance"),
+        token_decimals=decimals,
+        token_value=value,
+        token_balance_raw=_required(results, "token_balance"),
+        destination_token_balance_raw=_required(results, "destination_token_balance"),
+    )
+
+    try:
+        pre.gas_estimate = contract.functions.transfer(destination, value).estimate_gas(
+            {"from": sender}
+        )
+    except Exception as e:
+        pre.gas_estimate_error = e
+    return pre
@@ -0,0 +1,124 @@
+# 📍 lib/head_tracker.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from lib.rpc_metadata import get_metadata_async
+from lib.rpc_pool import get_async_web3, get_solana_client, get_tron_client
+from lib.rpc_router import CHAIN_ALIAS, CHAIN_KIND, pick_url, resolve_urls, route
+
+logger = logging.getLogger(__name__)
+
+# ======= Config head tracker =======
+HEAD_MIN_POLL_INTERVAL = float(os.getenv("HEAD_MIN_POLL_INTERVAL", "0.25"))  # detik
+HEAD_DEFAULT_BLOCK_TIME = float(os.getenv("HEAD_DEFAULT_BLOCK_TIME", "2"))  # detik
+HEAD_MAX_NETWORKS = int(os.getenv("HEAD_MAX_NETWORKS", "256"))
+# jeda blok/slot yang sudah pasti (tanpa perlu metadata endpoint)
+BLOCK_TIME = {"sol": 0.4, "trx": 3.0}
+
+# ======= State per network =======
+# {network: {"chain", "number", "checked_at", "block_time", "lock"}}
+_heads = OrderedDict()
+_listeners = []
+
+
+def network_key(chain: str, rpc_url: str = None) -> str:
+    """Kunci network = chain + daftar RPC URL (mainnet & testnet tidak tercampur)"""
+    chain = (chain or "").lower()
+    chain = CHAIN_ALIAS.get(chain, chain)
+    return f"{chain}|{','.join(sorted(resolve_urls(chain, rpc_url)))}"
+
+
+def on_new_head(callback):
+    """Daftarkan callback(network, old_number, new_number) saat blok baru terlihat"""
+    _listeners.append(callback)
+
+
+async def _block_time(chain: str, rpc_url: str) -> float:
+    if chain in BLOCK_TIME:
+        return BLOCK_TIME[chain]
+    try:
+        meta = await get_metadata_async(pick_url(chain, rpc_url))
+        return meta["block_time"] or HEAD_DEFAULT_BLOCK_TIME
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal baca block time {chain.upper()}: {e}")
+        return HEAD_DEFAULT_BLOCK_TIME
+
+
+async def _read_head(chain: str, rpc_url: str) -> int:
+    kind = CHAIN_KIND.get(chain, "evm")
+    if kind == "sol":
+        resp = await route(
+            chain, rpc_url, lambda url: get_solana_client(url).get_slot(), hedge=True
+        )
+        return resp.value
+    if kind == "trx":
+        return await route(
+            chain,
+            rpc_url,
+            lambda url: get_tron_client(url).get_latest_block_number(),
+            hedge=True,
+        )
+    return await route(
+        chain, rpc_url, lambda url: get_async_web3(url).eth.block_number, hedge=True
+    )
+
+
+async def get_head(chain: str, rpc_url: str = None) -> int:
+    """
+    Nomor blok (slot untuk Solana) terbaru di network ini.
+    Dibaca ulang paling cepat sekali per block time → semua request
+    yang polling network yang sama berbagi satu read head per blok.
+    """
+    chain = CHAIN_ALIAS.get(chain.lower(), chain.lower())
+    key = network_key(chain, rpc_url)
+    state = _heads.get(key)
+    if state is None:
+        state = _heads[key] = {
+            "chain": chain,
+            "number": None,
+            "checked_at": 0.0,
+            "block_time": None,
+            "lock": asyncio.Lock(),
+        }
+        # rpc_url datang dari user → batasi jumlah network yang dilacak
+        while len(_heads) > HEAD_MAX_NETWORKS:
+            _heads.popitem(last=False)
+    else:
+        _heads.move_to_end(key)
+
+    async with state["lock"]:
+        if state["block_time"] is None:
+            state["block_time"] = await _block_time(chain, rpc_url)
+        interval = max(state["block_time"], HEAD_MIN_POLL_INTERVAL)
+        if state["number"] is not None and time.time() - state["checked_at"] < interval:
+            return state["number"]
+
+        number = await _read_head(chain, rpc_url)
+        old = state["number"]
+        state["checked_at"] = time.time()
+        if old is None or number > old:
+            state["number"] = number
+            for callback in _listeners:
+                try:
+                    callback(key, old, number)
+                except Exception as e:
+                    logger.warning(f"⚠️ Listener head {chain.upper()} gagal: {e}")
+        return state["number"]
+
+
+# ===================== STATS =====================
+def head_stats() -> list:
+    """Head terakhir tiap network (untuk monitoring)"""
+    now = time.time()
+    return [
+        {
+            "chain": state["chain"],
+            "number": state["number"],
+            "block_time": state["block_time"],
+            "age": round(now - state["checked_at"], 1) if state["checked_at"] else None,
+        }
+        for state in _heads.values()
+    ]
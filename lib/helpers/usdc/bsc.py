@@ -2,6 +2,12 @@
 import logging
 import asyncio
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_token
+from lib.rpc_router import pick_url
+from lib.circuit_breaker import CircuitOpenError, guarded_sync
+from eth_account import Account
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -41,7 +47,7 @@ def get_usdc_balance(
     wallet_address: str, rpc_url: str, token_address: str, retries: int = 3
 ) -> float:
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3(pick_url("bnb", rpc_url))
         if not w3.is_connected():
             raise Exception("RPC tidak terhubung")
         contract = w3.eth.contract(
@@ -56,18 +62,24 @@ def get_usdc_balance(
         attempt = 0
         while attempt < retries:
             try:
-                balance_raw = contract.functions.balanceOf(
-                    Web3.to_checksum_address(wallet_address)
-                ).call()
+                balance_raw = guarded_sync(
+                    w3.provider.endpoint_uri,
+                    contract.functions.balanceOf(
+                        Web3.to_checksum_address(wallet_address)
+                    ).call,
+                )
                 balance = balance_raw / (10**decimals)
                 logger.info(f"💰 Saldo USDC {wallet_address}: {balance} USDC")
                 return balance
+            except CircuitOpenError as e:
+                # host RPC sedang open → tidak ada gunanya retry
+                logger.warning(f"⚠️ Skip cek saldo: {e}")
+                break
             except Exception as e:
                 logger.warning(
                     f"⚠️ Gagal cek saldo (attempt {attempt+1}/{retries}): {e}"
                 )
                 attempt += 1
-                asyncio.sleep(1)
 
         logger.error(
             f"❌ Gagal cek saldo USDC BSC setelah {retries} percobaan, return 0"
@@ -82,19 +94,34 @@ def get_usdc_balance(
 async def wait_tx_receipt_async(
     w3: Web3, tx_hash: str, poll_interval: int = 5, timeout: int = 180
 ):
+    """
+    Tunggu receipt tx yang sudah di-broadcast. Return None kalau sampai timeout
+    belum ada: tx tetap bisa mined, jadi jangan dianggap gagal (kirim ulang = dobel).
+    """
     await asyncio.sleep(2)
     start = asyncio.get_event_loop().time()
+    delay = poll_interval
     while True:
         try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
+            # circuit breaker per host: selama open tidak menyentuh RPC
+            receipt = guarded_sync(
+                w3.provider.endpoint_uri,
+                lambda: w3.eth.get_transaction_receipt(tx_hash),
+                expected_errors=(TransactionNotFound,),
+            )
             if receipt:
                 return receipt
+            delay = poll_interval
         except Exception as e:
-            if "not found" not in str(e):
-                raise
+            if "not found" in str(e):
+                delay = poll_interval
+            else:
+                # circuit open / RPC error → tetap polling dengan backoff sampai timeout
+                logger.warning(f"⚠️ Cek receipt {tx_hash} gagal ({e}), coba lagi {delay}s")
+                delay = min(delay * 2, 60)
         if asyncio.get_event_loop().time() - start > timeout:
-            raise TimeoutError(f"⏳ Timeout tunggu receipt tx {tx_hash}")
-        await asyncio.sleep(poll_interval)
+            return None
+        await asyncio.sleep(delay)
 
 
 async def send_usdc_bsc(
@@ -109,50 +136,45 @@ async def send_usdc_bsc(
         if not rpc_url or not private_key or not token_address:
             raise Exception("RPC, private_key, dan token_address wajib diisi")
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("RPC tidak terhubung")
-
-        # tentukan chain_id otomatis jika tidak dikirim
-        if chain_id is None:
-            rpc_lower = rpc_url.lower()
-            chain_id = 97 if "testnet" in rpc_lower else 56
-
-        account = w3.eth.account.from_key(private_key)
+        account = Account.from_key(private_key)
         from_address = Web3.to_checksum_address(account.address)
         destination_wallet = Web3.to_checksum_address(destination_wallet)
         token_address = Web3.to_checksum_address(token_address)
 
-        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
-
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 18 (USDC)")
-            decimals = 18
-
-        # log saldo sebelum kirim
-        get_usdc_balance(from_address, rpc_url, token_address)
-        get_usdc_balance(destination_wallet, rpc_url, token_address)
-
-        balance_usdc = contract.functions.balanceOf(from_address).call() / (
-            10**decimals
+        # decimals, saldo, nonce & gas price dalam 1 batch JSON-RPC
+        pre = preflight_token(
+            "bnb",
+            rpc_url,
+            token_address,
+            ERC20_ABI,
+            from_address,
+            destination_wallet,
+            amount,
+            default_decimals=18,
+        )
+        logger.info(f"💰 Saldo USDC {from_address}: {pre.token_balance} USDC")
+        logger.info(
+            f"💰 Saldo USDC {destination_wallet}: {pre.destination_token_balance} USDC"
         )
+
+        balance_usdc = pre.token_balance
         if amount > balance_usdc:
             raise Exception(f"USDC balance tidak cukup: {balance_usdc} < {amount}")
 
-        value = int(amount * (10**decimals))
-        nonce = w3.eth.get_transaction_count(from_address, "pending")
+        value = pre.token_value
+        nonce = pre.nonce
 
         # ===== gas otomatis =====
-        gas_estimate = contract.functions.transfer(
-            destination_wallet, value
-        ).estimate_gas({"from": from_address})
-        gas_price = w3.eth.gas_price
+        gas_estimate = pre.require_gas_estimate()
+        gas_price = pre.gas_price
+
+        # build, sign & broadcast di endpoint yang sama dengan preflight
+        w3 = get_web3(pre.rpc_url)
+        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
         tx = contract.functions.transfer(destination_wallet, value).build_transaction(
             {
-                "chainId": chain_id,
+                "chainId": chain_id or pre.chain_id,  # default dari cache metadata RPC
                 "gas": gas_estimate,
                 "gasPrice": gas_price,
                 "nonce": nonce,
@@ -165,6 +187,12 @@ async def send_usdc_bsc(
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         receipt = await wait_tx_receipt_async(w3, tx_hash.hex())
+        if receipt is None:
+            # sudah di-broadcast → kembalikan tx hash (pending), bukan gagal
+            logger.warning(
+                f"⏳ Receipt {tx_hash.hex()} belum ada, status pending (cek lewat /tx_status)"
+            )
+            return tx_hash.hex()
         if receipt.status == 1:
             logger.info(
                 f"✅ USDC BEP20 berhasil masuk ke {destination_wallet}, tx_hash={tx_hash.hex()}"
@@ -2,6 +2,12 @@
 import logging
 import asyncio
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_token
+from lib.rpc_router import pick_url
+from lib.circuit_breaker import guarded_sync
+from eth_account import Account
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -38,7 +44,7 @@ ERC20_ABI = [
 
 def get_usdc_balance(wallet_address: str, rpc_url: str, token_address: str) -> float:
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3(pick_url("eth", rpc_url))
         if not w3.is_connected():
             raise Exception("RPC tidak terhubung")
         contract = w3.eth.contract(
@@ -62,19 +68,34 @@ def get_usdc_balance(wallet_address: str, rpc_url: str, token_address: str) -> f
 async def wait_tx_receipt_async(
     w3: Web3, tx_hash: str, poll_interval: int = 5, timeout: int = 180
 ):
+    """
+    Tunggu receipt tx yang sudah di-broadcast. Return None kalau sampai timeout
+    belum ada: tx tetap bisa mined, jadi jangan dianggap gagal (kirim ulang = dobel).
+    """
     await asyncio.sleep(2)
     start = asyncio.get_event_loop().time()
+    delay = poll_interval
     while True:
         try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
+            # circuit breaker per host: selama open tidak menyentuh RPC
+            receipt = guarded_sync(
+                w3.provider.endpoint_uri,
+                lambda: w3.eth.get_transaction_receipt(tx_hash),
+                expected_errors=(TransactionNotFound,),
+            )
             if receipt:
                 return receipt
+            delay = poll_interval
         except Exception as e:
-            if "not found" not in str(e):
-                raise
+            if "not found" in str(e):
+                delay = poll_interval
+            else:
+                # circuit open / RPC error → tetap polling dengan backoff sampai timeout
+                logger.warning(f"⚠️ Cek receipt {tx_hash} gagal ({e}), coba lagi {delay}s")
+                delay = min(delay * 2, 60)
         if asyncio.get_event_loop().time() - start > timeout:
-            raise TimeoutError(f"⏳ Timeout tunggu receipt tx {tx_hash}")
-        await asyncio.sleep(poll_interval)
+            return None
+        await asyncio.sleep(delay)
 
 
 async def send_usdc_eth(
@@ -89,56 +110,45 @@ async def send_usdc_eth(
         if not rpc_url or not private_key or not token_address:
             raise Exception("RPC, private_key, dan token_address wajib diisi")
 
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("RPC tidak terhubung")
-
-        if chain_id is None:
-            rpc_lower = rpc_url.lower()
-            if "goerli" in rpc_lower:
-                chain_id = 5
-            elif "sepolia" in rpc_lower:
-                chain_id = 11155111
-            elif "bsc-test" in rpc_lower:
-                chain_id = 97
-            elif "bsc" in rpc_lower:
-                chain_id = 56
-            else:
-                chain_id = 1
-
-        account = w3.eth.account.from_key(private_key)
+        account = Account.from_key(private_key)
         from_address = Web3.to_checksum_address(account.address)
         destination_wallet = Web3.to_checksum_address(destination_wallet)
         token_address = Web3.to_checksum_address(token_address)
-        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6")
-            decimals = 6
-
-        get_usdc_balance(from_address, rpc_url, token_address)
-        get_usdc_balance(destination_wallet, rpc_url, token_address)
-
-        balance_usdc = contract.functions.balanceOf(from_address).call() / (
-            10**decimals
+        # decimals, saldo, nonce & gas price dalam 1 batch JSON-RPC
+        pre = preflight_token(
+            "eth",
+            rpc_url,
+            token_address,
+            ERC20_ABI,
+            from_address,
+            destination_wallet,
+            amount,
+            default_decimals=6,
+        )
+        logger.info(f"💰 Saldo USDC {from_address}: {pre.token_balance} USDC")
+        logger.info(
+            f"💰 Saldo USDC {destination_wallet}: {pre.destination_token_balance} USDC"
         )
+
+        balance_usdc = pre.token_balance
         if amount > balance_usdc:
             raise Exception(f"USDC balance tidak cukup: {balance_usdc} < {amount}")
 
-        value = int(amount * (10**decimals))
-        nonce = w3.eth.get_transaction_count(from_address, "pending")
+        value = pre.token_value
+        nonce = pre.nonce
 
         # ===== gas otomatis =====
-        gas_estimate = contract.functions.transfer(
-            destination_wallet, value
-        ).estimate_gas({"from": from_address})
-        gas_price = w3.eth.gas_price
+        gas_estimate = pre.require_gas_estimate()
+        gas_price = pre.gas_price
+
+        # build, sign & broadcast di endpoint yang sama dengan preflight
+        w3 = get_web3(pre.rpc_url)
+        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
         tx = contract.functions.transfer(destination_wallet, value).build_transaction(
             {
-                "chainId": chain_id,
+                "chainId": chain_id or pre.chain_id,  # default dari cache metadata RPC
                 "gas": gas_estimate,
                 "gasPrice": gas_price,
                 "nonce": nonce,
@@ -151,6 +161,12 @@ async def send_usdc_eth(
         logger.info(f"🕓 Menunggu konfirmasi transaksi {tx_hash.hex()}...")
 
         receipt = await wait_tx_receipt_async(w3, tx_hash.hex())
+        if receipt is None:
+            # sudah di-broadcast → kembalikan tx hash (pending), bukan gagal
+            logger.warning(
+                f"⏳ Receipt {tx_hash.hex()} belum ada, status pending (cek lewat /tx_status)"
+            )
+            return tx_hash.hex()
         if receipt.status == 1:
             logger.info(
                 f"✅ USDC ERC20 berhasil masuk ke {destination_wallet}, tx_hash={tx_hash.hex()}"
@@ -4,8 +4,10 @@ import base58
 from solders.pubkey import Pubkey
 from solders.keypair import Keypair
 from solders.transaction import Transaction
-from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.types import TxOpts
+from lib.rpc_pool import get_solana_client
+from lib.rpc_router import pick_url
 from spl.token.constants import TOKEN_PROGRAM_ID
 from spl.token.instructions import (
     transfer_checked,
@@ -20,9 +22,9 @@ logging.basicConfig(
 )
 
 
-def get_client(rpc_url: str) -> Client:
-    """Inisialisasi Solana RPC client"""
-    return Client(rpc_url)
+def get_client(rpc_url: str) -> AsyncClient:
+    """Ambil Solana RPC client async dari pool (koneksi dipakai ulang)"""
+    return get_solana_client(pick_url("sol", rpc_url))
 
 
 def load_keypair(secret_key_base58: str) -> Keypair:
@@ -38,12 +40,12 @@ def load_keypair(secret_key_base58: str) -> Keypair:
         )
 
 
-def get_or_create_ata(
-    client: Client, owner_pub: Pubkey, mint_pub: Pubkey, payer: Keypair
+async def get_or_create_ata(
+    client: AsyncClient, owner_pub: Pubkey, mint_pub: Pubkey, payer: Keypair
 ) -> Pubkey:
     """Cek atau buat Associated Token Account (ATA)"""
     token_account = get_associated_token_address(owner_pub, mint_pub)
-    resp = client.get_account_info(token_account)
+    resp = await client.get_account_info(token_account)
     if resp.value is None:
         logger.info(f"⚠️ ATA belum ada, membuat untuk {owner_pub}")
         tx = Transaction.new_signed_with_payer(
@@ -54,27 +56,27 @@ def get_or_create_ata(
             ],
             payer=payer.pubkey(),
             signing_keypairs=[payer],
-            recent_blockhash=client.get_latest_blockhash().value.blockhash,
+            recent_blockhash=(await client.get_latest_blockhash()).value.blockhash,
         )
-        sig = send_tx(client, tx, payer)
+        sig = await send_tx(client, tx, payer)
         logger.info(f"✅ ATA dibuat untuk {owner_pub}, sig={sig}")
     return token_account
 
 
-def get_usdc_balance(
-    client: Client, wallet_address: str, usdc_mint_address: str
+async def get_usdc_balance(
+    client: AsyncClient, wallet_address: str, usdc_mint_address: str
 ) -> float:
     """Cek saldo USDC SPL di wallet tertentu"""
     try:
         owner_pub = Pubkey.from_string(wallet_address)
         mint_pub = Pubkey.from_string(usdc_mint_address)
         token_account = get_associated_token_address(owner_pub, mint_pub)
-        resp = client.get_account_info(token_account)
+        resp = await client.get_account_info(token_account)
         if resp.value is None:
             logger.info(f"ℹ️ ATA belum ada untuk {wallet_address}, saldo = 0")
             return 0.0
 
-        bal_resp = client.get_token_account_balance(token_account)
+        bal_resp = await client.get_token_account_balance(token_account)
         balance_raw = int(bal_resp.value.amount)
         decimals = int(bal_resp.value.decimals)
         balance = balance_raw / (10**decimals)
@@ -86,10 +88,10 @@ def get_usdc_balance(
         return 0.0
 
 
-def send_tx(client: Client, tx: Transaction, signer: Keypair) -> str:
+async def send_tx(client: AsyncClient, tx: Transaction, signer: Keypair) -> str:
     """Helper untuk kirim transaction, return string signature"""
     raw_txn = bytes(tx)
-    resp = client.send_raw_transaction(
+    resp = await client.send_raw_transaction(
         raw_txn, opts=TxOpts(skip_preflight=False, preflight_commitment="confirmed")
     )
     signature = getattr(resp, "value", None)
@@ -98,7 +100,7 @@ def send_tx(client: Client, tx: Transaction, signer: Keypair) -> str:
     return str(signature)
 
 
-def send_usdc_solana(
+async def send_usdc_solana(
     destination_wallet: str,
     amount: float,
     rpc_url: str,
@@ -122,13 +124,13 @@ def send_usdc_solana(
         amount_int = int(amount * (10**decimals))
 
         # ATA
-        sender_ata = get_or_create_ata(
+        sender_ata = await get_or_create_ata(
             client, admin_keypair.pubkey(), mint_pub, admin_keypair
         )
-        dest_ata = get_or_create_ata(client, dest_pub, mint_pub, admin_keypair)
+        dest_ata = await get_or_create_ata(client, dest_pub, mint_pub, admin_keypair)
 
         # Cek saldo
-        sender_balance = get_usdc_balance(
+        sender_balance = await get_usdc_balance(
             client, str(admin_keypair.pubkey()), usdc_mint_address
         )
         if sender_balance < amount:
@@ -158,10 +160,10 @@ def send_usdc_solana(
             ],
             payer=admin_keypair.pubkey(),
             signing_keypairs=[admin_keypair],
-            recent_blockhash=client.get_latest_blockhash().value.blockhash,
+            recent_blockhash=(await client.get_latest_blockhash()).value.blockhash,
         )
 
-        sig = send_tx(client, tx_transfer, admin_keypair)
+        sig = await send_tx(client, tx_transfer, admin_keypair)
         logger.info(f"✅ USDC SOL berhasil dikirim ke {destination_wallet}, sig={sig}")
         return sig
 
@@ -1,11 +1,11 @@
 # 📍 lib/helpers/usdc/trx.py
 
+import asyncio
 import logging
-import time
-from tronpy import Tron
 from tronpy.keys import PrivateKey
-from tronpy.providers import HTTPProvider
 from tronpy.exceptions import TransactionNotFound
+from lib.rpc_pool import get_tron_client
+from lib.rpc_router import pick_url
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -47,21 +47,23 @@ TRC20_ABI = [
 ]
 
 
-def get_usdc_balance(wallet_address: str, rpc_url: str, token_address: str) -> float:
+async def get_usdc_balance(
+    wallet_address: str, rpc_url: str, token_address: str
+) -> float:
     """
     Cek saldo USDC (TRC20) dari wallet_address
     """
     try:
-        client = Tron(HTTPProvider(rpc_url))
-        contract = client.get_contract(token_address)
+        client = get_tron_client(pick_url("trx", rpc_url))
+        contract = await client.get_contract(token_address)
 
         try:
-            decimals = contract.functions.decimals()
+            decimals = await contract.functions.decimals()
         except Exception:
             logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
             decimals = 6
 
-        balance_raw = contract.functions.balanceOf(wallet_address)
+        balance_raw = await contract.functions.balanceOf(wallet_address)
         balance = balance_raw / (10**decimals)
 
         logger.info(f"💰 Saldo USDC {wallet_address}: {balance} USDC")
@@ -83,14 +85,14 @@ async def send_usdc_trx(
     Kirim USDC TRC20 ke wallet tujuan, mirip style ETH.
     """
     try:
-        client = Tron(HTTPProvider(rpc_url))
+        client = get_tron_client(pick_url("trx", rpc_url))
         account = PrivateKey(bytes.fromhex(private_key))
         tron_address = account.public_key.to_base58check_address()
 
-        contract = client.get_contract(token_address)
+        contract = await client.get_contract(token_address)
 
         try:
-            decimals = contract.functions.decimals()
+            decimals = await contract.functions.decimals()
         except Exception:
             logger.warning("⚠️ Gagal baca decimals, pakai default 6 (USDC)")
             decimals = 6
@@ -98,26 +100,25 @@ async def send_usdc_trx(
         value = int(amount * (10**decimals))
 
         # Cek saldo USDC admin
-        admin_balance = get_usdc_balance(tron_address, rpc_url, token_address)
+        admin_balance = await get_usdc_balance(tron_address, rpc_url, token_address)
         if admin_balance < amount:
             raise Exception(f"Saldo USDC admin tidak cukup: {admin_balance} < {amount}")
 
         # Cek TRX untuk energy
-        admin_trx_balance = client.get_account(tron_address)["balance"] / 1_000_000
+        admin_trx_balance = (await client.get_account(tron_address))[
+            "balance"
+        ] / 1_000_000
         if admin_trx_balance < 0.1:
             raise Exception(
                 f"Saldo TRX admin terlalu rendah untuk bayar fee: {admin_trx_balance} TRX"
             )
 
         # Build & sign transaksi
-        txn = (
-            contract.functions.transfer(destination_wallet, value)
-            .with_owner(tron_address)
-            .build()
-            .sign(account)
-        )
-
-        tx_result = txn.broadcast()
+        builder = await contract.functions.transfer(destination_wallet, value)
+        txn = await builder.with_owner(tron_address).build()
+        txn.sign(account)
+
+        tx_result = await txn.broadcast()
         tx_hash = tx_result["txid"]
         logger.info(f"🕓 Menunggu konfirmasi transaksi TRX {tx_hash}...")
 
@@ -125,13 +126,13 @@ async def send_usdc_trx(
         receipt = None
         for i in range(10):
             try:
-                receipt = client.get_transaction_info(tx_hash)
+                receipt = await client.get_transaction_info(tx_hash)
                 break
             except TransactionNotFound:
                 logger.info(
                     f"⏳ Transaksi {tx_hash} belum masuk block, retry {i+1}/10..."
                 )
-                time.sleep(3)
+                await asyncio.sleep(3)
 
         if not receipt:
             logger.error(f"❌ Transaksi {tx_hash} tidak ditemukan setelah 30 detik")
@@ -142,8 +143,8 @@ async def send_usdc_trx(
             logger.info(
                 f"✅ USDC berhasil dikirim ke {destination_wallet}, tx_hash={tx_hash}"
             )
-            get_usdc_balance(tron_address, rpc_url, token_address)
-            get_usdc_balance(destination_wallet, rpc_url, token_address)
+            await get_usdc_balance(tron_address, rpc_url, token_address)
+            await get_usdc_balance(destination_wallet, rpc_url, token_address)
             return tx_hash
         else:
             err_msg = receipt.get("receipt", {}).get("resultMessage", "Unknown error")
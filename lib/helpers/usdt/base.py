@@ -4,6 +4,12 @@ import time
 import asyncio
 from functools import partial
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_token
+from lib.rpc_router import pick_url
+from lib.circuit_breaker import CB_RESET_TIMEOUT, CircuitOpenError, guarded_sync
+from eth_account import Account
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -48,7 +54,7 @@ def get_usdt_balance(wallet_address: str, rpc_url: str, token_address: str) -> f
     try:
         wallet_address = Web3.to_checksum_address(wallet_address)
         token_address = Web3.to_checksum_address(token_address.strip())
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        w3 = get_web3(pick_url("base", rpc_url))
         contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
         try:
@@ -77,25 +83,32 @@ def send_usdt_base_sync(
     try:
         destination_wallet = Web3.to_checksum_address(destination_wallet.strip())
         token_address = Web3.to_checksum_address(token_address.strip())
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        account = w3.eth.account.from_key(private_key)
+        account = Account.from_key(private_key)
         from_address = Web3.to_checksum_address(account.address)
-        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
-        try:
-            decimals = contract.functions.decimals().call()
-        except Exception:
-            logger.warning("⚠️ Gagal baca decimals, pakai default 6")
-            decimals = 6
+        # decimals, saldo, nonce, chain id & gas price dalam 1 batch JSON-RPC
+        pre = preflight_token(
+            "base",
+            rpc_url,
+            token_address,
+            ERC20_ABI,
+            from_address,
+            destination_wallet,
+            amount,
+            default_decimals=6,
+        )
+        logger.info(f"💰 Saldo USDT Base {from_address}: {pre.token_balance}")
 
-        value = int(amount * (10**decimals))
-        nonce = w3.eth.get_transaction_count(from_address, "pending")
+        value = pre.token_value
+        nonce = pre.nonce
 
         # ===== gas otomatis dari RPC =====
-        gas_estimate = contract.functions.transfer(
-            destination_wallet, value
-        ).estimate_gas({"from": from_address})
-        gas_price = w3.eth.gas_price
+        gas_estimate = pre.require_gas_estimate()
+        gas_price = pre.gas_price
+
+        # build, sign & broadcast di endpoint yang sama dengan preflight
+        w3 = get_web3(pre.rpc_url)
+        contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
 
         txn = contract.functions.transfer(destination_wallet, value).build_transaction(
             {
@@ -103,7 +116,7 @@ def send_usdt_base_sync(
                 "nonce": nonce,
                 "gas": gas_estimate,
                 "gasPrice": gas_price,
-                "chainId": w3.eth.chain_id,
+                "chainId": pre.chain_id,
             }
         )
 
@@ -116,17 +129,26 @@ def send_usdt_base_sync(
         start_time = time.time()
         while time.time() - start_time < 180:
             try:
-                receipt = w3.eth.get_transaction_receipt(tx_hash)
+                receipt = guarded_sync(
+                    w3.provider.endpoint_uri,
+                    lambda: w3.eth.get_transaction_receipt(tx_hash),
+                    expected_errors=(TransactionNotFound,),
+                )
                 break
+            except CircuitOpenError as e:
+                # tx sudah di-broadcast → host open bukan alasan berhenti, tunggu lalu coba lagi
+                logger.warning(f"⚠️ Cek receipt {tx_hash.hex()} ditunda: {e}")
+                time.sleep(min(CB_RESET_TIMEOUT, 30))
             except Exception:
                 logger.info("⏳ Transaksi belum mined, tunggu 5 detik...")
                 time.sleep(5)
 
         if not receipt:
-            logger.error(
-                f"❌ Transaksi {tx_hash.hex()} tidak ditemukan dalam 180 detik"
+            # tx tetap bisa mined → kembalikan tx hash (pending), bukan gagal
+            logger.warning(
+                f"⏳ Receipt {tx_hash.hex()} belum ada dalam 180 detik, status pending"
             )
-            return None
+            return tx_hash.hex()
 
         if receipt.status == 1:
             logger.info(
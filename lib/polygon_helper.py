@@ -1,6 +1,9 @@
 # 📍 lib/polygon_helper.py
 import logging
 from web3 import Web3
+from lib.rpc_pool import get_web3
+from lib.evm_preflight import preflight_native
+from lib.rpc_router import route_sync
 from eth_account import Account
 
 logger = logging.getLogger(__name__)
@@ -9,11 +12,14 @@ logger = logging.getLogger(__name__)
 def get_balance(address: str, rpc_url: str):
     """Cek saldo POLYGON dari wallet tertentu"""
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("Polygon RPC tidak terkoneksi!")
-        balance_wei = w3.eth.get_balance(Web3.to_checksum_address(address))
-        balance_matic = w3.from_wei(balance_wei, "ether")
+        balance_wei = route_sync(
+            "polygon",
+            rpc_url,
+            lambda url: get_web3(url).eth.get_balance(
+                Web3.to_checksum_address(address)
+            ),
+        )
+        balance_matic = Web3.from_wei(balance_wei, "ether")
         logger.info(f"💰 Saldo {address}: {balance_matic} POLYGON")
         return balance_matic
     except Exception as e:
@@ -42,10 +48,6 @@ async def send_polygon(
     admin_account = Account.from_key(private_key)
 
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise Exception("Polygon RPC tidak terkoneksi!")
-
         sender_address = admin_account.address
 
         if destination_wallet.lower() == sender_address.lower():
@@ -53,29 +55,29 @@ async def send_polygon(
                 f"Destination sama dengan source! Transaksi dibatalkan: {destination_wallet}"
             )
 
-        sender_balance = get_balance(sender_address, rpc_url)
-        if sender_balance is None or sender_balance < amount_matic:
+        value = Web3.to_wei(amount_matic, "ether")
+        destination = Web3.to_checksum_address(destination_wallet)
+
+        # chain id, nonce, saldo, estimasi gas & gas price dalam 1 batch JSON-RPC
+        pre = preflight_native("polygon", rpc_url, sender_address, destination, value)
+        sender_balance = pre.native_balance
+        logger.info(f"💰 Saldo {sender_address}: {sender_balance} POLYGON")
+        if sender_balance < amount_matic:
             raise Exception(
                 f"Saldo tidak cukup! Saldo sekarang {sender_balance} POLYGON"
             )
 
-        nonce = w3.eth.get_transaction_count(sender_address)
-        value = w3.to_wei(amount_matic, "ether")
-
         tx_dict = {
-            "nonce": nonce,
-            "to": Web3.to_checksum_address(destination_wallet),
+            "nonce": pre.nonce,
+            "to": destination,
             "value": value,
-            "chainId": w3.eth.chain_id,
+            "chainId": pre.chain_id,
+            "gas": pre.require_gas_estimate(),
+            "gasPrice": pre.gas_price,
         }
 
-        # Estimasi gas otomatis
-        gas_estimate = w3.eth.estimate_gas({**tx_dict, "from": sender_address})
-        tx_dict["gas"] = gas_estimate
-
-        # Gas price otomatis dari RPC
-        tx_dict["gasPrice"] = w3.eth.gas_price
-
+        # sign & broadcast di endpoint yang sama dengan preflight (nonce konsisten)
+        w3 = get_web3(pre.rpc_url)
         signed_tx = w3.eth.account.sign_transaction(tx_dict, private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         logger.info(
@@ -0,0 +1,86 @@
+# 📍 lib/portfolio.py
+import asyncio
+import logging
+import os
+import time
+
+from lib.balance_checker import check_token_balances, fetch_native_balance
+
+logger = logging.getLogger(__name__)
+
+# ======= Config portfolio =======
+PORTFOLIO_DEADLINE = float(os.getenv("PORTFOLIO_DEADLINE", "8"))  # detik, total
+PORTFOLIO_MAX_DEADLINE = float(os.getenv("PORTFOLIO_MAX_DEADLINE", "30"))
+PORTFOLIO_MAX_LEGS = int(os.getenv("PORTFOLIO_MAX_LEGS", "50"))
+
+
+async def _run_leg(leg: dict, coro, start: float):
+    """Jalankan satu leg & isi hasil/timing-nya langsung ke dict `leg`"""
+    try:
+        result = await coro
+        leg["status"] = "ok"
+        leg["balance" if leg["kind"] == "native" else "tokens"] = result
+    except asyncio.CancelledError:
+        # deadline habis → leg ditandai timeout, hasil leg lain tetap dipakai
+        leg["status"] = "timeout"
+        raise
+    except Exception as e:
+        leg["status"] = "error"
+        leg["error"] = str(e)
+    finally:
+        leg["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def get_portfolio(chains: list, deadline: float = None) -> dict:
+    """
+    Saldo satu user di banyak chain sekaligus.
+    `chains` berisi {"chain", "wallet", "rpc_url", "token_addresses"}; tiap chain
+    dipecah jadi leg native + leg token, semua jalan paralel di satu TaskGroup
+    di bawah satu deadline. Leg yang belum selesai saat deadline di-cancel dan
+    dilaporkan `timeout`, leg lain tetap dikembalikan (hasil parsial).
+    """
+    deadline = min(deadline or PORTFOLIO_DEADLINE, PORTFOLIO_MAX_DEADLINE)
+    legs = []
+    jobs = []
+    for item in chains:
+        chain = item["chain"].lower()
+        base = {"chain": chain, "wallet": item["wallet"], "status": "pending"}
+        legs.append({**base, "kind": "native"})
+        jobs.append(fetch_native_balance(chain, item["wallet"], item.get("rpc_url")))
+        if item.get("token_addresses"):
+            legs.append({**base, "kind": "tokens"})
+            jobs.append(
+                check_token_balances(
+                    chain, item["wallet"], item["token_addresses"], item.get("rpc_url")
+                )
+            )
+
+    if len(legs) > PORTFOLIO_MAX_LEGS:
+        for job in jobs:
+            job.close()
+        raise ValueError(
+            f"Maksimal {PORTFOLIO_MAX_LEGS} leg per portfolio, ada {len(legs)}"
+        )
+
+    start = time.perf_counter()
+    try:
+        async with asyncio.timeout(deadline):
+            async with asyncio.TaskGroup() as tg:
+                for leg, job in zip(legs, jobs):
+                    tg.create_task(_run_leg(leg, job, start))
+    except TimeoutError:
+        logger.warning(
+            f"⏳ Portfolio melewati deadline {deadline}s, kirim hasil parsial"
+        )
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    complete = all(leg["status"] == "ok" for leg in legs)
+    logger.info(
+        f"📊 Portfolio {len(legs)} leg selesai dalam {elapsed_ms} ms (lengkap={complete})"
+    )
+    return {
+        "complete": complete,
+        "deadline": deadline,
+        "elapsed_ms": elapsed_ms,
+        "legs": legs,
+    }
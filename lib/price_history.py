@@ -0,0 +1,144 @@
+# 📍 lib/price_history.py
+import logging
+import os
+import time
+
+import numpy as np
+
+from lib.price_service import COINGECKO_IDS, PRICE_CURRENCIES, coin_id, on_refresh
+
+logger = logging.getLogger(__name__)
+
+# ======= Config riwayat harga =======
+# jumlah sample per token (default 4320 ≈ 24 jam dengan refresh tiap 20 detik)
+PRICE_HISTORY_SIZE = int(os.getenv("PRICE_HISTORY_SIZE", "4320"))
+PRICE_HISTORY_MAX_CANDLES = int(os.getenv("PRICE_HISTORY_MAX_CANDLES", "1000"))
+
+# ======= Ring buffer =======
+# satu array untuk semua token: [sample, token, currency], NaN = tidak ada data
+_IDS = sorted(set(COINGECKO_IDS.values()))
+_ID_INDEX = {coin: i for i, coin in enumerate(_IDS)}
+_times = np.zeros(PRICE_HISTORY_SIZE)
+_values = np.full((PRICE_HISTORY_SIZE, len(_IDS), len(PRICE_CURRENCIES)), np.nan)
+_state = {"count": 0}  # total sample yang pernah ditulis
+
+
+def _record(fetched_at: float, prices: dict):
+    """Listener price service: satu refresh = satu baris di ring buffer"""
+    row = np.full((len(_IDS), len(PRICE_CURRENCIES)), np.nan)
+    for coin, info in prices.items():
+        i = _ID_INDEX.get(coin)
+        if i is None:
+            continue
+        row[i] = [info.get(c, np.nan) for c in PRICE_CURRENCIES]
+    pos = _state["count"] % PRICE_HISTORY_SIZE
+    _times[pos] = fetched_at
+    _values[pos] = row
+    _state["count"] += 1
+
+
+on_refresh(_record)
+
+
+def _series(symbol: str, currency: str) -> tuple:
+    """(times, prices) satu token & currency, urut waktu, tanpa NaN"""
+    coin = coin_id(symbol)
+    if coin is None:
+        raise ValueError(f"Token {symbol} belum support")
+    if currency.lower() not in PRICE_CURRENCIES:
+        raise ValueError(
+            f"Currency {currency} tidak didukung, pilih dari: {', '.join(PRICE_CURRENCIES)}"
+        )
+    count = _state["count"]
+    n = min(count, PRICE_HISTORY_SIZE)
+    order = np.arange(count - n, count) % PRICE_HISTORY_SIZE
+    times = _times[order]
+    prices = _values[order, _ID_INDEX[coin], PRICE_CURRENCIES.index(currency.lower())]
+    valid = ~np.isnan(prices)
+    return times[valid], prices[valid]
+
+
+def _twap(times: np.ndarray, prices: np.ndarray, start: float, end: float):
+    """
+    Rata-rata berbobot waktu di [start, end]: tiap sample berlaku sampai sample
+    berikutnya (sample terakhir sampai `end`), dipotong ke batas window.
+    """
+    if len(times) == 0:
+        return None
+    valid_from = np.maximum(times, start)
+    valid_to = np.minimum(np.append(times[1:], end), end)
+    weights = np.clip(valid_to - valid_from, 0, None)
+    if weights.sum() == 0:
+        return float(prices[-1])
+    return float(np.dot(prices, weights) / weights.sum())
+
+
+def _candles(times: np.ndarray, prices: np.ndarray, start: float, interval: float):
+    """OHLC per `interval` detik; sample sudah urut waktu → bucket berurutan"""
+    if len(times) == 0:
+        return []
+    bucket = ((times - start) // interval).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+    opens = prices[starts]
+    closes = prices[ends - 1]
+    highs = np.maximum.reduceat(prices, starts)
+    lows = np.minimum.reduceat(prices, starts)
+    return [
+        {
+            "time": start + int(b) * interval,
+            "open": float(o),
+            "high": float(h),
+            "low": float(lo),
+            "close": float(c),
+            "samples": int(n),
+        }
+        for b, o, h, lo, c, n in zip(
+            bucket[starts], opens, highs, lows, closes, ends - starts
+        )
+    ]
+
+
+# ===================== QUERY =====================
+def get_twap(symbol: str, currency: str = "idr", window: float = 300) -> float | None:
+    """TWAP `window` detik terakhir (None kalau belum ada riwayat)"""
+    now = time.time()
+    times, prices = _series(symbol, currency)
+    # sample sebelum window tetap dipakai: harganya berlaku sampai sample berikutnya
+    first = max(np.searchsorted(times, now - window, side="right") - 1, 0)
+    return _twap(times[first:], prices[first:], now - window, now)
+
+
+def get_price_history(
+    symbol: str, currency: str = "idr", window: float = 300, interval: float = 60
+) -> dict:
+    """Candle OHLC + TWAP satu token untuk `window` detik terakhir"""
+    if window / interval > PRICE_HISTORY_MAX_CANDLES:
+        raise ValueError(
+            f"Maksimal {PRICE_HISTORY_MAX_CANDLES} candle, perbesar interval"
+        )
+    now = time.time()
+    start = now - window
+    times, prices = _series(symbol, currency)
+    first = max(np.searchsorted(times, start, side="right") - 1, 0)
+    inside = times >= start
+    return {
+        "symbol": symbol.lower(),
+        "currency": currency.lower(),
+        "window": window,
+        "interval": interval,
+        "samples": int(inside.sum()),
+        "twap": _twap(times[first:], prices[first:], start, now),
+        "candles": _candles(times[inside], prices[inside], start, interval),
+    }
+
+
+def price_history_stats() -> dict:
+    """Isi ring buffer (untuk monitoring)"""
+    count = _state["count"]
+    oldest = _times[count % PRICE_HISTORY_SIZE if count >= PRICE_HISTORY_SIZE else 0]
+    return {
+        "size": PRICE_HISTORY_SIZE,
+        "samples": min(count, PRICE_HISTORY_SIZE),
+        "oldest": float(oldest) if count else None,
+    }
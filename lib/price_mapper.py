@@ -1,109 +1,59 @@
 # 📍 lib/price_mapper.py
 import logging
-import httpx
-import asyncio
-import json
-from pathlib import Path
-import time
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-# Mapping chain/token ke CoinGecko ID
-COINGECKO_IDS = {
-    "sol": "solana",
-    "bnb": "binancecoin",
-    "trx": "tron",
-    "usdt": "tether",
-    "usdc": "usd-coin",
-    "ton": "the-open-network",
-    "base": "ethereum",
-    "eth": "ethereum",
-}
+import numpy as np
 
-CACHE_FILE = Path("data/cache__map_prices.json")
-CACHE_TTL = 60  # cache 1 menit
+from lib.price_service import CHAIN_COINGECKO_IDS, ensure_prices, get_price, on_refresh
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
-# ======= Helper JSON Cache =======
-def load_json_cache():
-    if CACHE_FILE.exists():
-        try:
-            return json.loads(CACHE_FILE.read_text())
-        except Exception:
-            return {}
-    return {}
-
+LOCKED_FEE = 0.01  # contoh fee 1% untuk locked
 
-def save_json_cache(data):
-    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_FILE.write_text(json.dumps(data))
+# ======= Snapshot harga IDR untuk konversi batch =======
+_CHAINS = list(CHAIN_COINGECKO_IDS)
+_INDEX = {chain: i for i, chain in enumerate(_CHAINS)}
+# idr[i] = harga IDR chain i (NaN = tidak ada harga), diganti utuh tiap harga baru
+_snapshot = {"idr": np.full(len(_CHAINS), np.nan), "fetched_at": 0.0}
 
 
-def get_cached_price(token: str):
-    cache = load_json_cache()
-    token_data = cache.get(token)
-    if token_data:
-        # cek TTL
-        if time.time() - token_data.get("updated_at", 0) < CACHE_TTL:
-            return token_data.get("price_idr")
-    return None
+def _update_snapshot(fetched_at: float, prices: dict):
+    """Listener price service: vektor harga IDR semua chain dari satu payload"""
+    idr = np.array(
+        [prices.get(CHAIN_COINGECKO_IDS[c], {}).get("idr") or np.nan for c in _CHAINS],
+        dtype=float,
+    )
+    _snapshot.update(idr=idr, fetched_at=fetched_at)
 
 
-def update_cached_price(token: str, price_idr: float):
-    cache = load_json_cache()
-    cache[token] = {"price_idr": price_idr, "updated_at": time.time()}
-    save_json_cache(cache)
+on_refresh(_update_snapshot)
 
 
 # ======= Ambil harga token =======
 async def get_token_amount(chain: str, nominal_idr: int) -> float:
     """
-    Ambil jumlah token dari nominal IDR:
-    1. Prioritas: fetch dari Coingecko
-    2. Simpan harga ke file cache
-    3. Kalau gagal, ambil dari file cache
+    Ambil jumlah token dari nominal IDR.
+    Harga dari price service (cache memory bersama, fallback cache JSON).
     """
-    token_id = COINGECKO_IDS.get(chain.lower())
-    if not token_id:
+    if chain.lower() not in CHAIN_COINGECKO_IDS:
         logger.error(f"❌ Chain/token {chain} tidak dikenali")
         return 0
 
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={token_id}&vs_currencies=idr"
-
-    # ===== coba fetch realtime =====
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            price_idr = data.get(token_id, {}).get("idr")
-            if price_idr:
-                # update cache
-                update_cached_price(chain.lower(), price_idr)
-                amount = nominal_idr / price_idr
-                amount = round(amount, 6)
-                logger.info(
-                    f"💰 Nominal {nominal_idr} IDR = {amount} {chain.upper()} (harga {price_idr} IDR/{chain.upper()})"
-                )
-                return amount
-            else:
-                logger.warning(f"⚠️ Harga {chain.upper()} kosong dari API")
+        price_idr = await get_price(chain, "idr", CHAIN_COINGECKO_IDS)
     except Exception as e:
-        logger.warning(f"⚠️ Error ambil harga {chain.upper()} realtime: {e}")
+        logger.warning(f"⚠️ Error ambil harga {chain.upper()}: {e}")
+        price_idr = None
 
-    # ===== fallback cache =====
-    cached_price = get_cached_price(chain.lower())
-    if cached_price:
-        amount = nominal_idr / cached_price
-        amount = round(amount, 6)
-        logger.info(
-            f"✅ Pakai harga cache untuk {chain.upper()}: {cached_price} IDR, nominal {amount} {chain.upper()}"
-        )
-        return amount
+    if not price_idr:
+        logger.error(f"❌ Semua gagal untuk {chain.upper()}, fallback 0")
+        return 0
 
-    logger.error(f"❌ Semua gagal untuk {chain.upper()}, fallback 0")
-    return 0
+    amount = round(nominal_idr / price_idr, 6)
+    logger.info(
+        f"💰 Nominal {nominal_idr} IDR = {amount} {chain.upper()} (harga {price_idr} IDR/{chain.upper()})"
+    )
+    return amount
 
 
 # 🔹 Tambahan: get_locked_token_amount
@@ -114,9 +64,59 @@ async def get_locked_token_amount(chain: str, nominal_idr: int) -> float:
     Contoh: 1% fee locked token.
     """
     base_amount = await get_token_amount(chain, nominal_idr)
-    locked_amount = base_amount * 0.99  # contoh fee 1% untuk locked
+    locked_amount = base_amount * (1 - LOCKED_FEE)
     locked_amount = round(locked_amount, 6)
     logger.info(
         f"🔒 Locked token {chain.upper()}: {locked_amount} dari nominal {base_amount}"
     )
     return locked_amount
+
+
+# ======= Konversi batch =======
+async def get_token_amounts(
+    chains: list, nominal_idr: list, locked: bool = False
+) -> dict:
+    """
+    Konversi banyak nominal IDR sekaligus dari satu snapshot harga (satu vektor
+    harga, satu pembagian array). Amount None kalau chain belum support atau
+    harganya tidak tersedia, tidak di-fallback ke 0.
+    """
+    if len(chains) != len(nominal_idr):
+        raise ValueError("Jumlah chains dan nominal IDR harus sama")
+
+    stale = await ensure_prices()
+    # satu referensi → semua baris dihitung dari snapshot yang sama
+    snapshot = _snapshot
+    idr, fetched_at = snapshot["idr"], snapshot["fetched_at"]
+
+    # lookup per chain unik saja, lalu disebar ke semua baris
+    names, inverse = np.unique(
+        np.array([c.lower() for c in chains], dtype=str), return_inverse=True
+    )
+    unique_prices = np.array(
+        [idr[_INDEX[n]] if n in _INDEX else np.nan for n in names], dtype=float
+    )
+    prices = unique_prices[inverse]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amounts = np.round(np.asarray(nominal_idr, dtype=float) / prices, 6)
+    if locked:
+        amounts = np.round(amounts * (1 - LOCKED_FEE), 6)
+    valid = np.isfinite(amounts)
+
+    missing = [str(n) for n, p in zip(names, unique_prices) if np.isnan(p)]
+    if missing:
+        logger.warning(f"⚠️ Harga tidak tersedia untuk: {', '.join(missing)}")
+    logger.info(
+        f"💰 Konversi batch {len(chains)} nominal IDR ({int(valid.sum())} berhasil)"
+    )
+    return {
+        "fetched_at": fetched_at,
+        "stale": stale,
+        "locked": locked,
+        "amounts": np.where(valid, amounts, None).tolist(),
+        "prices_idr": {
+            str(n): float(p) for n, p in zip(names, unique_prices) if not np.isnan(p)
+        },
+        "missing": missing,
+    }
@@ -0,0 +1,424 @@
+# 📍 lib/price_service.py
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import ujson as json
+
+from lib import shared_cache, single_flight
+from lib.circuit_breaker import guarded
+from lib.rate_limiter import acquire
+
+logger = logging.getLogger(__name__)
+
+# ======= Config harga =======
+BASE_URL = os.getenv("COINGECKO_API", "https://api.coingecko.com/api/v3/simple/price")
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "30"))  # detik
+# jadwal refresh background, sebaiknya < TTL supaya request jarang lihat harga stale
+PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "20"))  # detik
+# harga lebih tua dari ini tidak dikirim sebagai stale, request menunggu refresh dulu
+PRICE_MAX_STALE = float(os.getenv("PRICE_MAX_STALE", "600"))  # detik
+PRICE_TIMEOUT = float(os.getenv("PRICE_TIMEOUT", "10"))  # detik
+PRICE_SNAPSHOT_INTERVAL = float(os.getenv("PRICE_SNAPSHOT_INTERVAL", "60"))  # detik
+# worker non-leader cek segment harga bersama tiap sekian detik (kalau SHARED_CACHE_DIR diisi)
+PRICE_SHARED_POLL = float(os.getenv("PRICE_SHARED_POLL", "1"))  # detik
+# fiat yang ikut diambil di satu request batch (idr & usd selalu ada untuk /price & /swap)
+PRICE_CURRENCIES = list(
+    dict.fromkeys(
+        ["idr", "usd"]
+        + [
+            c.strip().lower()
+            for c in os.getenv("PRICE_CURRENCIES", "eur,sgd,myr").split(",")
+            if c.strip()
+        ]
+    )
+)
+CACHE_FILE = Path(
+    "data/cache_prices.json"
+)  # snapshot harga, fallback kalau CoinGecko down
+
+# Mapping symbol token → CoinGecko ID (/price & /swap)
+COINGECKO_IDS = {
+    "sol": "solana",  # Solana
+    "eth": "ethereum",  # Ethereum
+    "base": "base-protocol",  # token BASE (Base Protocol), bukan chain Base
+    "bnb": "binancecoin",  # Binance Coin
+    "usdt": "tether",  # Tether
+    "usdc": "usd-coin",  # USD Coin
+    "trx": "tron",  # TRON
+    "ton": "the-open-network",  # TON
+    "matic": "matic-network",  # Polygon alias MATIC
+    "polygon": "matic-network",  # Polygon alias lain
+    "link": "chainlink",  # Chainlink
+    "ada": "cardano",  # Cardano
+    "doge": "dogecoin",  # Dogecoin
+    "dot": "polkadot",  # Polkadot
+    "avax": "avalanche-2",  # Avalanche
+    "ftt": "ftx-token",  # FTX Token
+    "cake": "pancakeswap-token",  # PancakeSwap
+    "shib": "shiba-inu",  # Shiba Inu
+    "luna": "terra-luna",  # Terra
+    "atom": "cosmos",  # Cosmos
+    "xrp": "ripple",  # Ripple
+    "bch": "bitcoin-cash",  # Bitcoin Cash
+    "ltc": "litecoin",  # Litecoin
+}
+# Mapping chain → CoinGecko ID gas token (price_mapper): chain Base bayar gas pakai ETH
+CHAIN_COINGECKO_IDS = {**COINGECKO_IDS, "base": "ethereum"}
+
+# ======= State =======
+_client = None
+_refresh_task = None  # loop refresh terjadwal (lifespan)
+_snapshot_task = None  # loop snapshot ke disk (lifespan)
+_inflight = None  # refresh yang sedang jalan (terjadwal / dipicu request stale)
+_last_error = None
+_listeners = []
+# prices: {coingecko_id: {"idr", "usd"}}; dirty → belum masuk snapshot
+_cache = {"prices": {}, "fetched_at": 0.0, "loaded": False, "dirty": False}
+_stats = {
+    "fetches": 0,
+    "failures": 0,
+    "stale_served": 0,
+    "snapshots": 0,
+    "shared_reads": 0,
+}
+# seq segment bersama terakhir yang sudah dibaca; follower = worker lain yang fetch;
+# published_at = fetched_at terakhir yang ditulis leader (0 = belum pernah menulis)
+_shared = {"seq": 0, "follower": False, "published_at": 0.0}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Satu AsyncClient keep-alive untuk semua request harga"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=PRICE_TIMEOUT)
+    return _client
+
+
+def on_refresh(callback):
+    """Daftarkan callback(fetched_at, prices) tiap harga baru masuk (refresh / snapshot)"""
+    _listeners.append(callback)
+
+
+def _notify():
+    """Kirim harga terbaru ke semua listener (riwayat harga, matriks quote swap)"""
+    for callback in _listeners:
+        try:
+            callback(_cache["fetched_at"], _cache["prices"])
+        except Exception as e:
+            logger.warning(f"⚠️ Listener refresh harga gagal: {e}")
+
+
+def coin_id(symbol: str, ids: dict = COINGECKO_IDS) -> str | None:
+    """CoinGecko ID untuk symbol (atau chain, dengan ids=CHAIN_COINGECKO_IDS); None kalau belum support"""
+    return ids.get(symbol.lower())
+
+
+# ======= Snapshot disk =======
+def load_snapshot():
+    """
+    Isi memory dari snapshot disk, sekali saja (startup).
+    Setelah ini request tidak pernah menyentuh disk.
+    """
+    if _cache["loaded"]:
+        return
+    _cache["loaded"] = True
+    try:
+        data = json.loads(CACHE_FILE.read_text())
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot harga {CACHE_FILE} tidak bisa dibaca: {e}")
+        return
+    # format lama (tanpa "prices") diabaikan, akan tertimpa snapshot berikutnya
+    if not _cache["prices"] and isinstance(data, dict) and "prices" in data:
+        _cache["prices"] = data["prices"]
+        # umur asli dipakai → snapshot lama tetap dianggap stale
+        _cache["fetched_at"] = data.get("fetched_at", 0.0)
+        logger.info(f"🗂️ Snapshot harga dimuat: {len(data['prices'])} token")
+        _notify()
+
+
+def _write_snapshot(data: dict):
+    """Tulis ke file sementara di folder yang sama lalu rename (atomic, aman antar worker)"""
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_FILE.parent, prefix=f".{CACHE_FILE.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CACHE_FILE)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+async def save_snapshot():
+    """Snapshot memory ke disk di thread terpisah (event loop tidak ikut menunggu I/O)"""
+    if not _cache["dirty"]:
+        return
+    _cache["dirty"] = False
+    data = {"fetched_at": _cache["fetched_at"], "prices": _cache["prices"]}
+    try:
+        await asyncio.to_thread(_write_snapshot, data)
+        _stats["snapshots"] += 1
+    except Exception as e:
+        _cache["dirty"] = True
+        logger.warning(f"⚠️ Gagal simpan snapshot harga: {e}")
+
+
+# ======= Fetch =======
+async def _fetch_all() -> dict:
+    """Satu request /simple/price untuk semua ID yang dilacak"""
+    params = {
+        "ids": ",".join(
+            sorted(set(COINGECKO_IDS.values()) | set(CHAIN_COINGECKO_IDS.values()))
+        ),
+        "vs_currencies": ",".join(PRICE_CURRENCIES),
+    }
+
+    async def fetch():
+        await acquire("coingecko")  # antre di token bucket, jangan sampai kena 429
+        resp = await _get_client().get(BASE_URL, params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    # circuit breaker host CoinGecko: kalau open langsung ke fallback cache
+    return await guarded(BASE_URL, fetch)
+
+
+def _is_fresh() -> bool:
+    return time.time() - _cache["fetched_at"] < PRICE_CACHE_TTL
+
+
+def _is_follower() -> bool:
+    """Cache bersama aktif & worker lain yang jadi leader (yang fetch ke CoinGecko)"""
+    if not shared_cache.enabled():
+        return False
+    try:
+        return not shared_cache.try_lead("prices")
+    except Exception as e:
+        # segment tidak bisa dibuka → worker ini jalan sendiri seperti tanpa cache bersama
+        logger.warning(f"⚠️ Cache bersama tidak bisa dipakai: {e}")
+        return False
+
+
+def _adopt_shared() -> bool:
+    """Follower: pakai harga dari segment bersama kalau lebih baru dari memory"""
+    try:
+        shared = shared_cache.read("prices", _shared["seq"])
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal baca harga dari cache bersama: {e}")
+        return False
+    if shared is None:
+        return False
+    _shared["seq"], fetched_at, prices = shared
+    _shared["published_at"] = fetched_at
+    if fetched_at <= _cache["fetched_at"]:
+        return False
+    _cache["prices"] = prices
+    _cache["fetched_at"] = fetched_at
+    _stats["shared_reads"] += 1
+    _notify()
+    return True
+
+
+async def _refresh():
+    """Fetch semua harga ke cache; kalau gagal harga lama tetap dipakai"""
+    global _last_error
+    _shared["follower"] = _is_follower()
+    if _shared["follower"]:
+        _adopt_shared()
+        # leader belum pernah menulis (cold start) atau masih pegang lock tapi berhenti
+        # publish (loop macet) → follower fetch sendiri tiap PRICE_REFRESH_INTERVAL
+        # supaya harga tidak melewati PRICE_MAX_STALE
+        leader_stalled = time.time() - _shared["published_at"] > PRICE_MAX_STALE
+        if _cache["prices"] and (
+            not leader_stalled
+            or time.time() - _cache["fetched_at"] < PRICE_REFRESH_INTERVAL
+        ):
+            return
+        if _shared["published_at"]:
+            logger.warning(
+                "⚠️ Leader harga tidak publish lebih dari "
+                f"{PRICE_MAX_STALE:.0f} detik, worker ini fetch sendiri"
+            )
+    try:
+        prices = await _fetch_all()
+    except Exception as e:
+        _stats["failures"] += 1
+        _last_error = e
+        logger.warning(f"⚠️ Refresh harga CoinGecko gagal: {e}")
+        return
+    _stats["fetches"] += 1
+    _cache["prices"] = prices
+    _cache["fetched_at"] = time.time()
+    _cache["dirty"] = True
+    logger.info(f"💲 Harga {len(prices)} token diperbarui dari CoinGecko")
+    if shared_cache.is_leader("prices"):
+        try:
+            shared_cache.publish("prices", _cache["fetched_at"], prices)
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal tulis harga ke cache bersama: {e}")
+    _notify()
+
+
+def _trigger_refresh() -> asyncio.Task:
+    """
+    Refresh lewat single-flight: jadwal background & semua request yang miss
+    bersamaan berbagi satu fetch CoinGecko (yang ikut menunggu tercatat `coalesced`).
+    """
+    global _inflight
+    _inflight = single_flight.join("prices", _refresh)
+    return _inflight
+
+
+async def ensure_prices() -> bool:
+    """
+    Pastikan ada harga di memory; return True kalau harganya stale (lewat TTL).
+    Stale-while-revalidate: harga lama langsung dipakai, refresh jalan di background.
+    Hanya cold start / harga lebih tua dari PRICE_MAX_STALE yang menunggu refresh;
+    kalau refresh gagal, harga lama apa pun tetap lebih baik daripada kosong.
+    """
+    if _is_fresh():
+        return False
+    load_snapshot()  # no-op kalau sudah dimuat di lifespan
+    task = _trigger_refresh()
+    if time.time() - _cache["fetched_at"] > PRICE_MAX_STALE or not _cache["prices"]:
+        # shield → request yang batal tidak ikut membatalkan refresh bersama
+        await asyncio.shield(task)
+        if _is_fresh():
+            return False
+        if not _cache["prices"]:
+            logger.error(f"❌ Harga tidak tersedia, CoinGecko gagal: {_last_error}")
+            raise _last_error or Exception("Harga tidak tersedia")
+    _stats["stale_served"] += 1
+    return True
+
+
+# ======= Harga Token =======
+async def get_prices(symbols: list = None, ids: dict = COINGECKO_IDS) -> dict:
+    """
+    Harga banyak symbol sekaligus dari memory: {symbol: {"idr", "usd", "stale"}}.
+    Symbol yang belum support / tidak ada datanya dilewati.
+    """
+    return _collect(symbols, await ensure_prices(), ids)
+
+
+def _collect(symbols: list | None, stale: bool, ids: dict = COINGECKO_IDS) -> dict:
+    result = {}
+    for symbol in symbols if symbols is not None else ids:
+        info = _cache["prices"].get(coin_id(symbol, ids) or "")
+        if info:
+            result[symbol.lower()] = {**info, "stale": stale}
+    return result
+
+
+async def get_price(
+    symbol: str, currency: str = "idr", ids: dict = COINGECKO_IDS
+) -> float | None:
+    """Harga satu symbol dalam `currency` (None kalau tidak tersedia)"""
+    if not coin_id(symbol, ids):
+        logger.warning(f"⚠️ Token {symbol} belum support")
+        return None
+    info = (await get_prices([symbol], ids)).get(symbol.lower(), {})
+    return info.get(currency.lower()) or None
+
+
+async def get_price_matrix(symbols: list, currencies: list) -> dict:
+    """
+    Matriks harga padat symbol × currency dari satu payload cache
+    (baris = symbols, kolom = currencies, None kalau tidak ada datanya).
+    """
+    currencies = [c.lower() for c in currencies]
+    unknown = [c for c in currencies if c not in PRICE_CURRENCIES]
+    if unknown:
+        raise ValueError(
+            f"Currency {', '.join(unknown)} tidak didukung, pilih dari: {', '.join(PRICE_CURRENCIES)}"
+        )
+    # stale dari cache, bukan dari symbol yang ketemu (semua missing tetap bisa stale)
+    stale = await ensure_prices()
+    prices = _collect(symbols, stale)
+    return {
+        "symbols": [s.lower() for s in symbols],
+        "currencies": currencies,
+        "prices": [
+            [prices.get(s.lower(), {}).get(c) for c in currencies] for s in symbols
+        ],
+        "missing": [s.lower() for s in symbols if s.lower() not in prices],
+        "stale": stale,
+    }
+
+
+# ===================== REFRESH BACKGROUND =====================
+async def _refresh_loop():
+    """
+    Refresh semua harga terjadwal → request hampir selalu dapat harga fresh.
+    Dengan cache bersama hanya leader yang fetch; follower cukup cek seq segment.
+    """
+    while True:
+        await _trigger_refresh()
+        await asyncio.sleep(
+            PRICE_SHARED_POLL if _shared["follower"] else PRICE_REFRESH_INTERVAL
+        )
+
+
+async def _snapshot_loop():
+    """Snapshot berkala; hanya menulis kalau ada harga baru sejak snapshot terakhir"""
+    while True:
+        await asyncio.sleep(PRICE_SNAPSHOT_INTERVAL)
+        await save_snapshot()
+
+
+def start_price_refresher():
+    """Muat snapshot & mulai task refresh + snapshot harga (dipanggil dari lifespan app)"""
+    global _refresh_task, _snapshot_task
+    load_snapshot()
+    loop = asyncio.get_running_loop()
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = loop.create_task(_refresh_loop())
+    if _snapshot_task is None or _snapshot_task.done():
+        _snapshot_task = loop.create_task(_snapshot_loop())
+
+
+async def stop_price_refresher():
+    global _refresh_task, _snapshot_task
+    for task in (_refresh_task, _snapshot_task, _inflight):
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _refresh_task = _snapshot_task = None
+    # snapshot terakhir sebelum shutdown
+    await save_snapshot()
+
+
+# ===================== STATS & SHUTDOWN =====================
+def price_stats() -> dict:
+    """Statistik cache harga (untuk monitoring)"""
+    fetched_at = _cache["fetched_at"]
+    return {
+        "ids": len(_cache["prices"]),
+        "ttl": PRICE_CACHE_TTL,
+        "refresh_interval": PRICE_REFRESH_INTERVAL,
+        "refresher": _refresh_task is not None and not _refresh_task.done(),
+        "max_stale": PRICE_MAX_STALE,
+        "age": round(time.time() - fetched_at, 1) if fetched_at else None,
+        "shared_leader": shared_cache.is_leader("prices"),
+        **_stats,
+    }
+
+
+async def close_price_client():
+    """Tutup client HTTP harga saat shutdown"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
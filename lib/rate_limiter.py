@@ -0,0 +1,120 @@
+# 📍 lib/rate_limiter.py
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# ======= Config limiter =======
+# rate = token per detik, burst = kapasitas bucket
+RATE_LIMITS = {
+    "coingecko": (
+        float(os.getenv("RATE_LIMIT_COINGECKO_RPS", "0.5")),  # ±30 call/menit
+        int(os.getenv("RATE_LIMIT_COINGECKO_BURST", "10")),
+    ),
+    "trongrid": (
+        float(os.getenv("RATE_LIMIT_TRONGRID_RPS", "10")),
+        int(os.getenv("RATE_LIMIT_TRONGRID_BURST", "15")),
+    ),
+}
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))  # detik antre maks
+
+
+class RateLimitExceeded(Exception):
+    """Antrean limiter terlalu panjang → call ditolak, bukan kesalahan upstream"""
+
+
+class TokenBucket:
+    """
+    Token bucket async. Caller yang kehabisan token tidak ditolak,
+    tapi antre (reservasi token ke depan) sampai RATE_LIMIT_MAX_WAIT.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.stats = {
+            "acquired": 0,
+            "queued": 0,  # antrean saat ini
+            "max_queued": 0,
+            "rejected": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._refill(now)
+        # token bisa minus = sudah direservasi caller yang sedang antre
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if wait > RATE_LIMIT_MAX_WAIT:
+            self.stats["rejected"] += 1
+            raise RateLimitExceeded(
+                f"Rate limit {self.name}: antre {wait:.1f}s > {RATE_LIMIT_MAX_WAIT}s"
+            )
+        self.tokens -= 1
+        self.stats["acquired"] += 1
+        if wait <= 0:
+            return
+
+        self.stats["queued"] += 1
+        self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        self.stats["total_wait"] += wait
+        self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.tokens += 1  # batal antre → kembalikan reservasi
+            raise
+        finally:
+            self.stats["queued"] -= 1
+
+
+# ======= Registry =======
+_buckets = {}
+
+
+def get_limiter(name: str) -> TokenBucket | None:
+    """Limiter untuk upstream `name`; None kalau upstream tidak dibatasi"""
+    bucket = _buckets.get(name)
+    if bucket is None and name in RATE_LIMITS:
+        rate, burst = RATE_LIMITS[name]
+        if rate > 0:
+            bucket = _buckets[name] = TokenBucket(name, rate, burst)
+    return bucket
+
+
+async def acquire(name: str):
+    """Tunggu giliran call ke upstream `name` (no-op kalau tidak dibatasi)"""
+    bucket = get_limiter(name)
+    if bucket is not None:
+        await bucket.acquire()
+
+
+# ===================== STATS =====================
+def limiter_stats() -> dict:
+    """Kedalaman antrean & waktu tunggu per upstream (untuk monitoring)"""
+    return {
+        name: {
+            "rate": bucket.rate,
+            "burst": bucket.burst,
+            "tokens": round(max(bucket.tokens, 0), 2),
+            **bucket.stats,
+            "total_wait": round(bucket.stats["total_wait"], 3),
+            "max_wait": round(bucket.stats["max_wait"], 3),
+            "avg_wait": (
+                round(bucket.stats["total_wait"] / bucket.stats["acquired"], 3)
+                if bucket.stats["acquired"]
+                else 0.0
+            ),
+        }
+        for name, bucket in _buckets.items()
+    }
@@ -0,0 +1,200 @@
+# 📍 lib/rpc_metadata.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from lib import shared_cache
+from lib.rpc_pool import get_web3, mask_url
+
+logger = logging.getLogger(__name__)
+
+# ======= Config metadata =======
+RPC_METADATA_TTL = float(os.getenv("RPC_METADATA_TTL", "3600"))  # detik
+RPC_METADATA_MAX_SIZE = int(os.getenv("RPC_METADATA_MAX_SIZE", "256"))
+RPC_METADATA_CADENCE_BLOCKS = int(os.getenv("RPC_METADATA_CADENCE_BLOCKS", "20"))
+
+# ======= Cache per endpoint =======
+_lock = threading.Lock()
+# {rpc_url: {"chain_id", "block_time", "eip1559", "batch", "fetched_at"}}
+_metadata = OrderedDict()
+# endpoint yang sedang di-probe di background (prefetch_metadata)
+_prefetching = set()
+# salinan segment bersama (SHARED_CACHE_DIR): seq terakhir yang dibaca & isinya
+_shared = {"seq": 0, "entries": {}}
+
+
+def _fetch(rpc_url: str) -> dict:
+    """
+    Kenalan pertama dengan endpoint EVM: chain id, jeda antar blok,
+    support EIP-1559 (eth_feeHistory) & support JSON-RPC batch.
+    """
+    w3 = get_web3(rpc_url)
+    batch = True
+    try:
+        with w3.batch_requests() as b:
+            b.add(w3.eth.chain_id)
+            b.add(w3.eth.get_block("latest"))
+            chain_id, latest = b.execute()
+    except Exception as e:
+        logger.info(f"ℹ️ RPC {mask_url(rpc_url)} tidak support batch: {e}")
+        batch = False
+        chain_id = w3.eth.chain_id
+        latest = w3.eth.get_block("latest")
+
+    block_time = None
+    if latest["number"] > 0:
+        span = min(RPC_METADATA_CADENCE_BLOCKS, latest["number"])
+        older = w3.eth.get_block(latest["number"] - span)
+        block_time = round((latest["timestamp"] - older["timestamp"]) / span, 3)
+
+    eip1559 = False
+    if latest.get("baseFeePerGas") is not None:
+        try:
+            w3.eth.fee_history(1, "latest")
+            eip1559 = True
+        except Exception as e:
+            logger.info(f"ℹ️ RPC {mask_url(rpc_url)} tidak support eth_feeHistory: {e}")
+
+    return {
+        "chain_id": chain_id,
+        "block_time": block_time,
+        "eip1559": eip1559,
+        "batch": batch,
+        "fetched_at": time.time(),
+    }
+
+
+def _from_shared(rpc_url: str) -> dict | None:
+    """Metadata yang sudah dikenali worker lain lewat segment bersama (tanpa round trip)"""
+    if not shared_cache.enabled():
+        return None
+    try:
+        with _lock:
+            shared = shared_cache.read("rpc_metadata", _shared["seq"])
+            if shared is not None:
+                _shared["seq"], _, _shared["entries"] = shared
+            entry = _shared["entries"].get(rpc_url)
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal baca metadata RPC dari cache bersama: {e}")
+        return None
+    if entry is None or time.time() - entry["fetched_at"] >= RPC_METADATA_TTL:
+        return None
+    return entry
+
+
+def _to_shared(rpc_url: str, entry: dict):
+    """Bagikan metadata baru ke worker lain (writer antre di flock segment)"""
+    if not shared_cache.enabled():
+        return
+
+    def merge(data):
+        data = data or {}
+        data[rpc_url] = entry
+        # batas sama dengan cache lokal: buang yang paling lama di-fetch
+        while len(data) > RPC_METADATA_MAX_SIZE:
+            del data[min(data, key=lambda url: data[url]["fetched_at"])]
+        return data
+
+    try:
+        shared_cache.update("rpc_metadata", merge)
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal tulis metadata RPC ke cache bersama: {e}")
+
+
+def cached_metadata(rpc_url: str) -> dict | None:
+    """Metadata dari cache tanpa round trip (None kalau belum ada / kedaluwarsa)"""
+    with _lock:
+        entry = _metadata.get(rpc_url)
+        if entry is None or time.time() - entry["fetched_at"] >= RPC_METADATA_TTL:
+            return None
+        _metadata.move_to_end(rpc_url)
+        return entry
+
+
+def get_metadata(rpc_url: str) -> dict:
+    """
+    Metadata endpoint; diisi saat kontak pertama & di-refresh lazy setelah TTL.
+    Kalau refresh gagal, metadata lama tetap dipakai (chain id tidak berubah).
+    Dengan cache bersama, endpoint yang sudah dikenali worker lain tidak di-probe ulang.
+    """
+    entry = cached_metadata(rpc_url)
+    if entry is not None:
+        return entry
+
+    entry = _from_shared(rpc_url)
+    if entry is None:
+        try:
+            entry = _fetch(rpc_url)
+        except Exception:
+            with _lock:
+                stale = _metadata.get(rpc_url)
+            if stale is None:
+                raise
+            logger.warning(
+                f"⚠️ Refresh metadata RPC {mask_url(rpc_url)} gagal, pakai data lama"
+            )
+            return stale
+        _to_shared(rpc_url, entry)
+
+    with _lock:
+        _metadata[rpc_url] = entry
+        _metadata.move_to_end(rpc_url)
+        # rpc_url datang dari user → batasi jumlah endpoint yang disimpan
+        while len(_metadata) > RPC_METADATA_MAX_SIZE:
+            _metadata.popitem(last=False)
+    logger.info(
+        f"🧭 Metadata RPC {mask_url(rpc_url)}: chain_id={entry['chain_id']}, "
+        f"block_time={entry['block_time']}s, eip1559={entry['eip1559']}, batch={entry['batch']}"
+    )
+    return entry
+
+
+def prefetch_metadata(rpc_url: str):
+    """
+    Isi cache metadata di thread background tanpa menunggu hasilnya
+    (untuk jalur sync seperti preflight yang tidak boleh menunggu probe penuh).
+    """
+    with _lock:
+        if rpc_url in _prefetching:
+            return
+        _prefetching.add(rpc_url)
+
+    def run():
+        try:
+            get_metadata(rpc_url)
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch metadata RPC {mask_url(rpc_url)} gagal: {e}")
+        finally:
+            with _lock:
+                _prefetching.discard(rpc_url)
+
+    threading.Thread(target=run, name="rpc-metadata-prefetch", daemon=True).start()
+
+
+async def get_metadata_async(rpc_url: str) -> dict:
+    """Versi async; cache hit langsung, kontak pertama dijalankan di thread"""
+    entry = cached_metadata(rpc_url)
+    if entry is not None:
+        return entry
+    return await asyncio.to_thread(get_metadata, rpc_url)
+
+
+# ===================== STATS =====================
+def metadata_stats() -> list:
+    """Metadata tiap endpoint yang sudah dikenal (untuk monitoring)"""
+    now = time.time()
+    with _lock:
+        return [
+            {
+                "rpc_url": mask_url(url),
+                "chain_id": entry["chain_id"],
+                "block_time": entry["block_time"],
+                "eip1559": entry["eip1559"],
+                "batch": entry["batch"],
+                "age": round(now - entry["fetched_at"], 1),
+            }
+            for url, entry in _metadata.items()
+        ]
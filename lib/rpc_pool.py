@@ -0,0 +1,306 @@
+# 📍 lib/rpc_pool.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from solana.rpc.async_api import AsyncClient as SolanaClient
+from tronpy.async_tron import AsyncTron
+from tronpy.providers.async_http import AsyncHTTPProvider as TronHTTPProvider
+from web3 import AsyncWeb3, AsyncHTTPProvider, Web3
+from lib.rate_limiter import acquire
+
+logger = logging.getLogger(__name__)
+
+# ======= Config pool =======
+RPC_POOL_MAX_SIZE = int(os.getenv("RPC_POOL_MAX_SIZE", "32"))  # max RPC URL di pool
+RPC_POOL_IDLE_TTL = int(os.getenv("RPC_POOL_IDLE_TTL", "300"))  # detik
+RPC_POOL_CONNECTIONS = int(os.getenv("RPC_POOL_CONNECTIONS", "10"))  # koneksi per URL
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "15"))
+# jeda sebelum client yang dikeluarkan benar-benar ditutup (call yang masih jalan selesai dulu)
+RPC_POOL_CLOSE_GRACE = float(
+    os.getenv("RPC_POOL_CLOSE_GRACE", str(max(60.0, RPC_TIMEOUT * 4)))
+)
+TRON_RPC_URL = os.getenv("TRON_RPC_URL", "https://api.trongrid.io")
+TRONGRID_API_KEY = os.getenv("TRONGRID_API_KEY")
+
+# ======= Global registry =======
+_lock = threading.Lock()
+# {kind: {rpc_url: {"client", "close"/"aclose", "created_at", "last_used", "hits"}}}
+_pools = {
+    "sync": OrderedDict(),  # Web3 (EVM, blocking)
+    "async": OrderedDict(),  # AsyncWeb3 (EVM)
+    "solana": OrderedDict(),  # solana AsyncClient
+    "tron": OrderedDict(),  # tronpy AsyncTron, key = endpoint + API key
+}
+# client yang sudah keluar dari pool tapi mungkin masih dipakai request lain:
+# {kind: deque[(close_at, rpc_url, entry, reason)]}, ditutup setelah RPC_POOL_CLOSE_GRACE
+_retired = {kind: deque() for kind in _pools}
+_stats = {"hits": 0, "misses": 0, "evicted_lru": 0, "evicted_idle": 0}
+
+
+def _new_session() -> requests.Session:
+    """Session keep-alive dengan connection pool sendiri per RPC URL"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=RPC_POOL_CONNECTIONS, pool_maxsize=RPC_POOL_CONNECTIONS
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def mask_url(rpc_url: str) -> str:
+    """Sembunyikan path/API key di RPC URL, cukup scheme + host"""
+    parsed = urlparse(rpc_url)
+    return f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else "<invalid>"
+
+
+def _close_entry(rpc_url: str, entry: dict, reason: str):
+    try:
+        if "close" in entry:
+            entry["close"]()
+        else:
+            # client async → close dijadwalkan di event loop yang jalan
+            asyncio.get_running_loop().create_task(entry["aclose"]())
+    except Exception as e:
+        logger.warning(f"⚠️ Gagal tutup session RPC {mask_url(rpc_url)}: {e}")
+    logger.debug(f"🔒 Session RPC {mask_url(rpc_url)} ditutup ({reason})")
+
+
+def _retire(kind: str, rpc_url: str, entry: dict, now: float, reason: str):
+    """
+    Keluarkan client dari pool tanpa langsung menutupnya.
+    Pemanggil lain bisa masih memegang client ini (get_* return client langsung),
+    jadi close ditunda RPC_POOL_CLOSE_GRACE detik.
+    """
+    _retired[kind].append((now + RPC_POOL_CLOSE_GRACE, rpc_url, entry, reason))
+    logger.info(f"♻️ Provider RPC {mask_url(rpc_url)} dikeluarkan dari pool ({reason})")
+
+
+def _close_retired(kind: str, now: float):
+    """Tutup client yang sudah lewat masa tenggang"""
+    retired = _retired[kind]
+    while retired and retired[0][0] <= now:
+        _, rpc_url, entry, reason = retired.popleft()
+        _close_entry(rpc_url, entry, reason)
+
+
+def _evict(kind: str, now: float):
+    """Buang provider yang idle lebih lama dari RPC_POOL_IDLE_TTL, lalu LRU"""
+    pool = _pools[kind]
+    # OrderedDict urut LRU → yang paling lama tidak dipakai ada di depan
+    while pool:
+        rpc_url, entry = next(iter(pool.items()))
+        if now - entry["last_used"] < RPC_POOL_IDLE_TTL:
+            break
+        pool.pop(rpc_url)
+        _stats["evicted_idle"] += 1
+        _retire(kind, rpc_url, entry, now, "idle")
+
+    while len(pool) > RPC_POOL_MAX_SIZE:
+        rpc_url, entry = pool.popitem(last=False)
+        _stats["evicted_lru"] += 1
+        _retire(kind, rpc_url, entry, now, "LRU")
+
+    _close_retired(kind, now)
+
+
+def _get_or_create(kind: str, rpc_url: str, factory):
+    """
+    Ambil client dari pool `kind`, atau buat baru lewat `factory()`.
+    factory return dict {"client", "close"} atau {"client", "aclose"}.
+    """
+    if not rpc_url:
+        raise ValueError("❌ RPC URL harus diberikan!")
+
+    pool = _pools[kind]
+    now = time.time()
+    with _lock:
+        entry = pool.get(rpc_url)
+        if entry is not None:
+            pool.move_to_end(rpc_url)
+            entry["last_used"] = now
+            entry["hits"] += 1
+            _stats["hits"] += 1
+            # sweep juga saat hit: murah (cek dari depan OrderedDict) dan
+            # URL lain yang sudah idle tetap dibersihkan walau tidak ada miss
+            _evict(kind, now)
+            return entry["client"]
+
+        entry = {**factory(), "created_at": now, "last_used": now, "hits": 0}
+        pool[rpc_url] = entry
+        _stats["misses"] += 1
+        _evict(kind, now)
+
+    logger.info(f"🔌 Provider RPC {kind} baru dibuat untuk {mask_url(rpc_url)}")
+    return entry["client"]
+
+
+# ===================== EVM (sync) =====================
+def get_web3(rpc_url: str) -> Web3:
+    """
+    Ambil instance Web3 dari pool berdasarkan RPC URL.
+    Satu session keep-alive per RPC URL, dipakai ulang lintas request.
+    """
+
+    def factory():
+        session = _new_session()
+        w3 = Web3(
+            Web3.HTTPProvider(
+                rpc_url,
+                request_kwargs={"timeout": RPC_TIMEOUT},
+                session=session,
+                # hanya eth_chainId yang di-cache per provider → tidak diulang tiap request;
+                # default web3 ikut cache getTransactionByHash/getBlockByNumber plus
+                # call validasi tambahan (chainId + block finalized) tiap response
+                cache_allowed_requests=True,
+                cacheable_requests={"eth_chainId"},
+            )
+        )
+        return {"client": w3, "close": session.close}
+
+    return _get_or_create("sync", rpc_url, factory)
+
+
+# ===================== EVM (async) =====================
+def get_async_web3(rpc_url: str) -> AsyncWeb3:
+    """
+    Ambil instance AsyncWeb3 dari pool berdasarkan RPC URL.
+    Harus dipanggil dari dalam event loop (session aiohttp terikat ke loop).
+    """
+
+    def factory():
+        w3 = AsyncWeb3(
+            AsyncHTTPProvider(
+                rpc_url,
+                request_kwargs={"timeout": aiohttp.ClientTimeout(total=RPC_TIMEOUT)},
+                cache_allowed_requests=True,
+                cacheable_requests={"eth_chainId"},
+            )
+        )
+        return {"client": w3, "aclose": w3.provider.disconnect}
+
+    return _get_or_create("async", rpc_url, factory)
+
+
+# ===================== SOLANA =====================
+def get_solana_client(rpc_url: str) -> SolanaClient:
+    """
+    Ambil solana AsyncClient dari pool berdasarkan RPC URL.
+    Koneksi HTTP (httpx) dipakai ulang, jangan di-close oleh pemanggil.
+    """
+
+    def factory():
+        client = SolanaClient(rpc_url, timeout=RPC_TIMEOUT)
+        return {"client": client, "aclose": client.close}
+
+    return _get_or_create("solana", rpc_url, factory)
+
+
+# ===================== TRON =====================
+class _LimitedTronProvider(TronHTTPProvider):
+    """Provider TronGrid yang antre di token bucket sebelum tiap request"""
+
+    async def make_request(self, method: str, params=None) -> dict:
+        await acquire("trongrid")
+        return await super().make_request(method, params)
+
+
+def _is_trusted_tron_url(rpc_url: str) -> bool:
+    """Endpoint yang boleh menerima TRONGRID_API_KEY: TRON_RPC_URL atau host *.trongrid.io"""
+    if rpc_url.rstrip("/") == TRON_RPC_URL.rstrip("/"):
+        return True
+    parsed = urlparse(rpc_url)
+    host = (parsed.hostname or "").lower()
+    return parsed.scheme == "https" and (
+        host == "trongrid.io" or host.endswith(".trongrid.io")
+    )
+
+
+def get_tron_client(rpc_url: str = None, api_key: str = None) -> AsyncTron:
+    """
+    Ambil AsyncTron dari pool berdasarkan endpoint + API key.
+    Default endpoint dari env TRON_RPC_URL, API key dari env TRONGRID_API_KEY.
+    API key env hanya dikirim ke endpoint tepercaya; rpc_url dari user tidak
+    pernah menerima key server.
+    """
+    rpc_url = rpc_url or TRON_RPC_URL
+    if not api_key and _is_trusted_tron_url(rpc_url):
+        api_key = TRONGRID_API_KEY
+    # API key ikut jadi key pool (endpoint sama, key beda → client beda),
+    # disimpan sebagai fragment supaya tetap tersembunyi oleh mask_url
+    key = (
+        f"{rpc_url}#{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
+        if api_key
+        else rpc_url
+    )
+
+    def factory():
+        # TronGrid punya kuota → throttle di sisi kita, jangan tunggu 429
+        provider_cls = (
+            _LimitedTronProvider if "trongrid" in rpc_url.lower() else TronHTTPProvider
+        )
+        client = AsyncTron(provider_cls(rpc_url, timeout=RPC_TIMEOUT, api_key=api_key))
+        return {"client": client, "aclose": client.close}
+
+    return _get_or_create("tron", key, factory)
+
+
+# ===================== STATS & SHUTDOWN =====================
+def pool_stats() -> dict:
+    """Statistik pool provider RPC (untuk monitoring)"""
+    now = time.time()
+    with _lock:
+        return {
+            "size": sum(len(pool) for pool in _pools.values()),
+            "max_size": RPC_POOL_MAX_SIZE,
+            "idle_ttl": RPC_POOL_IDLE_TTL,
+            "retiring": sum(len(retired) for retired in _retired.values()),
+            **_stats,
+            "providers": [
+                {
+                    "rpc_url": mask_url(rpc_url),
+                    "kind": kind,
+                    "hits": entry["hits"],
+                    "age": round(now - entry["created_at"], 1),
+                    "idle": round(now - entry["last_used"], 1),
+                }
+                for kind, pool in _pools.items()
+                for rpc_url, entry in pool.items()
+            ],
+        }
+
+
+async def close_pool():
+    """Tutup semua session RPC (sync & async) saat shutdown"""
+    with _lock:
+        entries = [
+            (rpc_url, entry)
+            for pool in _pools.values()
+            for rpc_url, entry in pool.items()
+        ] + [
+            (rpc_url, entry)
+            for retired in _retired.values()
+            for _, rpc_url, entry, _ in retired
+        ]
+        for pool in _pools.values():
+            pool.clear()
+        for retired in _retired.values():
+            retired.clear()
+
+    for rpc_url, entry in entries:
+        try:
+            if "close" in entry:
+                entry["close"]()
+            else:
+                await entry["aclose"]()
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal tutup session RPC {mask_url(rpc_url)}: {e}")
@@ -0,0 +1,448 @@
+# 📍 lib/rpc_router.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from lib.circuit_breaker import (
+    CircuitOpenError,
+    before_call,
+    host_of,
+    is_open,
+    is_upstream_failure,
+    record_failure,
+    record_success,
+    release,
+)
+from lib.rate_limiter import RateLimitExceeded
+from lib.rpc_pool import (
+    TRON_RPC_URL,
+    get_async_web3,
+    get_solana_client,
+    get_tron_client,
+    mask_url,
+)
+
+logger = logging.getLogger(__name__)
+
+# ======= Config router =======
+RPC_ROUTER_EWMA_ALPHA = float(os.getenv("RPC_ROUTER_EWMA_ALPHA", "0.3"))
+# error rate 1.0 ≈ endpoint dianggap lebih lambat sebesar nilai ini (ms)
+RPC_ROUTER_ERROR_PENALTY_MS = float(os.getenv("RPC_ROUTER_ERROR_PENALTY_MS", "1000"))
+RPC_ROUTER_EJECT_AFTER = int(os.getenv("RPC_ROUTER_EJECT_AFTER", "3"))  # gagal beruntun
+RPC_ROUTER_PROBE_INTERVAL = float(os.getenv("RPC_ROUTER_PROBE_INTERVAL", "15"))  # detik
+RPC_ROUTER_MAX_ENDPOINTS = int(os.getenv("RPC_ROUTER_MAX_ENDPOINTS", "256"))
+RPC_ROUTER_LATENCY_SAMPLES = int(os.getenv("RPC_ROUTER_LATENCY_SAMPLES", "100"))
+
+# ======= Config hedging (read idempotent) =======
+RPC_HEDGE_ENABLED = os.getenv("RPC_HEDGE_ENABLED", "false").lower() in ("1", "true")
+RPC_HEDGE_PERCENTILE = float(os.getenv("RPC_HEDGE_PERCENTILE", "95"))
+RPC_HEDGE_MIN_SAMPLES = int(os.getenv("RPC_HEDGE_MIN_SAMPLES", "10"))
+RPC_HEDGE_DEFAULT_DELAY_MS = float(os.getenv("RPC_HEDGE_DEFAULT_DELAY_MS", "250"))
+RPC_HEDGE_MIN_DELAY_MS = float(os.getenv("RPC_HEDGE_MIN_DELAY_MS", "20"))
+RPC_HEDGE_MAX_DELAY_MS = float(os.getenv("RPC_HEDGE_MAX_DELAY_MS", "2000"))
+
+# chain → jenis client (untuk probe)
+CHAIN_KIND = {
+    "eth": "evm",
+    "bnb": "evm",
+    "polygon": "evm",
+    "base": "evm",
+    "sol": "sol",
+    "trx": "trx",
+}
+CHAIN_ALIAS = {"bsc": "bnb"}
+# fallback terakhir kalau rpc_url & env RPC_URLS_<CHAIN> kosong
+DEFAULT_URLS = {"trx": TRON_RPC_URL}
+
+# ======= State per endpoint =======
+_lock = threading.Lock()
+# {rpc_url: {"chain", "ewma_ms", "error_rate", "calls", "failures",
+#            "consecutive_failures", "ejected_at", "samples"}}
+_endpoints = OrderedDict()
+_probe_task = None
+_hedge_stats = {"requests": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0}
+
+
+def _normalize_chain(chain: str) -> str:
+    chain = (chain or "").lower()
+    return CHAIN_ALIAS.get(chain, chain)
+
+
+def resolve_urls(chain: str, rpc_url: str = None) -> list:
+    """
+    Daftar RPC URL untuk chain.
+    `rpc_url` boleh berisi beberapa URL dipisah koma; kalau kosong pakai
+    config server dari env RPC_URLS_<CHAIN> (misal RPC_URLS_ETH).
+    """
+    chain = _normalize_chain(chain)
+    raw = (
+        rpc_url or os.getenv(f"RPC_URLS_{chain.upper()}") or DEFAULT_URLS.get(chain, "")
+    )
+    urls = list(dict.fromkeys(u.strip() for u in raw.split(",") if u.strip()))
+    if not urls:
+        raise ValueError(
+            f"❌ RPC URL harus diberikan (parameter rpc_url atau env RPC_URLS_{chain.upper()})!"
+        )
+    if len(urls) > RPC_ROUTER_MAX_ENDPOINTS:
+        # kalau didaftarkan semua, URL caller sendiri ikut terbuang dari registry
+        raise ValueError(
+            f"❌ Maksimal {RPC_ROUTER_MAX_ENDPOINTS} RPC URL per request, diberikan {len(urls)}"
+        )
+
+    with _lock:
+        for url in urls:
+            if url in _endpoints:
+                _endpoints.move_to_end(url)
+                continue
+            _endpoints[url] = {
+                "chain": chain,
+                "ewma_ms": None,
+                "error_rate": 0.0,
+                "calls": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "ejected_at": None,
+                "samples": deque(maxlen=RPC_ROUTER_LATENCY_SAMPLES),
+            }
+        # rpc_url datang dari user → batasi jumlah endpoint yang dilacak
+        while len(_endpoints) > RPC_ROUTER_MAX_ENDPOINTS:
+            _endpoints.popitem(last=False)
+    return urls
+
+
+def _score(state: dict) -> float:
+    # endpoint baru (belum ada sample) dapat skor 0 → dicoba dulu
+    latency = state["ewma_ms"] or 0.0
+    return latency + RPC_ROUTER_ERROR_PENALTY_MS * state["error_rate"]
+
+
+def _rank_key(url: str) -> tuple:
+    state = _endpoints.get(url)
+    # URL bisa sudah terbuang dari registry oleh request lain → anggap endpoint baru
+    if state is None:
+        return (is_open(host_of(url)), 0.0)
+    return (state["ejected_at"] is not None or is_open(host_of(url)), _score(state))
+
+
+def rank_urls(chain: str, rpc_url: str = None) -> list:
+    """Urutkan endpoint dari skor terbaik; endpoint yang di-eject ditaruh paling akhir"""
+    urls = resolve_urls(chain, rpc_url)
+    with _lock:
+        return sorted(urls, key=_rank_key)
+
+
+def pick_url(chain: str, rpc_url: str = None) -> str:
+    """Endpoint terbaik saat ini (untuk alur yang harus tetap di satu node, misal kirim tx)"""
+    return rank_urls(chain, rpc_url)[0]
+
+
+def record(rpc_url: str, latency_ms: float, ok: bool):
+    """Update EWMA latency & error rate endpoint, eject kalau gagal beruntun"""
+    with _lock:
+        state = _endpoints.get(rpc_url)
+        if state is None:
+            return
+        alpha = RPC_ROUTER_EWMA_ALPHA
+        state["calls"] += 1
+        state["error_rate"] = (1 - alpha) * state["error_rate"] + alpha * (
+            0 if ok else 1
+        )
+        if ok:
+            state["ewma_ms"] = (
+                latency_ms
+                if state["ewma_ms"] is None
+                else (1 - alpha) * state["ewma_ms"] + alpha * latency_ms
+            )
+            state["samples"].append(latency_ms)
+            state["consecutive_failures"] = 0
+            if state["ejected_at"] is not None:
+                state["ejected_at"] = None
+                logger.info(f"✅ RPC {mask_url(rpc_url)} kembali aktif")
+            return
+
+        state["failures"] += 1
+        state["consecutive_failures"] += 1
+        if (
+            state["ejected_at"] is None
+            and state["consecutive_failures"] >= RPC_ROUTER_EJECT_AFTER
+        ):
+            state["ejected_at"] = time.time()
+            logger.warning(
+                f"🚫 RPC {mask_url(rpc_url)} di-eject setelah "
+                f"{state['consecutive_failures']} kali gagal beruntun"
+            )
+
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(round(pct / 100 * (len(ordered) - 1)))]
+
+
+def hedge_delay(rpc_url: str) -> float:
+    """
+    Delay (ms) sebelum call di-hedge ke endpoint kedua: persentil
+    RPC_HEDGE_PERCENTILE dari latency terakhir endpoint primary.
+    """
+    with _lock:
+        state = _endpoints.get(rpc_url)
+        samples = list(state["samples"]) if state else []
+    if len(samples) < RPC_HEDGE_MIN_SAMPLES:
+        return RPC_HEDGE_DEFAULT_DELAY_MS
+    delay = _percentile(samples, RPC_HEDGE_PERCENTILE)
+    return min(max(delay, RPC_HEDGE_MIN_DELAY_MS), RPC_HEDGE_MAX_DELAY_MS)
+
+
+def _count(name: str):
+    with _lock:
+        _hedge_stats[name] += 1
+
+
+# ===================== CALL (async & sync) =====================
+def _finish(url: str, start: float, ok: bool):
+    record(url, (time.perf_counter() - start) * 1000, ok=ok)
+    if ok:
+        record_success(host_of(url))
+    else:
+        record_failure(host_of(url))
+
+
+def _is_node_failure(exc: Exception, expected_errors: tuple) -> bool:
+    # hanya transport/timeout/5xx/429 yang salah node; AddressNotFound, revert,
+    # alamat tidak valid dst adalah jawaban node (sama seperti expected_errors)
+    return not isinstance(exc, expected_errors) and is_upstream_failure(exc)
+
+
+def _is_answer(exc: Exception, expected_errors: tuple) -> bool:
+    """Node sudah menjawab (expected / error aplikasi) → lempar tanpa failover"""
+    if isinstance(exc, (CircuitOpenError, RateLimitExceeded)):
+        # ditolak di sisi kita, node belum disentuh → coba endpoint lain
+        return False
+    return not _is_node_failure(exc, expected_errors)
+
+
+def _finish_error(url: str, start: float, exc: Exception, expected_errors: tuple):
+    if _is_node_failure(exc, expected_errors):
+        _finish(url, start, ok=False)
+        logger.warning(f"⚠️ RPC {mask_url(url)} gagal: {exc}")
+    else:
+        _finish(url, start, ok=True)
+
+
+async def _attempt(url: str, fn, expected_errors: tuple):
+    """
+    Satu call ke satu endpoint + catat latency/error-nya.
+    Circuit host open → CircuitOpenError langsung, tanpa menyentuh jaringan.
+    """
+    before_call(host_of(url))
+    start = time.perf_counter()
+    try:
+        result = await fn(url)
+    except (asyncio.CancelledError, RateLimitExceeded):
+        # kalah hedge / dibatalkan / ditolak limiter kita → bukan kesalahan node
+        release(host_of(url))
+        raise
+    except Exception as e:
+        _finish_error(url, start, e, expected_errors)
+        raise
+    _finish(url, start, ok=True)
+    return result
+
+
+def _attempt_sync(url: str, fn, expected_errors: tuple):
+    """Versi blocking dari `_attempt`"""
+    before_call(host_of(url))
+    start = time.perf_counter()
+    try:
+        result = fn(url)
+    except RateLimitExceeded:
+        release(host_of(url))
+        raise
+    except Exception as e:
+        _finish_error(url, start, e, expected_errors)
+        raise
+    _finish(url, start, ok=True)
+    return result
+
+
+def _answered(task: asyncio.Task, expected_errors: tuple) -> bool:
+    # jawaban valid = sukses, expected error (misal tx belum ada) atau error aplikasi
+    exc = task.exception()
+    return exc is None or _is_answer(exc, expected_errors)
+
+
+async def _hedged(urls: list, fn, expected_errors: tuple):
+    """
+    Kirim ke primary; kalau belum jawab dalam hedge_delay (atau gagal),
+    kirim call yang sama ke endpoint kedua. Jawaban pertama menang,
+    call yang kalah di-cancel.
+    """
+    _count("requests")
+    primary = asyncio.ensure_future(_attempt(urls[0], fn, expected_errors))
+    tasks = [primary]
+    last_error = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay(urls[0]) / 1000)
+        if done and _answered(primary, expected_errors):
+            _count("primary_wins")
+            return primary.result()
+        if done:
+            last_error = primary.exception()
+
+        _count("hedged")
+        logger.info(f"🪂 Hedge call RPC {mask_url(urls[0])} → {mask_url(urls[1])}")
+        tasks.append(asyncio.ensure_future(_attempt(urls[1], fn, expected_errors)))
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if _answered(task, expected_errors):
+                    _count("primary_wins" if task is primary else "hedge_wins")
+                    return task.result()
+                last_error = task.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    # primary & hedge sama-sama gagal → failover ke sisa endpoint
+    for url in urls[2:]:
+        try:
+            return await _attempt(url, fn, expected_errors)
+        except Exception as e:
+            if _is_answer(e, expected_errors):
+                raise
+            last_error = e
+    raise last_error
+
+
+async def route(
+    chain: str, rpc_url: str, fn, expected_errors: tuple = (), hedge: bool = False
+):
+    """
+    Jalankan `await fn(url)` di endpoint terbaik, failover ke endpoint berikutnya
+    kalau node gagal (transport/timeout/5xx/429). Exception di `expected_errors`
+    (misal TransactionNotFound) dan error aplikasi lain (AddressNotFound, revert)
+    bukan kesalahan node → langsung dilempar tanpa failover.
+    `hedge=True` hanya untuk read idempotent; aktif kalau RPC_HEDGE_ENABLED.
+    """
+    urls = rank_urls(chain, rpc_url)
+    if hedge and RPC_HEDGE_ENABLED and len(urls) > 1:
+        return await _hedged(urls, fn, expected_errors)
+
+    last_error = None
+    for url in urls:
+        try:
+            return await _attempt(url, fn, expected_errors)
+        except Exception as e:
+            if _is_answer(e, expected_errors):
+                raise
+            last_error = e
+    raise last_error
+
+
+def route_sync(chain: str, rpc_url: str, fn, expected_errors: tuple = ()):
+    """Versi blocking dari `route` (untuk helper web3 sync)"""
+    last_error = None
+    for url in rank_urls(chain, rpc_url):
+        try:
+            return _attempt_sync(url, fn, expected_errors)
+        except Exception as e:
+            if _is_answer(e, expected_errors):
+                raise
+            last_error = e
+    raise last_error
+
+
+# ===================== PROBE BACKGROUND =====================
+async def _probe(rpc_url: str, chain: str):
+    kind = CHAIN_KIND.get(chain, "evm")
+    if kind == "sol":
+        await get_solana_client(rpc_url).get_slot()
+    elif kind == "trx":
+        await get_tron_client(rpc_url).get_latest_block_number()
+    else:
+        await get_async_web3(rpc_url).eth.block_number
+
+
+async def _probe_loop():
+    """Cek ulang endpoint yang di-eject secara berkala"""
+    while True:
+        await asyncio.sleep(RPC_ROUTER_PROBE_INTERVAL)
+        with _lock:
+            ejected = [
+                (url, state["chain"])
+                for url, state in _endpoints.items()
+                if state["ejected_at"] is not None
+            ]
+        for url, chain in ejected:
+            start = time.perf_counter()
+            try:
+                await _probe(url, chain)
+                record(url, (time.perf_counter() - start) * 1000, ok=True)
+                record_success(host_of(url))
+            except Exception as e:
+                logger.info(f"🔁 Probe RPC {mask_url(url)} masih gagal: {e}")
+
+
+def start_probe():
+    """Mulai task probe (dipanggil dari lifespan app)"""
+    global _probe_task
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.get_running_loop().create_task(_probe_loop())
+
+
+async def stop_probe():
+    global _probe_task
+    if _probe_task is not None:
+        _probe_task.cancel()
+        try:
+            await _probe_task
+        except asyncio.CancelledError:
+            pass
+        _probe_task = None
+
+
+# ===================== STATS =====================
+def router_stats() -> dict:
+    """Skor & status tiap endpoint RPC (untuk monitoring)"""
+    now = time.time()
+    with _lock:
+        return {
+            "hedge": {
+                "enabled": RPC_HEDGE_ENABLED,
+                "percentile": RPC_HEDGE_PERCENTILE,
+                **_hedge_stats,
+            },
+            "endpoints": [
+                {
+                    "rpc_url": mask_url(url),
+                    "chain": state["chain"],
+                    "ewma_ms": (
+                        round(state["ewma_ms"], 1)
+                        if state["ewma_ms"] is not None
+                        else None
+                    ),
+                    "error_rate": round(state["error_rate"], 3),
+                    "score": round(_score(state), 1),
+                    "p95_ms": (
+                        round(_percentile(state["samples"], 95), 1)
+                        if state["samples"]
+                        else None
+                    ),
+                    "calls": state["calls"],
+                    "failures": state["failures"],
+                    "ejected": state["ejected_at"] is not None,
+                    "ejected_for": (
+                        round(now - state["ejected_at"], 1)
+                        if state["ejected_at"] is not None
+                        else None
+                    ),
+                }
+                for url, state in _endpoints.items()
+            ],
+        }
@@ -0,0 +1,201 @@
+# 📍 lib/shared_cache.py
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import ujson as json
+
+logger = logging.getLogger(__name__)
+
+# ======= Config cache bersama antar worker =======
+# folder file segment (sebaiknya tmpfs, mis. /dev/shm/multichain-api); kosong = nonaktif
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")
+SHARED_CACHE_SIZE = int(os.getenv("SHARED_CACHE_SIZE", str(256 * 1024)))  # byte/segment
+SHARED_CACHE_READ_RETRIES = 100
+
+# ======= Layout segment =======
+# [seq u64][fetched_at f64][panjang u32][payload JSON]
+# seqlock: seq ganjil = sedang ditulis; reader mengulang kalau seq ganjil / berubah
+_SEQ = struct.Struct("<Q")
+_META = struct.Struct("<dI")
+_HEADER_SIZE = _SEQ.size + _META.size
+
+# ======= State =======
+_lock = threading.Lock()  # buka segment & tulis (flock tidak mengunci antar thread)
+# {name: {"mm", "lock_fd", "leader", "reads", "retries", "writes"}}
+_segments = {}
+
+
+def enabled() -> bool:
+    return bool(SHARED_CACHE_DIR)
+
+
+def _segment(name: str) -> dict:
+    """Buka (atau buat) segment `name` dan map ke memory, sekali per proses"""
+    seg = _segments.get(name)
+    if seg is not None:
+        return seg
+    with _lock:
+        seg = _segments.get(name)
+        if seg is not None:
+            return seg
+        os.makedirs(SHARED_CACHE_DIR, exist_ok=True)
+        path = os.path.join(SHARED_CACHE_DIR, f"{name}.bin")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < SHARED_CACHE_SIZE:
+                os.ftruncate(fd, SHARED_CACHE_SIZE)
+            mm = mmap.mmap(fd, SHARED_CACHE_SIZE)
+        finally:
+            os.close(fd)
+        lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        seg = {
+            "mm": mm,
+            "lock_fd": lock_fd,
+            "leader": False,
+            "reads": 0,
+            "retries": 0,
+            "writes": 0,
+        }
+        _segments[name] = seg
+        logger.info(
+            f"🧷 Segment cache bersama {path} dibuka ({SHARED_CACHE_SIZE} byte)"
+        )
+        return seg
+
+
+# ===================== LEADER =====================
+def try_lead(name: str) -> bool:
+    """
+    Pemilihan writer tunggal: worker yang dapat flock file lock segment jadi
+    leader sampai prosesnya mati (kernel melepas lock → worker lain mengambil alih).
+    """
+    seg = _segment(name)
+    if seg["leader"]:
+        return True
+    try:
+        fcntl.flock(seg["lock_fd"], fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    seg["leader"] = True
+    logger.info(f"👑 Worker {os.getpid()} jadi leader segment {name}")
+    return True
+
+
+def is_leader(name: str) -> bool:
+    seg = _segments.get(name)
+    return seg is not None and seg["leader"]
+
+
+# ===================== TULIS & BACA =====================
+def _write(seg: dict, fetched_at: float, payload: bytes):
+    mm = seg["mm"]
+    if _HEADER_SIZE + len(payload) > len(mm):
+        raise ValueError(
+            f"Payload {len(payload)} byte melebihi SHARED_CACHE_SIZE ({len(mm)} byte)"
+        )
+    seq = _SEQ.unpack_from(mm)[0]
+    # seq ganjil sisa writer yang mati di tengah jalan → langsung dipakai lagi
+    odd = seq if seq & 1 else seq + 1
+    _SEQ.pack_into(mm, 0, odd)
+    mm[_HEADER_SIZE : _HEADER_SIZE + len(payload)] = payload
+    _META.pack_into(mm, _SEQ.size, fetched_at, len(payload))
+    _SEQ.pack_into(mm, 0, odd + 1)
+    seg["writes"] += 1
+
+
+def _read_payload(seg: dict, since: int = 0):
+    """Seqlock read tanpa lock: (seq, fetched_at, payload) atau None kalau tidak berubah"""
+    mm = seg["mm"]
+    for _ in range(SHARED_CACHE_READ_RETRIES):
+        seq = _SEQ.unpack_from(mm)[0]
+        if seq == since or seq == 0:
+            return None
+        if seq & 1:
+            seg["retries"] += 1
+            time.sleep(0)
+            continue
+        fetched_at, length = _META.unpack_from(mm, _SEQ.size)
+        payload = mm[_HEADER_SIZE : _HEADER_SIZE + min(length, len(mm) - _HEADER_SIZE)]
+        if _SEQ.unpack_from(mm)[0] != seq:
+            seg["retries"] += 1
+            continue
+        seg["reads"] += 1
+        return seq, fetched_at, payload
+    logger.warning("⚠️ Segment cache bersama terus berubah saat dibaca, dilewati")
+    return None
+
+
+def publish(name: str, fetched_at: float, data):
+    """Tulis `data` ke segment; writer selain leader antre di flock per tulisan"""
+    seg = _segment(name)
+    payload = json.dumps(data).encode()
+    with _lock:
+        if seg["leader"]:
+            _write(seg, fetched_at, payload)
+            return
+        fcntl.flock(seg["lock_fd"], fcntl.LOCK_EX)
+        try:
+            _write(seg, fetched_at, payload)
+        finally:
+            fcntl.flock(seg["lock_fd"], fcntl.LOCK_UN)
+
+
+def update(name: str, fn):
+    """Read-modify-write: `fn(data lama atau None) -> data baru`, di bawah lock writer"""
+    seg = _segment(name)
+    with _lock:
+        if not seg["leader"]:
+            fcntl.flock(seg["lock_fd"], fcntl.LOCK_EX)
+        try:
+            # writer lain tidak bisa jalan → payload pasti konsisten
+            current = _read_payload(seg)
+            data = fn(json.loads(current[2]) if current else None)
+            _write(seg, time.time(), json.dumps(data).encode())
+        finally:
+            if not seg["leader"]:
+                fcntl.flock(seg["lock_fd"], fcntl.LOCK_UN)
+
+
+def read(name: str, since: int = 0):
+    """
+    (seq, fetched_at, data) terbaru dari segment, None kalau kosong atau seq masih
+    sama dengan `since` (cek murah tanpa parse JSON).
+    """
+    shared = _read_payload(_segment(name), since)
+    if shared is None:
+        return None
+    seq, fetched_at, payload = shared
+    return seq, fetched_at, json.loads(payload)
+
+
+# ===================== STATS & SHUTDOWN =====================
+def shared_stats() -> dict:
+    """Status segment bersama di worker ini (untuk monitoring)"""
+    return {
+        "enabled": enabled(),
+        "pid": os.getpid(),
+        "segments": {
+            name: {
+                "leader": seg["leader"],
+                "seq": _SEQ.unpack_from(seg["mm"])[0],
+                "reads": seg["reads"],
+                "retries": seg["retries"],
+                "writes": seg["writes"],
+            }
+            for name, seg in _segments.items()
+        },
+    }
+
+
+def close_segments():
+    """Lepas leadership & unmap segment saat shutdown (worker lain bisa ambil alih)"""
+    with _lock:
+        for seg in _segments.values():
+            os.close(seg["lock_fd"])
+            seg["mm"].close()
+        _segments.clear()
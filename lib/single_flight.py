@@ -0,0 +1,58 @@
+# 📍 lib/single_flight.py
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ======= State =======
+# {key: asyncio.Task} → fetch yang sedang jalan per key
+_inflight = {}
+# {grup: {"calls", "leaders", "coalesced"}}, grup = elemen pertama key
+_stats = {}
+
+
+def _group(key) -> str:
+    return str(key[0] if isinstance(key, tuple) else key)
+
+
+def _done(key, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # tandai exception sudah dibaca → tidak ada warning kalau semua caller sudah batal
+    if not task.cancelled():
+        task.exception()
+
+
+def join(key, fn) -> asyncio.Task:
+    """
+    Task fetch untuk `key`: kalau sudah ada yang jalan, ikut menunggu task itu
+    (coalesced); kalau belum, `fn()` dijalankan sebagai task baru (leader).
+    """
+    stats = _stats.setdefault(_group(key), {"calls": 0, "leaders": 0, "coalesced": 0})
+    stats["calls"] += 1
+    task = _inflight.get(key)
+    if task is not None and not task.done():
+        stats["coalesced"] += 1
+        return task
+    stats["leaders"] += 1
+    task = asyncio.get_running_loop().create_task(fn())
+    _inflight[key] = task
+    task.add_done_callback(lambda t: _done(key, t))
+    return task
+
+
+async def do(key, fn):
+    """
+    Single-flight: semua caller yang miss bersamaan untuk `key` menunggu satu fetch.
+    shield → caller yang batal (timeout / client putus) tidak membatalkan fetch bersama.
+    """
+    return await asyncio.shield(join(key, fn))
+
+
+# ===================== STATS =====================
+def flight_stats() -> dict:
+    """Jumlah call, fetch asli (leader) & request yang digabung per grup"""
+    return {
+        group: {**stats, "inflight": sum(_group(k) == group for k in _inflight)}
+        for group, stats in _stats.items()
+    }
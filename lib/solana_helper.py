@@ -5,8 +5,9 @@ from solders.pubkey import Pubkey
 from solders.keypair import Keypair
 from solders.transaction import Transaction
 from solders.system_program import transfer, TransferParams
-from solana.rpc.api import Client
 from solana.rpc.types import TxOpts  # ✅ perbaikan
+from lib.rpc_pool import get_solana_client
+from lib.rpc_router import pick_url
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ def create_admin_keypair(private_key: str):
         )
 
 
-def send_sol(
+async def send_sol(
     destination_wallet: str, amount: float, rpc_url: str, private_key: str
 ):
     """Kirim SOL ke wallet tujuan, RPC & private key dikirim dari endpoint"""
@@ -37,7 +38,7 @@ def send_sol(
         if not private_key:
             raise ValueError("❌ Private key harus diberikan!")
 
-        client = Client(rpc_url)
+        client = get_solana_client(pick_url("sol", rpc_url))
         admin_keypair = create_admin_keypair(private_key)
 
         if destination_wallet == str(admin_keypair.pubkey()):
@@ -51,7 +52,7 @@ def send_sol(
             f"🚀 Kirim {amount} SOL ({lamports} lamports) ke {destination_wallet}"
         )
 
-        blockhash_resp = client.get_latest_blockhash()
+        blockhash_resp = await client.get_latest_blockhash()
         recent_blockhash = blockhash_resp.value.blockhash
 
         tx_instruction = transfer(
@@ -70,7 +71,7 @@ def send_sol(
         )
 
         raw_txn = bytes(txn)
-        resp = client.send_raw_transaction(
+        resp = await client.send_raw_transaction(
             raw_txn,
             opts=TxOpts(skip_preflight=False, preflight_commitment="confirmed"),
         )
@@ -84,7 +85,7 @@ def send_sol(
         return None
 
 
-def get_balance(address: str, rpc_url: str):
+async def get_balance(address: str, rpc_url: str):
     """Cek saldo SOL dari address tertentu, RPC dikirim dari endpoint"""
     try:
         if not rpc_url:
@@ -92,8 +93,8 @@ def get_balance(address: str, rpc_url: str):
         if not address:
             raise ValueError("❌ Address harus diberikan!")
 
-        client = Client(rpc_url)
-        resp = client.get_balance(Pubkey.from_string(address))
+        client = get_solana_client(pick_url("sol", rpc_url))
+        resp = await client.get_balance(Pubkey.from_string(address))
         lamports = (
             getattr(resp.value, "value", None)
             if hasattr(resp.value, "value")
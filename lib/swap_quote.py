@@ -0,0 +1,100 @@
+# 📍 lib/swap_quote.py
+import logging
+import time
+
+import numpy as np
+
+from lib.price_service import COINGECKO_IDS, ensure_prices, on_refresh
+
+logger = logging.getLogger(__name__)
+
+# ======= Config quote swap =======
+SWAP_FEE = 0.01  # fee simulasi 1%
+
+# ======= Matriks konversi =======
+# index per symbol (alias seperti base/eth tetap baris sendiri, harganya sama)
+_SYMBOLS = list(COINGECKO_IDS)
+_INDEX = {symbol: i for i, symbol in enumerate(_SYMBOLS)}
+_COINS = [COINGECKO_IDS[s] for s in _SYMBOLS]
+# usd[i] = harga USD symbol i; matrix[i, j] = jumlah token j untuk 1 token i (NaN = tidak ada harga)
+_state = {
+    "usd": np.full(len(_SYMBOLS), np.nan),
+    "matrix": np.full((len(_SYMBOLS), len(_SYMBOLS)), np.nan),
+    "fetched_at": 0.0,
+    "rebuilds": 0,
+}
+
+
+def _rebuild(fetched_at: float, prices: dict):
+    """Listener price service: hitung ulang semua pasangan dengan satu pembagian outer"""
+    usd = np.array(
+        [prices.get(coin, {}).get("usd") or np.nan for coin in _COINS], dtype=float
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = np.divide.outer(usd, usd)
+    # diganti sekaligus → quote tidak pernah melihat matriks setengah jadi
+    _state.update(usd=usd, matrix=matrix, fetched_at=fetched_at)
+    _state["rebuilds"] += 1
+
+
+on_refresh(_rebuild)
+
+
+def _index(symbols: list) -> np.ndarray:
+    """Index matriks tiap symbol; ValueError kalau ada yang belum support"""
+    unknown = sorted({s for s in symbols if s.lower() not in _INDEX})
+    if unknown:
+        raise ValueError(f"Token {', '.join(unknown)} is not supported")
+    return np.array([_INDEX[s.lower()] for s in symbols], dtype=np.int64)
+
+
+def _value(x: float) -> float | None:
+    return None if np.isnan(x) else float(x)
+
+
+# ===================== QUOTE =====================
+async def quote_many(from_tokens: list, to_tokens: list, amounts: list) -> dict:
+    """
+    Quote banyak swap sekaligus dari matriks (tanpa request ke CoinGecko kalau
+    harga sudah ada di memory). swapped_amount None kalau harga salah satu token
+    tidak tersedia.
+    """
+    src = _index(from_tokens)
+    dst = _index(to_tokens)
+    stale = await ensure_prices()
+    usd, matrix = _state["usd"], _state["matrix"]
+    swapped = np.asarray(amounts, dtype=float) * matrix[src, dst] * (1 - SWAP_FEE)
+    return {
+        "fetched_at": _state["fetched_at"],
+        "stale": stale,
+        "quotes": [
+            {
+                "from_token": f,
+                "to_token": t,
+                "amount": a,
+                "swapped_amount": _value(np.round(s, 6)),
+                "price_from_usd": _value(usd[i]),
+                "price_to_usd": _value(usd[j]),
+            }
+            for f, t, a, s, i, j in zip(
+                from_tokens, to_tokens, amounts, swapped, src, dst
+            )
+        ],
+    }
+
+
+async def quote(from_token: str, to_token: str, amount: float) -> dict:
+    """Quote satu swap (lookup satu sel matriks)"""
+    result = await quote_many([from_token], [to_token], [amount])
+    return {**result["quotes"][0], "stale": result["stale"]}
+
+
+def quote_stats() -> dict:
+    """Status matriks quote (untuk monitoring)"""
+    fetched_at = _state["fetched_at"]
+    return {
+        "tokens": len(_SYMBOLS),
+        "priced": int(np.count_nonzero(~np.isnan(_state["usd"]))),
+        "rebuilds": _state["rebuilds"],
+        "age": round(time.time() - fetched_at, 1) if fetched_at else None,
+    }
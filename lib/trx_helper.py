@@ -1,15 +1,15 @@
 # 📍 lib/trx_helper.py
 import logging
-from tronpy import Tron
 from tronpy.keys import PrivateKey
-from tronpy.providers import HTTPProvider
+from lib.rpc_pool import get_tron_client
+from lib.rpc_router import pick_url
 
 logger = logging.getLogger(__name__)
 
 
 async def send_trx(
     destination_wallet: str,
-    amount_trx: float,
+    amount: float,
     rpc_url: str = None,  # 🔹 endpoint kirim rpc_url
     private_key: str = None,  # 🔹 endpoint kirim private_key
 ) -> str:
@@ -23,7 +23,7 @@ async def send_trx(
         raise ValueError("❌ private key harus diberikan!")
 
     try:
-        client = Tron(HTTPProvider(rpc_url))
+        client = get_tron_client(pick_url("trx", rpc_url))
 
         # Load admin key
         admin_key = PrivateKey(bytes.fromhex(private_key.replace("0x", "")))
@@ -36,24 +36,24 @@ async def send_trx(
             )
 
         # Cek saldo
-        balance = client.get_account_balance(admin_address)
+        balance = await client.get_account_balance(admin_address)
         logger.info(
             f"💰 Saldo admin TRX: {balance} TRX | Admin address: {admin_address}"
         )
-        if balance < amount_trx:
+        if balance < amount:
             raise Exception("❌ Saldo TRX admin tidak cukup!")
 
-        logger.info(f"🚀 Kirim TRX ke {destination_wallet} | amount={amount_trx}")
+        logger.info(f"🚀 Kirim TRX ke {destination_wallet} | amount={amount}")
 
-        amount_sun = int(amount_trx * 1_000_000)  # 1 TRX = 1_000_000 SUN
+        amount_sun = int(amount * 1_000_000)  # 1 TRX = 1_000_000 SUN
 
         # Build, sign & broadcast transaction
-        txn = (
-            client.trx.transfer(admin_address, destination_wallet, amount_sun)
-            .build()
-            .sign(admin_key)
-        )
-        result = txn.broadcast().wait(timeout=30)
+        txn = await client.trx.transfer(
+            admin_address, destination_wallet, amount_sun
+        ).build()
+        txn.sign(admin_key)
+        ret = await txn.broadcast()
+        result = await ret.wait(timeout=30)
         logger.info(f"📦 Response dari jaringan TRX: {result}")
 
         if isinstance(result, dict):
@@ -70,7 +70,7 @@ async def send_trx(
         raise e  # crypto_sender.py yang handle notif
 
 
-def get_balance(address: str, rpc_url: str) -> float:
+async def get_balance(address: str, rpc_url: str) -> float:
     """
     📌 Cek saldo TRX dari wallet tertentu
     rpc_url dikirim dari endpoint
@@ -78,8 +78,8 @@ def get_balance(address: str, rpc_url: str) -> float:
     if not rpc_url:
         raise ValueError("❌ RPC URL harus diberikan!")
     try:
-        client = Tron(HTTPProvider(rpc_url))
-        balance = client.get_account_balance(address)
+        client = get_tron_client(pick_url("trx", rpc_url))
+        balance = await client.get_account_balance(address)
         logger.info(f"💰 Saldo {address}: {balance} TRX")
         return balance
     except Exception as e:
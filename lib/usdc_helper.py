@@ -1,6 +1,5 @@
 # 📍 lib/usdc_helper.py
 import logging
-import asyncio
 from lib.helpers.usdc.eth import send_usdc_eth
 from lib.helpers.usdc.bsc import send_usdc_bsc
 from lib.helpers.usdc.trx import send_usdc_trx
@@ -61,10 +60,7 @@ async def send_usdc(
             token_address=token_address,
         )
     elif chain == "sol":
-        # pakai loop.run_in_executor biar synchronous jadi awaitable
-        return await asyncio.get_running_loop().run_in_executor(
-            None,
-            send_usdc_solana,
+        return await send_usdc_solana(
             destination_wallet,
             amount,
             rpc_url,
@@ -6,7 +6,6 @@ from lib.helpers.usdt.trx import send_usdt_trx
 from lib.helpers.usdt.base import send_usdt_base
 from lib.helpers.usdt.sol import send_usdt_solana
 from lib.helpers.usdt.polygon import send_usdt_polygon  # ✅ import Polygon
-import asyncio
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -62,10 +61,7 @@ async def send_usdt(
             token_address=token_address,
         )
     elif chain == "sol":
-        # pakai loop.run_in_executor biar synchronous jadi awaitable
-        return await asyncio.get_running_loop().run_in_executor(
-            None,
-            send_usdt_solana,
+        return await send_usdt_solana(
             destination_wallet,
             amount,
             rpc_url,
@@ -12,16 +12,17 @@ def validate_wallet(chain: str, wallet: str) -> tuple[bool, str|None]:
     """
     wallet = wallet.strip()
     chain_lower = chain.lower()
-    logger.info("Validating wallet '%s' for chain '%s'", wallet, chain_lower)
+    # debug saja: dipanggil per address saat export ribuan wallet
+    logger.debug("Validating wallet '%s' for chain '%s'", wallet, chain_lower)
 
-    # === EVM chains (ETH, BSC, Base, USDT, USDC) ===
-    evm_chains = ["eth", "bsc", "bnb", "base", "usdt", "usdc"]
+    # === EVM chains (ETH, BSC, Base, Polygon, USDT, USDC) ===
+    evm_chains = ["eth", "bsc", "bnb", "base", "polygon", "usdt", "usdc"]
     if chain_lower in evm_chains:
         if not wallet.startswith("0x"):
             wallet = "0x" + wallet
             logger.debug("Auto-prefixed 0x: %s", wallet)
         if re.fullmatch(r"0x[a-fA-F0-9]{40}", wallet):
-            logger.info("Valid EVM wallet detected for chain %s", chain_lower)
+            logger.debug("Valid EVM wallet detected for chain %s", chain_lower)
             # Normalize BNB -> bsc for consistent naming
             normalized_chain = chain_lower
             return True, normalized_chain
@@ -31,7 +32,7 @@ def validate_wallet(chain: str, wallet: str) -> tuple[bool, str|None]:
     # === SOLANA ===
     if chain_lower == "sol":
         if re.fullmatch(r"[1-9A-HJ-NP-Za-km-z]{32,44}", wallet):
-            logger.info("Valid SOL wallet detected")
+            logger.debug("Valid SOL wallet detected")
             return True, "sol"
         logger.warning("Invalid SOL wallet: %s", wallet)
         return False, "sol"
@@ -39,7 +40,7 @@ def validate_wallet(chain: str, wallet: str) -> tuple[bool, str|None]:
     # === TRON ===
     if chain_lower == "trx":
         if re.fullmatch(r"T[a-zA-Z0-9]{33}", wallet):
-            logger.info("Valid TRX wallet detected")
+            logger.debug("Valid TRX wallet detected")
             return True, "trx"
         logger.warning("Invalid TRX wallet: %s", wallet)
         return False, "trx"
@@ -47,7 +48,7 @@ def validate_wallet(chain: str, wallet: str) -> tuple[bool, str|None]:
     # === TON ===
     if chain_lower == "ton":
         if re.fullmatch(r"U[0-9A-Za-z]{47,66}", wallet):
-            logger.info("Valid TON wallet detected")
+            logger.debug("Valid TON wallet detected")
             return True, "ton"
         logger.warning("Invalid TON wallet: %s", wallet)
         return False, "ton"
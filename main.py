@@ -2,6 +2,7 @@
 
 import os
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -28,6 +29,31 @@ from routers.crypto.tokens import tokens_router
 from routers.crypto.swap import swap_router
 from routers.crypto.token_info import token_info_router
 from routers.crypto.tx_status import tx_status_router
+from routers.crypto.stats import stats_router
+from routers.crypto.portfolio import portfolio_router
+from lib.price_service import (
+    close_price_client,
+    start_price_refresher,
+    stop_price_refresher,
+)
+from lib.rpc_pool import close_pool
+from lib.rpc_router import start_probe, stop_probe
+from lib.shared_cache import close_segments
+
+
+# ====================== LIFESPAN ======================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 🔺 startup → probe background untuk RPC yang di-eject & refresh harga terjadwal
+    start_probe()
+    start_price_refresher()
+    yield
+    # 🔻 shutdown → tutup semua koneksi upstream yang di-pool
+    await stop_probe()
+    await close_pool()
+    await stop_price_refresher()
+    await close_price_client()
+    close_segments()
 
 
 # ====================== APP ======================
@@ -35,6 +61,7 @@ app = FastAPI(
     title="MultiChain Crypto API",
     description="API for sending, simulating swaps, and checking crypto tokens (ETH, USDT, BNB, SOL, etc.).",
     version="1.1.1",
+    lifespan=lifespan,
 )
 
 
@@ -108,6 +135,8 @@ crypto_routers = [
     swap_router,
     token_info_router,
     tx_status_router,
+    stats_router,
+    portfolio_router,
 ]
 
 for r in crypto_routers:
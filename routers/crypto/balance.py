@@ -1,19 +1,40 @@
 # 📍 routers/crypto/balance.py
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from lib.balance_checker import check_balance
+from lib.balance_cache import (
+    BALANCE_CACHE_MAX_STALENESS,
+    get_native_balance_cached,
+    get_token_balances_cached,
+)
+from lib.balance_checker import get_evm_balances_bulk
+from lib.balance_export import stream_balances
+from lib.balance_history import get_native_balance_at, get_token_balances_at
+from lib.rpc_router import resolve_urls
 
 balance_router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 # ===== Response Model =====
+class TokenBalance(BaseModel):
+    token_address: str
+    balance: float | None
+    decimals: int | None = None
+    error: str | None = None
+
+
 class BalanceResponse(BaseModel):
     status: str
     chain: str
     wallet: str
     balance: float
+    tokens: list[TokenBalance] | None = None
+    block_number: int | None = None  # block/slot saat saldo dibaca
+    cached: bool = False
+    finalized: bool | None = None  # hanya untuk query block / slot historis
 
     class Config:
         # 🔹 Contoh response sukses
@@ -41,6 +62,49 @@ class ErrorResponse(BaseModel):
         }
 
 
+class BulkBalanceRequest(BaseModel):
+    chain: str
+    wallets: list[str]
+    rpc_url: str | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "chain": "bsc",
+                "wallets": ["0x1234...abcd", "0x5678...ef01"],
+                "rpc_url": "https://bsc-dataseed.binance.org",
+            }
+        }
+
+
+class WalletBalance(BaseModel):
+    wallet: str
+    balance: float | None
+    error: str | None = None
+
+
+class BulkBalanceResponse(BaseModel):
+    status: str
+    chain: str
+    block_number: int
+    count: int
+    results: list[WalletBalance]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "chain": "BSC",
+                "block_number": 43210987,
+                "count": 2,
+                "results": [
+                    {"wallet": "0x1234...abcd", "balance": 12.34, "error": None},
+                    {"wallet": "0x5678", "balance": None, "error": "Invalid address"},
+                ],
+            }
+        }
+
+
 @balance_router.get(
     "/balance",
     summary="Get Wallet Balance",
@@ -56,6 +120,14 @@ class ErrorResponse(BaseModel):
                         "chain": "ETH",
                         "wallet": "0x1234...abcd",
                         "balance": 12.34,
+                        "tokens": [
+                            {
+                                "token_address": "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+                                "balance": 250.0,
+                                "decimals": 6,
+                                "error": None,
+                            }
+                        ],
                     }
                 }
             },
@@ -76,21 +148,221 @@ class ErrorResponse(BaseModel):
 async def get_wallet_balance(
     chain: str = Query(..., description="Blockchain chain: eth, bsc, bnb, sol, trx"),
     wallet: str = Query(..., description="Wallet address to check balance"),
-    rpc_url: str = Query(..., description="RPC URL for mainnet or testnet"),
+    rpc_url: str = Query(
+        None,
+        description="RPC URL for mainnet or testnet. Several URLs can be comma-separated; "
+        "optional when the server has RPC_URLS_<CHAIN> configured",
+    ),
+    token_address: list[str] = Query(
+        None,
+        description="Token contract / mint address (ERC20, SPL, TRC20). "
+        "Repeat the parameter or comma-separate to read several tokens at once",
+    ),
+    max_staleness_blocks: int = Query(
+        0,
+        ge=0,
+        le=BALANCE_CACHE_MAX_STALENESS,
+        description="Accept a cached balance read up to this many blocks behind the chain head "
+        "(0 = only a balance read at the current head)",
+    ),
+    block: int = Query(
+        None, ge=0, description="Historical balance at this block number (EVM chains)"
+    ),
+    slot: int = Query(
+        None, ge=0, description="Historical balance at the end of this slot (sol)"
+    ),
 ):
     """
     Check wallet balance per blockchain chain.
-    User must provide the RPC URL (mainnet or testnet).
+    RPC URL(s) come from the user or the server config (mainnet or testnet).
+    With `token_address`, token balances are read in one batch next to the native balance.
+    Balances are cached per block: polling the same wallet costs one RPC read per new block.
+    With `block` / `slot`, balances at finalized heights are cached permanently.
     """
+    if block is not None and slot is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either block or slot, not both"
+        )
+    if slot is not None and chain.lower() != "sol":
+        raise HTTPException(status_code=400, detail="slot is only for chain sol")
+    if block is not None and chain.lower() == "sol":
+        raise HTTPException(status_code=400, detail="Use slot for chain sol")
+    height = block if block is not None else slot
+
     try:
-        bal = await check_balance(chain, wallet, rpc_url)
-        logger.info(f"🔹 Balance checked: {wallet} on {chain.upper()} = {bal}")
+        # rpc_url & RPC_URLS_<CHAIN> kosong → ValueError (400) sebelum masuk cache,
+        # yang menelan error baca dan mengembalikan saldo 0
+        resolve_urls(chain, rpc_url)
+        tokens = [
+            t.strip()
+            for raw in token_address or []
+            for t in raw.split(",")
+            if t.strip()
+        ]
+        tokens = list(dict.fromkeys(tokens))
+        if height is not None:
+            # saldo historis: cache permanen untuk block / slot yang sudah final
+            native = get_native_balance_at(chain, wallet, height, rpc_url)
+            token_job = get_token_balances_at
+            args = (chain, wallet, tokens, height, rpc_url)
+        else:
+            native = get_native_balance_cached(
+                chain, wallet, rpc_url, max_staleness_blocks
+            )
+            token_job = get_token_balances_cached
+            args = (chain, wallet, tokens, rpc_url, max_staleness_blocks)
+        if tokens:
+            native, token_data = await asyncio.gather(native, token_job(*args))
+        else:
+            native, token_data = await native, None
+        bal = native["balance"]
+        logger.info(
+            f"🔹 Balance checked: {wallet} on {chain.upper()} = {bal} "
+            f"(block {native['block_number']}, cached={native['cached']})"
+        )
         return {
             "status": "success",
             "chain": chain.upper(),
             "wallet": wallet,
             "balance": bal,
+            "tokens": token_data["tokens"] if token_data else None,
+            "block_number": native["block_number"],
+            "cached": native["cached"] and (token_data is None or token_data["cached"]),
+            "finalized": native.get("finalized"),
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Failed to check balance: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@balance_router.post(
+    "/balance/bulk",
+    summary="Get Wallet Balances in Bulk (EVM)",
+    description=(
+        "Check native balances of many wallets at once on eth, bsc/bnb, base or polygon. "
+        "Balances are read through Multicall3 in chunks, all pinned to the same block number."
+    ),
+    response_model=BulkBalanceResponse,
+    responses={
+        400: {
+            "description": "Unsupported chain or too many wallets",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "Chain sol tidak didukung untuk bulk balance",
+                    }
+                }
+            },
+        },
+        500: {
+            "description": "Failed to check balances",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "Failed to connect to RPC URL",
+                    }
+                }
+            },
+        },
+    },
+)
+async def get_wallet_balances_bulk(req: BulkBalanceRequest):
+    """
+    Bulk balance check for deposit address reconciliation.
+    Per-address errors (invalid address / failed call) are returned in `results`.
+    """
+    try:
+        data = await get_evm_balances_bulk(req.rpc_url, req.wallets, req.chain)
+        logger.info(
+            f"🔹 Bulk balance checked: {len(data['results'])} wallet on {req.chain.upper()}"
+        )
+        return {
+            "status": "success",
+            "chain": req.chain.upper(),
+            "block_number": data["block_number"],
+            "count": len(data["results"]),
+            "results": data["results"],
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to check bulk balance: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse yang masih membaca body request selama mengirim hasil.
+    Bawaan Starlette (ASGI < 2.4, mis. uvicorn) langsung memanggil receive()
+    untuk deteksi disconnect dan berebut pesan body dengan request.stream();
+    di sini deteksi disconnect baru dimulai setelah body habis dibaca.
+    """
+
+    def __init__(self, content, body_done: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_done = body_done
+
+    async def listen_for_disconnect(self, receive):
+        await self.body_done.wait()
+        await super().listen_for_disconnect(receive)
+
+
+async def _read_body(request: Request, done: asyncio.Event):
+    try:
+        async for chunk in request.stream():
+            yield chunk
+    finally:
+        done.set()
+
+
+@balance_router.post(
+    "/balance/export",
+    summary="Export Wallet Balances (NDJSON stream)",
+    description=(
+        "Stream native balances for a large address list (50k+). The request body is read "
+        'line by line: NDJSON `{"chain": "bsc", "wallet": "0x..."}`, plain text '
+        "`chain,wallet` or just `wallet` (uses the `chain` query). Send a file as the raw body, "
+        "e.g. `curl --data-binary @addresses.txt`. One NDJSON line is emitted per address as soon "
+        'as it is ready (use `line` to match input order), followed by a `{"done": true}` summary.'
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "NDJSON stream of balances",
+            "content": {
+                "application/x-ndjson": {
+                    "example": (
+                        '{"line": 1, "chain": "bsc", "wallet": "0x1234...abcd", "balance": 12.34, "error": null}\n'
+                        '{"line": 2, "chain": "sol", "wallet": "abc", "balance": null, "error": "Invalid address"}\n'
+                        '{"done": true, "count": 2, "errors": 1, "elapsed_ms": 812.4}\n'
+                    )
+                }
+            },
+        },
+    },
+)
+async def export_wallet_balances(
+    request: Request,
+    chain: str = Query(
+        None, description="Default chain for lines without one: eth, bsc, bnb, sol, trx"
+    ),
+    rpc_url: str = Query(
+        None,
+        description="RPC URL for the `chain` query (other chains use the server config)",
+    ),
+):
+    """
+    Balance export for large deposit address lists.
+    Input is not buffered: reading the body pauses while workers are busy (backpressure).
+    """
+    logger.info(f"📤 Export saldo dimulai (chain default: {chain or '-'})")
+    body_done = asyncio.Event()
+    return BodyStreamingResponse(
+        stream_balances(_read_body(request, body_done), chain, rpc_url),
+        body_done,
+        media_type="application/x-ndjson",
+    )
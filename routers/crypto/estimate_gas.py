@@ -3,6 +3,8 @@ import logging
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from web3 import Web3
+from lib.rpc_pool import get_async_web3
+from lib.rpc_router import route
 import httpx  # untuk Solana/TRX RPC
 
 estimate_gas_router = APIRouter()
@@ -29,23 +31,19 @@ class ErrorResponse(BaseModel):
 
 
 # ===== Helper Estimate Gas =====
-async def estimate_gas_fee(token: str, chain: str, amount: float, rpc_url: str):
+async def estimate_gas_fee(token: str, chain: str, amount: float, rpc_url: str = None):
     token_lower = token.lower()
     chain_lower = chain.lower()
 
-    if not rpc_url:
-        raise ValueError("RPC URL harus dikirim user, tidak ada default")
-
     logger.info(
         f"🔧 Estimasi gas | token={token}, chain={chain}, amount={amount}, rpc={rpc_url}"
     )
 
     if chain_lower in ["eth", "bnb", "polygon", "base"]:
         # Web3 compatible chains
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
-        if not w3.is_connected():
-            raise ValueError(f"RPC {rpc_url} tidak bisa connect")
-        gas_price = w3.eth.gas_price
+        gas_price = await route(
+            chain_lower, rpc_url, lambda url: get_async_web3(url).eth.gas_price
+        )
         gas_limit = 21000
         gas_fee = Web3.from_wei(gas_price * gas_limit, "ether")
         return float(gas_fee)
@@ -79,12 +77,12 @@ async def estimate_gas(
     chain: str = Query(..., description="Blockchain chain: eth, bsc, bnb, sol, trx"),
     token: str = Query(..., description="Token symbol to send, e.g., ETH, USDT, SOL"),
     amount: float = Query(..., description="Amount of token to send"),
-    rpc_url: str = Query(..., description="Custom RPC URL yang HARUS dikirim user"),
+    rpc_url: str = Query(
+        None,
+        description="Custom RPC URL (boleh beberapa, pisah koma); "
+        "opsional kalau server punya RPC_URLS_<CHAIN>",
+    ),
 ):
-    if not rpc_url:
-        logger.error("❌ RPC URL tidak dikirim user")
-        raise HTTPException(status_code=400, detail="RPC URL harus dikirim dari user")
-
     try:
         gas_fee = await estimate_gas_fee(token, chain, amount, rpc_url)
         logger.info(
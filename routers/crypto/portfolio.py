@@ -0,0 +1,113 @@
+# 📍 routers/crypto/portfolio.py
+import logging
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from lib.portfolio import get_portfolio
+
+portfolio_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# ===== Request / Response Models =====
+class PortfolioChain(BaseModel):
+    chain: str
+    wallet: str
+    rpc_url: str | None = None
+    token_addresses: list[str] = []
+
+
+class PortfolioRequest(BaseModel):
+    chains: list[PortfolioChain]
+    deadline: float | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "chains": [
+                    {
+                        "chain": "eth",
+                        "wallet": "0x1234...abcd",
+                        "token_addresses": [
+                            "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+                        ],
+                    },
+                    {"chain": "bsc", "wallet": "0x1234...abcd"},
+                    {
+                        "chain": "sol",
+                        "wallet": "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM",
+                    },
+                    {"chain": "trx", "wallet": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"},
+                ],
+                "deadline": 5,
+            }
+        }
+
+
+class PortfolioLeg(BaseModel):
+    chain: str
+    wallet: str
+    kind: str  # native / tokens
+    status: str  # ok / error / timeout
+    elapsed_ms: float | None = None
+    balance: float | None = None
+    tokens: list[dict] | None = None
+    error: str | None = None
+
+
+class PortfolioResponse(BaseModel):
+    status: str
+    complete: bool
+    deadline: float
+    elapsed_ms: float
+    legs: list[PortfolioLeg]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "complete": False,
+                "deadline": 5.0,
+                "elapsed_ms": 5002.1,
+                "legs": [
+                    {
+                        "chain": "eth",
+                        "wallet": "0x1234...abcd",
+                        "kind": "native",
+                        "status": "ok",
+                        "elapsed_ms": 182.4,
+                        "balance": 0.52,
+                    },
+                    {
+                        "chain": "trx",
+                        "wallet": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+                        "kind": "native",
+                        "status": "timeout",
+                        "elapsed_ms": 5001.7,
+                    },
+                ],
+            }
+        }
+
+
+@portfolio_router.post(
+    "/portfolio",
+    summary="Get Cross-Chain Portfolio",
+    description=(
+        "Fetch native and token balances of one user on several chains "
+        "(eth, bsc, base, polygon, sol, trx) concurrently under one overall deadline. "
+        "Slow chains are returned with status `timeout` next to the legs that finished, "
+        "each leg with its own timing."
+    ),
+    response_model=PortfolioResponse,
+)
+async def get_user_portfolio(req: PortfolioRequest):
+    try:
+        data = await get_portfolio(
+            [item.model_dump() for item in req.chains], req.deadline
+        )
+        return {"status": "success", **data}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch portfolio: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
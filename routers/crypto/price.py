@@ -2,7 +2,9 @@
 import logging
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from lib.coingecko import get_current_price  # ✅ import yang diperlukan
+from lib.price_history import get_price_history
+from lib.price_mapper import get_token_amounts
+from lib.price_service import PRICE_CURRENCIES, get_price_matrix, get_prices
 
 price_router = APIRouter()  # 🔹 router khusus untuk price
 logger = logging.getLogger(__name__)
@@ -13,10 +15,118 @@ class PriceResponse(BaseModel):
     status: str
     token: str
     price_idr: float
+    stale: bool = False  # harga lewat TTL, refresh sedang jalan di background
 
     class Config:
         schema_extra = {
-            "example": {"status": "success", "token": "BTC", "price_idr": 450000000}
+            "example": {
+                "status": "success",
+                "token": "BTC",
+                "price_idr": 450000000,
+                "stale": False,
+            }
+        }
+
+
+class PriceMatrixResponse(BaseModel):
+    status: str
+    symbols: list[str]
+    currencies: list[str]
+    prices: list[list[float | None]]  # baris = symbols, kolom = currencies
+    missing: list[str]
+    stale: bool = False
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "symbols": ["sol", "usdt"],
+                "currencies": ["idr", "usd"],
+                "prices": [[2650000, 160.12], [16550, 1.0]],
+                "missing": [],
+                "stale": False,
+            }
+        }
+
+
+class Candle(BaseModel):
+    time: float  # awal candle (unix detik)
+    open: float
+    high: float
+    low: float
+    close: float
+    samples: int
+
+
+class PriceHistoryResponse(BaseModel):
+    status: str
+    symbol: str
+    currency: str
+    window: float
+    interval: float
+    samples: int
+    twap: float | None
+    candles: list[Candle]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "symbol": "sol",
+                "currency": "idr",
+                "window": 300,
+                "interval": 60,
+                "samples": 15,
+                "twap": 2651234.5,
+                "candles": [
+                    {
+                        "time": 1760000000,
+                        "open": 2650000,
+                        "high": 2655000,
+                        "low": 2648000,
+                        "close": 2652000,
+                        "samples": 3,
+                    }
+                ],
+            }
+        }
+
+
+class ConvertRequest(BaseModel):
+    chains: list[str]
+    amounts_idr: list[float]
+    locked: bool = False  # potong fee locked (sama dengan get_locked_token_amount)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "chains": ["sol", "bnb", "sol"],
+                "amounts_idr": [150000, 250000, 99000],
+                "locked": False,
+            }
+        }
+
+
+class ConvertResponse(BaseModel):
+    status: str
+    fetched_at: float  # waktu harga yang dipakai (unix detik)
+    stale: bool
+    locked: bool
+    amounts: list[float | None]
+    prices_idr: dict[str, float]
+    missing: list[str]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "fetched_at": 1760000000.0,
+                "stale": False,
+                "locked": False,
+                "amounts": [0.056581, 0.024917, 0.037344],
+                "prices_idr": {"bnb": 10033500.0, "sol": 2651000.0},
+                "missing": [],
+            }
         }
 
 
@@ -42,6 +152,7 @@ class ErrorResponse(BaseModel):
                         "status": "success",
                         "token": "BTC",
                         "price_idr": 450000000,
+                        "stale": False,
                     }
                 }
             },
@@ -96,17 +207,184 @@ async def get_token_price(
     Fetch the current real-time price of a token in Indonesian Rupiah (IDR).
 
     - **token**: The token symbol to get the price for (e.g., BTC, ETH, SOL)
+
+    Prices are served from memory and refreshed in the background;
+    `stale` is true when the price is past its TTL while a refresh is running.
     """
     try:
-        price = await get_current_price(token)
+        try:
+            info = (await get_prices([token])).get(token.lower(), {})
+        except Exception as e:
+            logger.warning(f"⚠️ Harga {token.upper()} tidak tersedia: {e}")
+            info = {}
+        price = info.get("idr", 0)
         if price == 0:
             raise HTTPException(
                 status_code=404, detail=f"Price for {token.upper()} is not available"
             )
         logger.info(f"🔹 Price fetched: {token.upper()} = {price} IDR")
-        return {"status": "success", "token": token.upper(), "price_idr": price}
+        return {
+            "status": "success",
+            "token": token.upper(),
+            "price_idr": price,
+            "stale": info["stale"],
+        }
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.error(f"❌ Failed to fetch token price: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _split(values: list) -> list:
+    """Query yang boleh diulang atau dipisah koma → list unik sesuai urutan"""
+    return list(
+        dict.fromkeys(
+            v.strip() for raw in values or [] for v in raw.split(",") if v.strip()
+        )
+    )
+
+
+@price_router.get(
+    "/prices",
+    summary="Get Token Prices (batch, multi-currency)",
+    description=(
+        "Get prices for many tokens in many fiat currencies in one call, answered from the "
+        "cached CoinGecko payload. `prices` is a dense matrix: one row per symbol, one column "
+        f"per currency (null when unavailable). Supported currencies: {', '.join(PRICE_CURRENCIES)}."
+    ),
+    response_model=PriceMatrixResponse,
+    responses={
+        400: {
+            "description": "Unsupported currency",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "Currency xyz tidak didukung, pilih dari: idr, usd",
+                    }
+                }
+            },
+        },
+    },
+)
+async def get_token_prices(
+    symbols: list[str] = Query(
+        ..., description="Token symbols, repeated or comma-separated, e.g. sol,eth,usdt"
+    ),
+    currencies: list[str] = Query(
+        ["idr"],
+        description="Fiat currencies, repeated or comma-separated, e.g. idr,usd",
+    ),
+):
+    """
+    Batch price lookup for checkout pages: one call instead of one `/price` per token.
+    """
+    try:
+        matrix = await get_price_matrix(_split(symbols), _split(currencies))
+        logger.info(
+            f"🔹 Prices fetched: {len(matrix['symbols'])} token × {len(matrix['currencies'])} currency"
+        )
+        return {"status": "success", **matrix}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch token prices: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@price_router.get(
+    "/price/history",
+    summary="Get Token Price History (OHLC + TWAP)",
+    description=(
+        "OHLC candles and the time-weighted average price of a token over the last `window` "
+        "seconds, from the in-memory price history recorded at every price refresh."
+    ),
+    response_model=PriceHistoryResponse,
+    responses={
+        400: {
+            "description": "Unsupported token/currency or too many candles",
+            "content": {
+                "application/json": {
+                    "example": {"status": "error", "detail": "Token xyz belum support"}
+                }
+            },
+        },
+        404: {
+            "description": "No price history recorded yet",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "No price history for SOL yet",
+                    }
+                }
+            },
+        },
+    },
+)
+async def get_token_price_history(
+    token: str = Query(..., description="Token symbol, e.g. SOL, ETH"),
+    currency: str = Query("idr", description="Fiat currency, e.g. idr, usd"),
+    window: float = Query(300, gt=0, le=86400, description="Window in seconds"),
+    interval: float = Query(60, gt=0, description="Candle size in seconds"),
+):
+    """
+    Price history for the pricing engine, e.g. a 5-minute TWAP instead of one sample.
+    """
+    try:
+        history = get_price_history(token, currency, window, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if history["twap"] is None:
+        raise HTTPException(
+            status_code=404, detail=f"No price history for {token.upper()} yet"
+        )
+    return {"status": "success", **history}
+
+
+@price_router.post(
+    "/price/convert",
+    summary="Bulk Convert IDR to Token Amounts",
+    description=(
+        "Convert many IDR amounts to token amounts in one call. `chains[i]` and "
+        "`amounts_idr[i]` form one row; every row is priced from the same cached price "
+        "snapshot, whose time is returned as `fetched_at`. Amounts are null for "
+        "unsupported chains or missing prices."
+    ),
+    response_model=ConvertResponse,
+    responses={
+        400: {
+            "description": "chains and amounts_idr have different lengths",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "Jumlah chains dan nominal IDR harus sama",
+                    }
+                }
+            },
+        },
+        500: {
+            "description": "Prices not available",
+            "content": {
+                "application/json": {
+                    "example": {"status": "error", "detail": "Harga tidak tersedia"}
+                }
+            },
+        },
+    },
+)
+async def convert_idr_amounts(req: ConvertRequest):
+    """
+    Invoice batch conversion: one request for thousands of invoices instead of one
+    price lookup per invoice.
+    """
+    try:
+        result = await get_token_amounts(req.chains, req.amounts_idr, req.locked)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to convert IDR amounts: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", **result}
@@ -0,0 +1,212 @@
+# 📍 routers/crypto/stats.py
+import logging
+from fastapi import APIRouter
+from pydantic import BaseModel
+from lib.balance_cache import cache_stats
+from lib.balance_history import history_stats
+from lib.head_tracker import head_stats
+from lib.price_history import price_history_stats
+from lib.price_service import price_stats
+from lib.rpc_metadata import metadata_stats
+from lib.rpc_pool import pool_stats
+from lib.rpc_router import router_stats
+from lib.shared_cache import shared_stats
+from lib.single_flight import flight_stats
+from lib.swap_quote import quote_stats
+from lib.circuit_breaker import breaker_stats
+from lib.rate_limiter import limiter_stats
+
+stats_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# ===== Response Models =====
+class StatsResponse(BaseModel):
+    status: str
+    rpc_pool: dict
+    rpc_router: dict
+    rpc_metadata: list
+    circuit_breakers: dict
+    rate_limiters: dict
+    chain_heads: list
+    balance_cache: dict
+    balance_history: dict
+    prices: dict
+    price_history: dict
+    swap_quotes: dict
+    shared_cache: dict
+    single_flight: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "rpc_pool": {
+                    "size": 1,
+                    "max_size": 32,
+                    "idle_ttl": 300,
+                    "retiring": 0,
+                    "hits": 42,
+                    "misses": 1,
+                    "evicted_lru": 0,
+                    "evicted_idle": 0,
+                    "providers": [
+                        {
+                            "rpc_url": "https://bsc-dataseed.binance.org",
+                            "kind": "async",
+                            "hits": 42,
+                            "age": 120.5,
+                            "idle": 1.2,
+                        }
+                    ],
+                },
+                "rpc_router": {
+                    "hedge": {
+                        "enabled": True,
+                        "percentile": 95.0,
+                        "requests": 120,
+                        "hedged": 6,
+                        "primary_wins": 116,
+                        "hedge_wins": 4,
+                    },
+                    "endpoints": [
+                        {
+                            "rpc_url": "https://bsc-dataseed.binance.org",
+                            "chain": "bnb",
+                            "ewma_ms": 84.2,
+                            "error_rate": 0.0,
+                            "score": 84.2,
+                            "p95_ms": 140.3,
+                            "calls": 42,
+                            "failures": 0,
+                            "ejected": False,
+                            "ejected_for": None,
+                        }
+                    ],
+                },
+                "rpc_metadata": [
+                    {
+                        "rpc_url": "https://bsc-dataseed.binance.org",
+                        "chain_id": 56,
+                        "block_time": 3.0,
+                        "eip1559": True,
+                        "batch": True,
+                        "age": 120.5,
+                    }
+                ],
+                "circuit_breakers": {
+                    "failure_threshold": 5,
+                    "reset_timeout": 30.0,
+                    "hosts": [
+                        {
+                            "host": "api.coingecko.com",
+                            "state": "closed",
+                            "failures": 0,
+                            "rejected": 0,
+                            "opens": 0,
+                        }
+                    ],
+                },
+                "rate_limiters": {
+                    "coingecko": {
+                        "rate": 0.5,
+                        "burst": 10,
+                        "tokens": 3.5,
+                        "acquired": 48,
+                        "queued": 2,
+                        "max_queued": 4,
+                        "rejected": 0,
+                        "total_wait": 12.4,
+                        "max_wait": 4.0,
+                        "avg_wait": 0.258,
+                    }
+                },
+                "chain_heads": [
+                    {"chain": "bnb", "number": 43210987, "block_time": 3.0, "age": 1.2}
+                ],
+                "balance_cache": {
+                    "size": 120,
+                    "max_size": 10000,
+                    "max_staleness": 100,
+                    "hits": 5400,
+                    "misses": 310,
+                    "invalidated": 40,
+                    "evicted": 0,
+                },
+                "balance_history": {
+                    "path": "data/balance_history.sqlite3",
+                    "size": 860,
+                    "hits": 2400,
+                    "misses": 860,
+                    "stored": 860,
+                },
+                "prices": {
+                    "ids": 21,
+                    "ttl": 30.0,
+                    "refresh_interval": 20.0,
+                    "refresher": True,
+                    "max_stale": 600.0,
+                    "age": 12.4,
+                    "fetches": 120,
+                    "failures": 2,
+                    "stale_served": 2,
+                    "snapshots": 40,
+                    "shared_reads": 0,
+                    "shared_leader": True,
+                },
+                "price_history": {"size": 4320, "samples": 180, "oldest": 1760000000.0},
+                "swap_quotes": {
+                    "tokens": 23,
+                    "priced": 23,
+                    "rebuilds": 180,
+                    "age": 12.4,
+                },
+                "shared_cache": {
+                    "enabled": True,
+                    "pid": 4242,
+                    "segments": {
+                        "prices": {
+                            "leader": False,
+                            "seq": 360,
+                            "reads": 180,
+                            "retries": 0,
+                            "writes": 0,
+                        }
+                    },
+                },
+                "single_flight": {
+                    "prices": {
+                        "calls": 410,
+                        "leaders": 120,
+                        "coalesced": 290,
+                        "inflight": 0,
+                    }
+                },
+            }
+        }
+
+
+@stats_router.get(
+    "/stats",
+    summary="Get Service Stats",
+    description="Internal statistics of upstream connection pools, RPC endpoint routing, circuit breakers, rate limiters, chain heads, the balance caches, the price cache, the price history, the swap quote matrix and the cross-worker shared cache.",
+    response_model=StatsResponse,
+)
+async def get_stats():
+    logger.info("📊 Request untuk statistik service")
+    return {
+        "status": "success",
+        "rpc_pool": pool_stats(),
+        "rpc_router": router_stats(),
+        "rpc_metadata": metadata_stats(),
+        "circuit_breakers": breaker_stats(),
+        "rate_limiters": limiter_stats(),
+        "chain_heads": head_stats(),
+        "balance_cache": cache_stats(),
+        "balance_history": history_stats(),
+        "prices": price_stats(),
+        "price_history": price_history_stats(),
+        "swap_quotes": quote_stats(),
+        "shared_cache": shared_stats(),
+        "single_flight": flight_stats(),
+    }
@@ -1,6 +1,7 @@
 # 📍 routers/crypto/swap.py
 import logging
-import httpx
+from lib.rate_limiter import RateLimitExceeded
+from lib.swap_quote import quote, quote_many
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
@@ -16,6 +17,7 @@ class SwapResponse(BaseModel):
     swapped_amount: float
     price_from_usd: float
     price_to_usd: float
+    stale: bool = False  # harga lewat TTL, refresh sedang jalan di background
 
     class Config:
         schema_extra = {
@@ -30,6 +32,61 @@ class SwapResponse(BaseModel):
         }
 
 
+class SwapQuoteRequest(BaseModel):
+    from_token: str
+    to_token: str
+    amount: float
+
+
+class SwapQuotesRequest(BaseModel):
+    quotes: list[SwapQuoteRequest]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "quotes": [
+                    {"from_token": "SOL", "to_token": "USDC", "amount": 1.5},
+                    {"from_token": "ETH", "to_token": "BNB", "amount": 0.2},
+                ]
+            }
+        }
+
+
+class SwapQuote(BaseModel):
+    from_token: str
+    to_token: str
+    amount: float
+    swapped_amount: float | None  # None kalau harga salah satu token tidak tersedia
+    price_from_usd: float | None
+    price_to_usd: float | None
+
+
+class SwapQuotesResponse(BaseModel):
+    status: str
+    fetched_at: float
+    stale: bool
+    quotes: list[SwapQuote]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "fetched_at": 1760000000.0,
+                "stale": False,
+                "quotes": [
+                    {
+                        "from_token": "SOL",
+                        "to_token": "USDC",
+                        "amount": 1.5,
+                        "swapped_amount": 34.823456,
+                        "price_from_usd": 23.45,
+                        "price_to_usd": 1.0,
+                    }
+                ],
+            }
+        }
+
+
 class ErrorResponse(BaseModel):
     status: str
     detail: str
@@ -40,55 +97,6 @@ class ErrorResponse(BaseModel):
         }
 
 
-# Mapping token ke CoinGecko ID
-COINGECKO_IDS = {
-    "sol": "solana",                # Solana
-    "eth": "ethereum",              # Ethereum
-    "bnb": "binancecoin",           # Binance Coin
-    "usdt": "tether",               # Tether
-    "usdc": "usd-coin",             # USD Coin
-    "trx": "tron",                  # TRON
-    "ton": "the-open-network",      # TON
-    "matic": "matic-network",       # Polygon alias MATIC
-    "polygon": "matic-network",     # Polygon alias lain
-    "link": "chainlink",            # Chainlink
-    "ada": "cardano",               # Cardano
-    "doge": "dogecoin",             # Dogecoin
-    "dot": "polkadot",              # Polkadot
-    "avax": "avalanche-2",          # Avalanche
-    "ftt": "ftx-token",             # FTX Token
-    "cake": "pancakeswap-token",    # PancakeSwap
-    "shib": "shiba-inu",            # Shiba Inu
-    "luna": "terra-luna",           # Terra
-    "atom": "cosmos",               # Cosmos
-    "xrp": "ripple",                # Ripple
-    "bch": "bitcoin-cash",          # Bitcoin Cash
-    "ltc": "litecoin",              # Litecoin
-}
-
-
-
-async def get_token_price_usd(token: str) -> float:
-    """Fetch the token price in USD from CoinGecko"""
-    token_id = COINGECKO_IDS.get(token.lower())
-    if not token_id:
-        raise HTTPException(status_code=400, detail=f"Token {token} is not supported")
-
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={token_id}&vs_currencies=usd"
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, timeout=10)
-        data = resp.json()
-        price = data.get(token_id, {}).get("usd")
-
-        if price is None:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to fetch price for {token}"
-            )
-
-        return price
-
-
 @swap_router.post(
     "/swap/simulasi",
     summary="Simulate Token Swap",
@@ -147,27 +155,73 @@ async def swap_tokens(
     amount: float = Query(..., description="Amount of the from_token to swap"),
 ):
     try:
-        price_from = await get_token_price_usd(from_token)
-        price_to = await get_token_price_usd(to_token)
-
-        swapped_amount = (amount * price_from) / price_to
-        swapped_amount = swapped_amount * 0.99  # apply 1% fee for simulation
+        result = await quote(from_token, to_token, amount)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Swap simulation failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        logger.info(
-            f"Simulated Swap {amount} {from_token} → {swapped_amount:.6f} {to_token}"
+    if result["swapped_amount"] is None:
+        missing = from_token if result["price_from_usd"] is None else to_token
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch price for {missing}"
         )
 
-        return {
-            "status": "success",
-            "from_token": from_token,
-            "to_token": to_token,
-            "swapped_amount": round(swapped_amount, 6),
-            "price_from_usd": price_from,
-            "price_to_usd": price_to,
-        }
+    logger.info(
+        f"Simulated Swap {amount} {from_token} → {result['swapped_amount']:.6f} {to_token}"
+    )
 
-    except HTTPException as he:
-        raise he
+    return {"status": "success", **result}
+
+
+@swap_router.post(
+    "/swap/quotes",
+    summary="Bulk Swap Quotes",
+    description=(
+        "Quote many (from_token, to_token, amount) swaps in one request from the cached "
+        "all-pairs conversion matrix. Same 1% simulation fee as `/swap/simulasi`; "
+        "`swapped_amount` is null when a token has no price."
+    ),
+    response_model=SwapQuotesResponse,
+    responses={
+        400: {
+            "description": "Unsupported token",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "error",
+                        "detail": "Token xyz is not supported",
+                    }
+                }
+            },
+        },
+        500: {
+            "description": "Prices not available",
+            "content": {
+                "application/json": {
+                    "example": {"status": "error", "detail": "Harga tidak tersedia"}
+                }
+            },
+        },
+    },
+)
+async def swap_quotes(req: SwapQuotesRequest):
+    try:
+        result = await quote_many(
+            [q.from_token for q in req.quotes],
+            [q.to_token for q in req.quotes],
+            [q.amount for q in req.quotes],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Swap simulation failed: {e}", exc_info=True)
+        logger.error(f"❌ Swap quotes failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"Simulated {len(req.quotes)} swap quotes")
+    return {"status": "success", **result}
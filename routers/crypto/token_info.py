@@ -1,6 +1,9 @@
 # 📍 routers/crypto/token_info.py
 import logging
 import httpx
+from lib import single_flight
+from lib.circuit_breaker import guarded
+from lib.rate_limiter import RateLimitExceeded, acquire
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
@@ -77,7 +80,16 @@ TOKEN_ALIAS = {
 async def fetch_token_metadata_coingecko(token_id: str) -> dict:
     url = f"https://api.coingecko.com/api/v3/coins/{token_id.lower()}"
     async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
+
+        async def fetch():
+            await acquire("coingecko")
+            return await client.get(url)
+
+        # circuit breaker host CoinGecko (404 tetap dihitung upstream sehat)
+        try:
+            resp = await guarded(url, fetch)
+        except RateLimitExceeded as e:
+            raise HTTPException(status_code=429, detail=str(e))
         if resp.status_code != 200:
             raise HTTPException(
                 status_code=404, detail=f"Token {token_id} not found on CoinGecko"
@@ -161,7 +173,10 @@ async def get_token_info(
 ):
     try:
         token_id = TOKEN_ALIAS.get(token.lower(), token.lower())
-        metadata = await fetch_token_metadata_coingecko(token_id)
+        # request bersamaan untuk token yang sama berbagi satu call CoinGecko
+        metadata = await single_flight.do(
+            ("token_info", token_id), lambda: fetch_token_metadata_coingecko(token_id)
+        )
         logger.info(f"Token info fetched from CoinGecko: {token} -> {token_id}")
         return {"status": "success", "token": token.lower(), "metadata": metadata}
     except HTTPException as he:
@@ -1,11 +1,13 @@
 # 📍 routers/crypto/tx_status.py
 import logging
 from fastapi import APIRouter, HTTPException, Query
-from solana.rpc.async_api import AsyncClient as SolanaClient
 from solders.signature import Signature
-from web3 import AsyncWeb3, AsyncHTTPProvider
-from tronpy.async_tron import AsyncTron
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
 import asyncio
+from tronpy.exceptions import TransactionNotFound as TronTransactionNotFound
+from lib.rpc_pool import get_async_web3, get_solana_client, get_tron_client
+from lib.rpc_router import route
 
 tx_status_router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,48 +21,52 @@ async def get_solana_tx_status(
     """Cek status transaksi Solana sampai meta muncul atau max_attempts"""
     signature = Signature.from_string(tx_hash)
     attempt = 0
-    async with SolanaClient(rpc_url) as client:
-        while attempt < max_attempts:
-            attempt += 1
-            for commitment in ["confirmed", "finalized"]:
-                resp = await client.get_transaction(
+    while attempt < max_attempts:
+        attempt += 1
+        for commitment in ["confirmed", "finalized"]:
+            resp = await route(
+                "sol",
+                rpc_url,
+                lambda url: get_solana_client(url).get_transaction(
                     signature, encoding="json", commitment=commitment
-                )
-                tx_data = resp.value
-                if tx_data:
-                    # ambil meta via attribute
-                    meta = getattr(tx_data, "meta", None)
-
-                    # kalau meta ada → return detail lengkap
-                    if meta:
-                        success = getattr(meta, "err", None) is None
-                        return {
-                            "status": "success" if success else "failed",
-                            "tx_hash": tx_hash,
-                            "slot": getattr(tx_data, "slot", None),
-                            "fee": getattr(meta, "fee", None),
-                            "pre_balances": getattr(meta, "pre_balances", None),
-                            "post_balances": getattr(meta, "post_balances", None),
-                            "err": getattr(meta, "err", None),
-                        }
-
-                    # kalau meta None tapi tx ada → treat as success sementara
-                    elif hasattr(tx_data, "slot") and tx_data.slot:
-                        logger.info(
-                            f"Tx {tx_hash} ditemukan di slot {tx_data.slot}, meta belum tersedia, return provisional success"
-                        )
-                        return {
-                            "status": "success",
-                            "tx_hash": tx_hash,
-                            "slot": tx_data.slot,
-                            "note": "Tx sukses, meta belum tersedia, data lengkap menyusul",
-                        }
-
-            backoff = delay * (2 ** (attempt - 1))  # exponential backoff
-            logger.info(
-                f"Attempt {attempt}: tx {tx_hash} belum finalized, retry {backoff}s"
+                ),
+                hedge=True,
             )
-            await asyncio.sleep(backoff)
+            tx_data = resp.value
+            if tx_data:
+                # ambil meta via attribute
+                meta = getattr(tx_data, "meta", None)
+
+                # kalau meta ada → return detail lengkap
+                if meta:
+                    success = getattr(meta, "err", None) is None
+                    return {
+                        "status": "success" if success else "failed",
+                        "tx_hash": tx_hash,
+                        "slot": getattr(tx_data, "slot", None),
+                        "fee": getattr(meta, "fee", None),
+                        "pre_balances": getattr(meta, "pre_balances", None),
+                        "post_balances": getattr(meta, "post_balances", None),
+                        "err": getattr(meta, "err", None),
+                    }
+
+                # kalau meta None tapi tx ada → treat as success sementara
+                elif hasattr(tx_data, "slot") and tx_data.slot:
+                    logger.info(
+                        f"Tx {tx_hash} ditemukan di slot {tx_data.slot}, meta belum tersedia, return provisional success"
+                    )
+                    return {
+                        "status": "success",
+                        "tx_hash": tx_hash,
+                        "slot": tx_data.slot,
+                        "note": "Tx sukses, meta belum tersedia, data lengkap menyusul",
+                    }
+
+        backoff = delay * (2 ** (attempt - 1))  # exponential backoff
+        logger.info(
+            f"Attempt {attempt}: tx {tx_hash} belum finalized, retry {backoff}s"
+        )
+        await asyncio.sleep(backoff)
 
     return {
         "status": "pending",
@@ -70,16 +76,29 @@ async def get_solana_tx_status(
 
 
 # ----------------- EVM (ETH/BSC/Polygon/Base) -----------------
-async def get_evm_tx_status(tx_hash: str, rpc_url: str):
+async def get_evm_tx_status(tx_hash: str, rpc_url: str, chain: str = "eth"):
     """Cek status transaksi EVM chain via RPC"""
-    w3 = AsyncWeb3(AsyncHTTPProvider(rpc_url))
-    receipt = await w3.eth.get_transaction_receipt(tx_hash)
+    try:
+        receipt = await route(
+            chain,
+            rpc_url,
+            lambda url: get_async_web3(url).eth.get_transaction_receipt(tx_hash),
+            expected_errors=(TransactionNotFound,),
+            hedge=True,
+        )
+    except TransactionNotFound:
+        receipt = None
     if receipt is None:
         return {"status": "pending", "tx_hash": tx_hash}
 
-    tx = await w3.eth.get_transaction(tx_hash)
-    value_eth = w3.from_wei(tx.value, "ether")
-    gas_price = w3.from_wei(tx.gasPrice, "gwei") if tx.gasPrice else None
+    tx = await route(
+        chain,
+        rpc_url,
+        lambda url: get_async_web3(url).eth.get_transaction(tx_hash),
+        hedge=True,
+    )
+    value_eth = Web3.from_wei(tx.value, "ether")
+    gas_price = Web3.from_wei(tx.gasPrice, "gwei") if tx.gasPrice else None
 
     return {
         "status": "success" if receipt.status == 1 else "failed",
@@ -97,52 +116,59 @@ async def get_evm_tx_status(tx_hash: str, rpc_url: str):
 
 
 # ----------------- TRON -----------------
-async def get_trx_tx_status(tx_hash: str, max_attempts: int = 5, delay: float = 2.0):
+async def get_trx_tx_status(
+    tx_hash: str, rpc_url: str = None, max_attempts: int = 5, delay: float = 2.0
+):
     """Cek status transaksi TRX via tronpy dengan retry jika rate-limit"""
-    async with AsyncTron() as client:
-        attempt = 0
-        while attempt < max_attempts:
-            attempt += 1
-            try:
-                tx_info = await client.get_transaction_info(tx_hash)
-                receipt = tx_info.get("receipt", {})
-                result = receipt.get("result") if receipt else None
-                if result == "SUCCESS":
-                    status = "success"
-                elif result == "FAILED":
-                    status = "failed"
-                else:
-                    status = "pending"
-
-                return {
-                    "status": status,
-                    "tx_hash": tx_hash,
-                    "fee": tx_info.get("fee"),
-                    "contractResult": tx_info.get("contractResult"),
-                    "logs": tx_info.get("log"),
-                    "blockNumber": tx_info.get("blockNumber"),
-                }
-
-            except Exception as e:
-                # kalau rate-limit, delay lebih lama
-                if (
-                    hasattr(e, "response")
-                    and e.response is not None
-                    and e.response.status_code == 429
-                ):
-                    logger.warning(
-                        f"TronGrid 429, retry {attempt}/{max_attempts} setelah delay {delay}s"
-                    )
-                    await asyncio.sleep(delay * attempt)  # backoff linear
-                else:
-                    logger.error(f"Gagal cek TRX tx {tx_hash}: {e}", exc_info=True)
-                    return {"status": "pending", "tx_hash": tx_hash, "note": str(e)}
+    attempt = 0
+    while attempt < max_attempts:
+        attempt += 1
+        try:
+            tx_info = await route(
+                "trx",
+                rpc_url,
+                lambda url: get_tron_client(url).get_transaction_info(tx_hash),
+                expected_errors=(TronTransactionNotFound,),
+                hedge=True,
+            )
+            receipt = tx_info.get("receipt", {})
+            result = receipt.get("result") if receipt else None
+            if result == "SUCCESS":
+                status = "success"
+            elif result == "FAILED":
+                status = "failed"
+            else:
+                status = "pending"
+
+            return {
+                "status": status,
+                "tx_hash": tx_hash,
+                "fee": tx_info.get("fee"),
+                "contractResult": tx_info.get("contractResult"),
+                "logs": tx_info.get("log"),
+                "blockNumber": tx_info.get("blockNumber"),
+            }
+
+        except Exception as e:
+            # kalau rate-limit, delay lebih lama
+            if (
+                hasattr(e, "response")
+                and e.response is not None
+                and e.response.status_code == 429
+            ):
+                logger.warning(
+                    f"TronGrid 429, retry {attempt}/{max_attempts} setelah delay {delay}s"
+                )
+                await asyncio.sleep(delay * attempt)  # backoff linear
+            else:
+                logger.error(f"Gagal cek TRX tx {tx_hash}: {e}", exc_info=True)
+                return {"status": "pending", "tx_hash": tx_hash, "note": str(e)}
 
-        return {
-            "status": "pending",
-            "tx_hash": tx_hash,
-            "note": "Max retry reached, rate-limit?",
-        }
+    return {
+        "status": "pending",
+        "tx_hash": tx_hash,
+        "note": "Max retry reached, rate-limit?",
+    }
 
 
 # ----------------- API Endpoint -----------------
@@ -153,35 +179,34 @@ async def get_tx_status(
     ),
     tx_hash: str = Query(..., description="Transaction hash to query the status of"),
     rpc_url: str = Query(
-        None, description="RPC URL for the blockchain node (required for EVM & Solana)"
+        None,
+        description="RPC URL for the blockchain node. Several URLs can be comma-separated; "
+        "optional when the server has RPC_URLS_<CHAIN> configured",
     ),
 ):
     chain = chain.lower()
     try:
         if chain in ["sol"]:
-            if not rpc_url:
-                raise HTTPException(
-                    status_code=400, detail="RPC URL harus diberikan untuk Solana"
-                )
             return await get_solana_tx_status(tx_hash, rpc_url)
 
         elif chain in ["eth", "bnb", "polygon", "base"]:
-            if not rpc_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"RPC URL harus diberikan untuk {chain.upper()}",
-                )
             logger.info(f"🔹 Checking {chain.upper()} tx via RPC: {tx_hash}")
-            return await get_evm_tx_status(tx_hash, rpc_url)
+            return await get_evm_tx_status(tx_hash, rpc_url, chain)
 
         elif chain == "trx":
-            return await get_trx_tx_status(tx_hash)
+            # rpc_url opsional, default RPC_URLS_TRX / TRON_RPC_URL
+            return await get_trx_tx_status(tx_hash, rpc_url)
 
         else:
             raise HTTPException(
                 status_code=400, detail=f"Chain {chain} is not supported"
             )
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # misal rpc_url kosong & env RPC_URLS_<CHAIN> tidak diset
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Failed to check tx_status [{chain}]: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))